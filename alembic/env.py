@@ -7,11 +7,14 @@ from backend.config import Config
 from backend.models.shared import db
 from backend.models.asset import Asset
 from backend.models.sensor import SensorData
-from backend.models.inspection import InspectionRecord
+from backend.models.inspection import InspectionRecord, InspectionReading
 from backend.models.risk import RiskAssessment
 from backend.models.asset_graph import AssetNode, AssetEdge
 from backend.models.project import Project
 from backend.models.action import ActionItem
+from backend.models.remaining_life import RemainingLifeEstimate
+from backend.models.running_stats import RunningStats
+from backend.models.dashboard_version import DashboardVersion
 
 config = context.config
 
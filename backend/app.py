@@ -5,12 +5,15 @@ from .models.shared import db
 # Import models to ensure they are registered with SQLAlchemy
 from .models.asset import Asset
 from .models.sensor import SensorData
-from .models.inspection import InspectionRecord
+from .models.inspection import InspectionRecord, InspectionReading
 from .models.risk import RiskAssessment
 from .models.action import ActionItem
 from .models.twin_component import TwinComponent
 from .models.user import User
-from .utils.db_init import init_core_tables, seed_demo_data
+from .models.remaining_life import RemainingLifeEstimate
+from .models.running_stats import RunningStats
+from .models.dashboard_version import DashboardVersion
+from .utils.db_init import init_core_tables, seed_demo_data, backfill_running_stats
 
 def create_app(config_class=Config):
     app = Flask(__name__)
@@ -25,6 +28,11 @@ def create_app(config_class=Config):
             seed_demo_data()
         except Exception:
             db.session.rollback()
+        try:
+            backfill_running_stats()
+        except Exception:
+            db.session.rollback()
+            app.logger.exception("Running statistics backfill failed")
     
     # Register Blueprints
     from .routes.ingestion import ingestion_bp
@@ -50,9 +58,23 @@ def create_app(config_class=Config):
 
     from .routes.twin import twin_bp
     app.register_blueprint(twin_bp, url_prefix='/api/twin')
+
+    if app.config.get('ML_WARMUP'):
+        warm_up_ml()
     
     return app
 
+def warm_up_ml():
+    """
+    Explicit warm-up hook for scoring workers (ML_WARMUP=true, or call from a
+    gunicorn post_fork hook). Imports the ML stack and primes the shared pipelines.
+    """
+    from .routes.analysis import ml_pipeline as analysis_pipeline
+    from .routes.ingestion import ml_pipeline as ingestion_pipeline
+    elapsed = analysis_pipeline.warm_up()
+    ingestion_pipeline.warm_up()
+    return elapsed
+
 if __name__ == "__main__":
     app = create_app()
     with app.app_context():
@@ -14,3 +14,6 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL', 'sqlite:///' + db_path)
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SECRET_KEY = os.getenv('SECRET_KEY', 'dev-secret-key')
+    # Load statsmodels/TensorFlow at boot instead of on the first scoring request.
+    # Leave off for CRUD-only workers so they start fast.
+    ML_WARMUP = os.getenv('ML_WARMUP', 'false').lower() == 'true'
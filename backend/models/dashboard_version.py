@@ -0,0 +1,8 @@
+from .shared import db
+
+class DashboardVersion(db.Model):
+    """Per-project counter bumped in every transaction that changes what the dashboard shows."""
+    __tablename__ = 'dashboard_versions'
+
+    project_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
@@ -18,3 +18,23 @@ class InspectionRecord(db.Model):
             "finding": self.finding,
             "severity": self.severity
         }
+
+
+class InspectionReading(db.Model):
+    """Quantitative inspection measurements (UT thickness, corrosion coupons)."""
+    __tablename__ = 'inspection_readings'
+
+    id = db.Column(db.Integer, primary_key=True)
+    asset_id = db.Column(db.String(50), db.ForeignKey('assets.id'), nullable=False, index=True)
+    timestamp = db.Column(db.DateTime, nullable=False)
+    type = db.Column(db.String(50), nullable=False) # "thickness_mm", "corrosion_rate_mpy"
+    value = db.Column(db.Float, nullable=False)
+    location = db.Column(db.String(100)) # CML / elbow / point id
+
+    def to_dict(self):
+        return {
+            "timestamp": self.timestamp.isoformat(),
+            "type": self.type,
+            "value": self.value,
+            "location": self.location
+        }
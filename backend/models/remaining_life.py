@@ -0,0 +1,47 @@
+from .shared import db
+from datetime import datetime
+
+class RemainingLifeEstimate(db.Model):
+    """Latest remaining-life estimate per asset; rewritten on every project run."""
+    __tablename__ = 'remaining_life_estimates'
+
+    id = db.Column(db.Integer, primary_key=True)
+    asset_id = db.Column(db.String(50), db.ForeignKey('assets.id'), nullable=False, index=True)
+    project_id = db.Column(db.Integer, db.ForeignKey('projects.id'), nullable=True, index=True)
+    computed_at = db.Column(db.DateTime, default=datetime.utcnow)
+    method = db.Column(db.String(30)) # "thickness_trend" / "measured_rate"
+    n_readings = db.Column(db.Integer)
+    governing_location = db.Column(db.String(100)) # CML with the shortest life
+
+    current_thickness_mm = db.Column(db.Float)
+    min_thickness_mm = db.Column(db.Float)
+    corrosion_rate_mm_per_year = db.Column(db.Float)
+    rate_std_error = db.Column(db.Float)
+
+    # None = no measurable wall loss
+    remaining_life_years = db.Column(db.Float)
+    remaining_life_low_years = db.Column(db.Float)
+    remaining_life_high_years = db.Column(db.Float)
+    last_inspection = db.Column(db.DateTime)
+    next_inspection = db.Column(db.DateTime)
+
+    def to_dict(self):
+        def _iso(value):
+            return value.isoformat() if value else None
+        return {
+            "asset_id": self.asset_id,
+            "project_id": self.project_id,
+            "computed_at": _iso(self.computed_at),
+            "method": self.method,
+            "n_readings": self.n_readings,
+            "governing_location": self.governing_location,
+            "current_thickness_mm": self.current_thickness_mm,
+            "min_thickness_mm": self.min_thickness_mm,
+            "corrosion_rate_mm_per_year": self.corrosion_rate_mm_per_year,
+            "rate_std_error": self.rate_std_error,
+            "remaining_life_years": self.remaining_life_years,
+            "remaining_life_low_years": self.remaining_life_low_years,
+            "remaining_life_high_years": self.remaining_life_high_years,
+            "last_inspection": _iso(self.last_inspection),
+            "next_inspection": _iso(self.next_inspection)
+        }
@@ -0,0 +1,36 @@
+from .shared import db
+from datetime import datetime
+
+class RunningStats(db.Model):
+    """Running count / mean / M2 (Welford) of every (asset, metric) series, updated on ingest."""
+    __tablename__ = 'running_stats'
+    __table_args__ = (db.UniqueConstraint('asset_id', 'metric', name='uq_running_stats_series'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    asset_id = db.Column(db.String(50), db.ForeignKey('assets.id'), nullable=False, index=True)
+    metric = db.Column(db.String(50), nullable=False)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    mean = db.Column(db.Float, nullable=False, default=0.0)
+    m2 = db.Column(db.Float, nullable=False, default=0.0) # sum of squared deviations from mean
+    min_value = db.Column(db.Float)
+    max_value = db.Column(db.Float)
+    first_timestamp = db.Column(db.DateTime)
+    last_timestamp = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    @property
+    def std(self):
+        return (self.m2 / (self.count - 1)) ** 0.5 if self.count > 1 else 0.0
+
+    def to_dict(self):
+        return {
+            "asset_id": self.asset_id,
+            "metric": self.metric,
+            "count": self.count,
+            "mean": self.mean,
+            "std": self.std,
+            "min": self.min_value,
+            "max": self.max_value,
+            "first_timestamp": self.first_timestamp.isoformat() if self.first_timestamp else None,
+            "last_timestamp": self.last_timestamp.isoformat() if self.last_timestamp else None
+        }
@@ -11,6 +11,11 @@ from ..services.physics_mapper import PhysicsMapper
 from ..services.ml_pipeline import MLPipeline
 from ..utils.auth import require_auth
 from ..services.asset_summary_service import AssetSummaryService
+from ..services.remaining_life import RemainingLifeService
+from ..services.running_stats import RunningStatsService
+from ..services.quantile_sketch import SketchStore
+from ..services.feature_engine import FeatureEngine
+from ..services.regime_baselines import RegimeBaselineService
 from ..models.sensor import SensorData
 from ..models.asset import Asset
 from ..models.shared import db
@@ -18,10 +23,16 @@ from ..models.shared import db
 analysis_bp = Blueprint('analysis', __name__)
 
 baseline_model = BaselineModel()
+quantile_baseline_model = BaselineModel(mode="quantile")
 analysis_engine = AnalysisEngine()
 physics_mapper = PhysicsMapper()
 ml_pipeline = MLPipeline()
 summary_service = AssetSummaryService()
+remaining_life_service = RemainingLifeService()
+running_stats_service = RunningStatsService()
+feature_engine = FeatureEngine()
+sketch_store = SketchStore(backfill_missing=True)
+regime_baselines = RegimeBaselineService()
 
 @analysis_bp.route('/lca_summary', methods=['GET'])
 @require_auth
@@ -157,6 +168,7 @@ def seed_from_sample(asset, metric=None):
             unit=str(row.get('unit', ''))
         ))
     db.session.bulk_save_objects(records)
+    running_stats_service.rebuild([asset.id])
     db.session.commit()
     return True
 
@@ -166,8 +178,8 @@ def seed_from_synthetic(asset, metric=None, count=120):
     metric_name = metric or "generic"
     # Ensure different synthetic series each time
     random.seed(time.time_ns())
+    # Replaced rows, new rows and the rebuilt statistics commit together
     SensorData.query.filter_by(asset_id=asset.id, type=metric_name).delete()
-    db.session.commit()
     base_time = datetime.utcnow() - timedelta(seconds=count)
     records = []
     for i in range(count):
@@ -185,15 +197,32 @@ def seed_from_synthetic(asset, metric=None, count=120):
             unit=""
         ))
     db.session.bulk_save_objects(records)
+    running_stats_service.rebuild([asset.id])
     db.session.commit()
     return True
 
+ANOMALY_HISTORY_ROWS = 20000
+
+def metric_history(asset_id, metric, limit=ANOMALY_HISTORY_ROWS):
+    """The most recent `limit` stored readings of one series, as a 'value' column."""
+    rows = (
+        db.session.query(SensorData.value)
+        .filter(SensorData.asset_id == asset_id, SensorData.type == metric)
+        .order_by(SensorData.timestamp.desc())
+        .limit(limit)
+        .all()
+    )
+    return pd.DataFrame(rows, columns=["value"])
+
 @analysis_bp.route('/run_diagnosis', methods=['POST'])
 @require_auth
 def run_diagnosis():
     """
     Triggers full diagnostic pipeline for an asset.
     Payload: { "asset_id": "PUMP-01", "asset_type": "rotating_equipment", "data": [...] }
+    Optional "baseline_mode": "quantile" uses percentile envelopes instead of 3-sigma, and
+    "regime_columns": ["rpm", "load"] conditions the envelopes on the operating regime,
+    as trained offline for the metric and those signals (scripts/train_regime_baselines.py).
     In real app, data is fetched from DB. Here we accept JSON payload for proto testing.
     """
     data = request.json
@@ -208,26 +237,64 @@ def run_diagnosis():
     
     # Pipeline Execution
     try:
-        # 1. Checking Baseline (assuming pre-trained for prototype demo)
-        # Train on-the-fly for demo: first 50% is 'normal'
+        # 1. Checking Baseline: the stored running envelope (or quantile sketch) of the
+        # metric when the asset has one, otherwise trained on-the-fly from the first 50% ('normal')
         split = int(len(df) * 0.5)
         df_train = df.iloc[:split]
         df_test = df.iloc[split:]
         
-        baseline_model.train_baseline(asset_type, df_train)
-        deviations = baseline_model.check_deviations(asset_type, df_test)
+        quantile_mode = data.get('baseline_mode') == 'quantile'
+        model = quantile_baseline_model if quantile_mode else baseline_model
+        metric = data.get('metric') or (df['type'].iloc[-1] if 'type' in df.columns else None)
+        stored = None
+        if asset_id and metric:
+            if quantile_mode:
+                sketch = sketch_store.load(asset_id, metric)
+                if sketch.count > 0:
+                    stored = model.envelope_from_sketch(sketch, model.lower_q, model.upper_q)
+            else:
+                stored = running_stats_service.envelopes(asset_id, metric).get(metric)
+        regime_columns = [c for c in data.get('regime_columns', []) if c in df.columns]
+        regime_params = None
+        if regime_columns:
+            # Envelopes per operating regime (e.g. binned rpm / load) of this series, as
+            # trained offline from its stored history; an asset with no stored baseline
+            # at all gets request-local ones from the payload's first half
+            if asset_id and metric:
+                regime_params = regime_baselines.get(asset_id, metric, regime_columns, model.mode)
+            if regime_params is None and stored is None:
+                regime_params = model.regime_envelopes(df_train, regime_columns, columns=['value']) or None
+        if regime_params is not None:
+            deviations = model.deviation_matrix(asset_type, df_test, params=regime_params)
+        elif stored is not None:
+            deviations = model.deviation_matrix(asset_type, df_test, params={'value': stored})
+        else:
+            model.train_baseline(asset_type, df_train)
+            deviations = model.deviation_matrix(asset_type, df_test)
         
         # 2. Anomaly Detection
-        # Assume 'value' is the feature for simplicity, or we compute features here
-        analysis_engine.train_anomaly_model(df_train, ['value'])
-        risk_scores = analysis_engine.calculate_degradation_score(df_test, ['value'])
+        # Assume 'value' is the feature for simplicity, or we compute features here.
+        # The series' model is trained once from its stored history and looked up by
+        # name; without history, a model fitted on the payload stays with this request
+        model_name = analysis_engine.series_model_name(asset_id, metric) if asset_id and metric else None
+        if model_name and analysis_engine.ensure_model(model_name, lambda: metric_history(asset_id, metric), ['value']):
+            risk_scores = analysis_engine.calculate_degradation_score(df_test, ['value'], model_name=model_name)
+        else:
+            local_engine = AnalysisEngine(model_dir=analysis_engine.model_dir)
+            local_engine.train_anomaly_model(df_train, ['value'])
+            risk_scores = local_engine.calculate_degradation_score(df_test, ['value'])
         avg_risk = sum(risk_scores) / len(risk_scores) if risk_scores else 0
         
         # 3. Physics Mapping
-        # Create a mock feature dict from the latest data
-        latest_feat = {
-            "vibration_roll_mean": df_test['value'].mean() if 'value' in df_test else 0
-        }
+        # Features kept current by ingest, under the signal names the rules read
+        # (a stored "vib" series -> vibration_roll_mean); the payload's own data wins
+        latest_feat = {}
+        if asset_id:
+            signals = {row.metric: physics_mapper.signal_for(row.metric) for row in running_stats_service.get(asset_id)}
+            latest_feat.update(feature_engine.latest_features(asset_id, {m: sig for m, sig in signals.items() if sig}))
+        signal = physics_mapper.signal_for(metric) if metric else "vibration"
+        if signal and 'value' in df_test:
+            latest_feat[f"{signal}_roll_mean"] = df_test['value'].mean()
         diagnosis = physics_mapper.map_failure_mode(asset_type, [], latest_feat)
         interpretation = physics_mapper.interpret_risk(avg_risk, diagnosis)
         
@@ -237,7 +304,7 @@ def run_diagnosis():
             "diagnosis": diagnosis,
             "interpretation": interpretation,
             "details": {
-                "deviations_count": len(deviations[deviations['baseline_deviation'] != ""])
+                "deviations_count": deviations["rows_flagged"]
             }
         })
         
@@ -273,11 +340,14 @@ def run_asset():
     """
     Runs ML pipeline on stored sensor data for a given asset + metric.
     Payload: { "asset_id": "P-101", "metric": "pressure", "project_id": 1 }
+    With "mode": "multivariate" all metrics of the asset are scored jointly
+    (falls back to the single metric when fewer than two can be aligned).
     """
     data = request.json or {}
     asset_id = data.get('asset_id')
     metric = data.get('metric')
     project_id = data.get('project_id')
+    mode = data.get('mode', 'univariate')
 
     if not asset_id:
         return jsonify({"error": "asset_id is required"}), 400
@@ -287,6 +357,12 @@ def run_asset():
         if not asset:
             return jsonify({"error": "Asset not found"}), 404
 
+        if mode == 'multivariate':
+            result = ml_pipeline.run_for_asset_multivariate(project_id, asset_id, freq=data.get('freq'))
+            if result:
+                result["seeded"] = False
+                return jsonify(result)
+
         seeded = False
 
         # If metric not provided, use latest metric for this asset
@@ -355,3 +431,41 @@ def asset_summary(asset_id):
                 "affected_assets": 1
             }
         })
+
+@analysis_bp.route('/metrics', methods=['GET'])
+@require_auth
+def analysis_metrics():
+    """Scoring cache hit rate and stats of the last pipeline run in this worker."""
+    return jsonify({
+        "score_cache": ml_pipeline.score_cache.stats(),
+        "last_run": ml_pipeline.last_run_stats
+    })
+
+@analysis_bp.route('/remaining-life/run', methods=['POST'])
+@require_auth
+def run_remaining_life():
+    """
+    Recomputes remaining life for every asset of a project from its thickness inspections.
+    Payload: { "project_id": 1 }
+    """
+    data = request.json or {}
+    project_id = data.get('project_id')
+    if not project_id:
+        return jsonify({"error": "project_id is required"}), 400
+    try:
+        return jsonify(remaining_life_service.run(int(project_id)))
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@analysis_bp.route('/remaining-life', methods=['GET'])
+@require_auth
+def remaining_life():
+    """Stored estimates of a project (?project_id=1, optional &asset_id=), shortest life first."""
+    project_id = request.args.get('project_id')
+    if not project_id:
+        return jsonify({"error": "project_id is required"}), 400
+    try:
+        estimates = remaining_life_service.get_estimates(int(project_id), request.args.get('asset_id'))
+        return jsonify({"project_id": int(project_id), "estimates": estimates})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
@@ -1,12 +1,16 @@
 from flask import Blueprint, jsonify, request
 from ..models.shared import db
 from ..models.asset import Asset
+from ..models.project import Project
 from ..models.sensor import SensorData
 from ..models.risk import RiskAssessment
 from ..models.inspection import InspectionRecord
 import pandas as pd
 import json
 from ..utils.auth import require_auth
+from ..services.dashboard_service import DashboardService
+
+BULK_ID_COLUMNS = ['asset_id', 'assetid', 'tag', 'id']
 
 assets_bp = Blueprint('assets', __name__)
 
@@ -127,6 +131,180 @@ def create_asset():
             "project_id": project_id
         }), 201
 
+def _parse_bulk_rows():
+    """
+    Reads the bulk payload as a list of dicts.
+    Accepts a multipart CSV upload ('file') or a JSON array / {"assets": [...]} body.
+    """
+    if 'file' in request.files:
+        df = pd.read_csv(request.files['file'], dtype=str, keep_default_na=False)
+        df.columns = [c.lower().strip() for c in df.columns]
+        # Id column by BULK_ID_COLUMNS priority; the lower-priority ones are dropped
+        id_col = next((c for c in BULK_ID_COLUMNS if c in df.columns), None)
+        if id_col:
+            df = df.drop(columns=[c for c in BULK_ID_COLUMNS if c in df.columns and c != id_col])
+            df = df.rename(columns={id_col: 'id'})
+        return df.to_dict(orient='records')
+
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get('assets')
+    if not isinstance(data, list):
+        return None
+    return data
+
+def _coerce_project_id(value):
+    if value is None or value == '':
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return value
+
+@assets_bp.route('/bulk', methods=['POST'])
+@require_auth
+def bulk_upsert_assets():
+    """
+    Upserts many assets in one transaction.
+    Expected Query Param: project_id (optional, can be overridden per row)
+    Rows need id (or asset_id/tag) and type. New assets' name defaults to the id;
+    existing assets keep their name / location unless the row provides them.
+    Returns per-row results: created / updated / error.
+    """
+    body = request.get_json(silent=True) if not request.files else None
+    default_project = _coerce_project_id(
+        request.args.get('project_id') or (body.get('project_id') if isinstance(body, dict) else None)
+    )
+
+    try:
+        rows = _parse_bulk_rows()
+    except Exception as e:
+        return jsonify({"error": f"Could not parse payload: {e}"}), 400
+    if rows is None:
+        return jsonify({"error": "Provide a CSV file or a JSON array of assets"}), 400
+
+    # Projects referenced by the payload, checked up front so an unknown id is a
+    # row error instead of a failed transaction
+    project_ids = {default_project} if default_project is not None else set()
+    project_ids.update(
+        _coerce_project_id(row.get('project_id')) for row in rows
+        if isinstance(row, dict) and _coerce_project_id(row.get('project_id')) is not None
+    )
+    numeric_ids = [pid for pid in project_ids if isinstance(pid, int)]
+    known_projects = {
+        pid for (pid,) in db.session.query(Project.id).filter(Project.id.in_(numeric_ids)).all()
+    } if numeric_ids else set()
+    if default_project is not None and default_project not in known_projects:
+        return jsonify({"error": f"Project {default_project} not found"}), 404
+
+    # 1. Per-row validation (no DB access)
+    results = []
+    valid = {}
+    for idx, row in enumerate(rows):
+        if not isinstance(row, dict):
+            results.append({"row": idx, "id": None, "status": "error", "error": "Row must be an object"})
+            continue
+        asset_id = str(row.get('id') or row.get('asset_id') or '').strip()
+        asset_type = str(row.get('type') or '').strip()
+        if not asset_id or not asset_type:
+            results.append({"row": idx, "id": asset_id or None, "status": "error", "error": "id and type are required"})
+            continue
+        if asset_id in valid:
+            results.append({"row": idx, "id": asset_id, "status": "error", "error": "Duplicate id in payload"})
+            continue
+
+        metadata = row.get('metadata')
+        if isinstance(metadata, str) and metadata:
+            try:
+                metadata = json.loads(metadata)
+            except Exception:
+                results.append({"row": idx, "id": asset_id, "status": "error", "error": "metadata is not valid JSON"})
+                continue
+        elif metadata == '':
+            metadata = None
+
+        # Over-long values would fail the whole transaction on Postgres
+        name = str(row.get('name') or '').strip()
+        location = str(row.get('location')) if row.get('location') not in (None, '') else None
+        too_long = [
+            col for col, value in (("id", asset_id), ("type", asset_type), ("name", name), ("location", location))
+            if value and len(value) > Asset.__table__.c[col].type.length
+        ]
+        if too_long:
+            results.append({"row": idx, "id": asset_id, "status": "error",
+                            "error": f"{', '.join(too_long)} too long"})
+            continue
+
+        project_id = _coerce_project_id(row.get('project_id'))
+        if project_id is not None and project_id not in known_projects:
+            results.append({"row": idx, "id": asset_id, "status": "error", "error": f"Project {project_id} not found"})
+            continue
+
+        mapping = {
+            "id": asset_id,
+            "type": asset_type,
+            "project_id": project_id if project_id is not None else default_project,
+        }
+        # Only columns the row actually carries are written over an existing asset
+        if name:
+            mapping["name"] = name
+        if location is not None:
+            mapping["location"] = location
+        if metadata is not None:
+            mapping["metadata_json"] = json.dumps(metadata)
+        result = {"row": idx, "id": asset_id, "status": None}
+        results.append(result)
+        valid[asset_id] = (mapping, result)
+
+    # 2. One query for every existing id -> detects cross-project conflicts set-based
+    existing = {}
+    if valid:
+        existing = dict(
+            db.session.query(Asset.id, Asset.project_id).filter(Asset.id.in_(list(valid.keys()))).all()
+        )
+
+    inserts, updates = [], []
+    for asset_id, (mapping, result) in valid.items():
+        if asset_id not in existing:
+            mapping.setdefault("name", asset_id)
+            mapping.setdefault("location", '')
+            inserts.append(mapping)
+            result["status"] = "created"
+            continue
+        current_project = existing[asset_id]
+        if mapping["project_id"] and current_project and current_project != mapping["project_id"]:
+            result["status"] = "error"
+            result["error"] = "Asset ID exists in another project"
+            continue
+        if not mapping["project_id"]:
+            mapping.pop("project_id")
+        updates.append(mapping)
+        result["status"] = "updated"
+
+    # 3. Single transaction for all writes
+    try:
+        if inserts:
+            db.session.bulk_insert_mappings(Asset, inserts)
+        if updates:
+            db.session.bulk_update_mappings(Asset, updates)
+        # Bulk mappings skip the session events, so the dashboards are bumped here
+        touched = {m.get("project_id") for m in inserts + updates}
+        touched.update(existing[m["id"]] for m in updates)
+        touched.discard(None)
+        if touched:
+            DashboardService.bump(db.session, touched)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": f"Bulk upsert failed, no rows written: {e}"}), 500
+
+    return jsonify({
+        "created": len(inserts),
+        "updated": len(updates),
+        "failed": sum(1 for r in results if r["status"] == "error"),
+        "results": results
+    }), 200
+
 @assets_bp.route('/<asset_id>', methods=['GET'])
 @require_auth
 def get_asset_details(asset_id):
@@ -4,24 +4,33 @@ import os
 from datetime import datetime
 import numpy as np
 import json
+import logging
 from ..models.shared import db
 from ..models.asset import Asset
 from ..models.sensor import SensorData
 from ..models.asset_graph import AssetEdge
-from ..models.inspection import InspectionRecord
+from ..models.inspection import InspectionRecord, InspectionReading
 from ..services.data_quality_service import DataQualityService
 from ..services.preprocessing_service import PreprocessingService
 from ..services.feature_engine import FeatureEngine
 from ..services.ml_pipeline import MLPipeline
+from ..services.change_detector import ChangePointDetector
+from ..services.running_stats import RunningStatsService
+from ..services.quantile_sketch import SketchStore
+from ..services.event_bus import event_bus
 from ..utils.auth import require_auth
 
 ingestion_bp = Blueprint('ingestion', __name__)
+logger = logging.getLogger(__name__)
 
 # Initialize services
 quality_service = DataQualityService()
 preprocessing_service = PreprocessingService()
 feature_engine = FeatureEngine()
 ml_pipeline = MLPipeline()
+change_detector = ChangePointDetector()
+running_stats_service = RunningStatsService()
+sketch_store = SketchStore(backfill_missing=True)
 
 ATTRIBUTE_KEY_MAP = {
     "design pressure": "design_pressure",
@@ -51,6 +60,15 @@ ATTRIBUTE_KEY_MAP = {
     "corrosion_allowance": "corrosion_allowance",
 }
 
+# Inspection CSV column -> InspectionReading type
+INSPECTION_READING_COLUMNS = {
+    "thickness_mm": "thickness_mm",
+    "thickness": "thickness_mm",
+    "corrosion_rate": "corrosion_rate_mpy",
+    "corrosion_rate_mpy": "corrosion_rate_mpy",
+    "rate_mpy": "corrosion_rate_mpy",
+}
+
 UNIT_MAP = {
     "c": "°C",
     "degc": "°C",
@@ -188,16 +206,60 @@ def upload_sensor_data():
             mapped_count += 1
             
         if records:
-            db.session.bulk_save_objects(records)
-            db.session.commit()
+            # The readings and their running baselines are written in one transaction,
+            # so the statistics never drift from the stored data
+            try:
+                db.session.bulk_save_objects(records)
+                running_stats_service.update_from_records(records)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+            try:
+                sketch_store.update_records(records)
+            except Exception:
+                logger.exception("Quantile sketch update failed for project %s", project_id)
             
+        # Streaming change-point detection on the new points only; changed series
+        # go straight to full ARIMA/LSTM scoring below
+        change_events, change_points = [], {}
+        try:
+            change_events = change_detector.update_records(records)
+        except Exception:
+            logger.exception("Change-point detection failed for project %s", project_id)
+            change_events = []
+        for evt in change_events:
+            change_points.setdefault((evt["asset_id"], evt["metric"]), []).append(evt)
+            event_bus.publish(project_id, 'change_point', evt)
+
+        # Rolling / rate-of-change / FFT features of the appended points only
+        feature_rows = {}
+        try:
+            feature_rows = feature_engine.update_records(records)
+        except Exception:
+            logger.exception("Incremental feature update failed for project %s", project_id)
+            feature_rows = {}
+
         # Run ML pipeline for each asset/metric seen
-        ml_summary = ml_pipeline.run_for_assets(project_id, records)
+        ml_summary = ml_pipeline.run_for_assets(project_id, records, change_points=change_points)
+
+        event_bus.publish(project_id, 'ingest', {
+            "kind": "sensor",
+            "total_rows": len(df),
+            "assets_mapped": mapped_count,
+            "skipped_rows": skipped_count,
+            "quality_score": report['score'],
+            "series_scored": len(ml_summary),
+            "change_points": len(change_events),
+            "feature_rows": sum(len(f) for f in feature_rows.values())
+        })
 
         return jsonify({
             "message": "Ingestion Processed",
             "quality_report": report,
             "ml_summary": ml_summary,
+            "ml_stats": ml_pipeline.last_run_stats,
+            "change_points": change_events,
             "data": {
                 "total_rows": len(df),
                 "assets_mapped": mapped_count,
@@ -215,6 +277,8 @@ def upload_inspection_data():
     """
     Ingests CSV inspection data.
     Expected columns: asset_id/tag, date/timestamp, finding, severity, thickness_mm (optional), corrosion_rate (optional)
+    Thickness and corrosion-rate columns (with an optional location/CML column) are stored
+    as InspectionReadings for remaining-life estimation.
     """
     if 'file' not in request.files:
         return jsonify({"error": "No file part"}), 400
@@ -238,7 +302,12 @@ def upload_inspection_data():
             df['date'] = pd.Timestamp.utcnow()
             date_col = 'date'
 
+        # Numeric columns become InspectionReadings for the remaining-life service
+        reading_cols = [(c, reading_type) for c, reading_type in INSPECTION_READING_COLUMNS.items() if c in df.columns]
+        location_col = next((c for c in df.columns if c in ['location', 'cml', 'cml_id', 'point_id', 'elbow_id']), None)
+
         records = []
+        readings = []
         skipped = 0
         valid_assets = {a.id for a in Asset.query.filter_by(project_id=project_id).all()}
         for _, row in df.iterrows():
@@ -257,16 +326,37 @@ def upload_inspection_data():
                 finding=str(row.get('finding', '')),
                 severity=str(row.get('severity', '')),
             ))
+            location = row.get(location_col) if location_col else None
+            for col, reading_type in reading_cols:
+                value = pd.to_numeric(row.get(col), errors='coerce')
+                if pd.isna(value):
+                    continue
+                readings.append(InspectionReading(
+                    asset_id=asset_tag,
+                    timestamp=ts,
+                    type=reading_type,
+                    value=float(value),
+                    location=None if location is None or pd.isna(location) else str(location)
+                ))
 
-        if records:
-            db.session.bulk_save_objects(records)
+        if records or readings:
+            db.session.bulk_save_objects(records + readings)
             db.session.commit()
 
+        event_bus.publish(project_id, 'ingest', {
+            "kind": "inspection",
+            "total_rows": len(df),
+            "records": len(records),
+            "readings": len(readings),
+            "skipped_rows": skipped
+        })
+
         return jsonify({
             "message": "Inspection data ingested",
             "data": {
                 "rows": len(df),
                 "assets": df[asset_col].nunique() if asset_col else 1,
+                "readings": len(readings),
                 "skipped": skipped
             }
         }), 200
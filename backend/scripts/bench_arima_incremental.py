@@ -0,0 +1,55 @@
+"""
+Benchmark: full ARIMA re-estimation vs. filtering with stored params vs. appending
+new points to the saved filter state.
+
+Usage: python -m backend.scripts.bench_arima_incremental [--points 100000] [--append 500]
+"""
+import argparse
+import tempfile
+import time
+import warnings
+import numpy as np
+from backend.services.ml_pipeline import MLPipeline
+from backend.services.model_registry import ModelRegistry
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ARIMA refit vs. append benchmark")
+    parser.add_argument('--points', type=int, default=100_000)
+    parser.add_argument('--append', type=int, default=500)
+    args = parser.parse_args()
+    warnings.filterwarnings('ignore')
+
+    rng = np.random.default_rng(0)
+    total = args.points + args.append
+    series = (100 + np.cumsum(rng.normal(0, 1, total))).astype(np.float64)
+    timestamps = np.arange(total, dtype=np.int64) * 1_000_000_000
+    history, history_ts = series[:args.points], timestamps[:args.points]
+
+    ml = MLPipeline(registry=ModelRegistry(tempfile.mkdtemp()))
+    key = ("BENCH", "pressure")
+
+    _, fit_s = timed(lambda: ml._arima_score(history, key, history_ts))
+    print(f"initial fit + state save ({args.points} pts): {fit_s:.2f}s")
+
+    _, refit_s = timed(lambda: ml._train_arima(series, None))
+    print(f"full refit            ({total} pts): {refit_s:.2f}s")
+
+    meta, arrays = ml.registry.load(*key, 'arima')
+    from statsmodels.tsa.arima.model import ARIMA
+    _, filter_s = timed(lambda: ARIMA(series, order=tuple(meta["order"])).filter(arrays["params"]))
+    print(f"full filter, no refit ({total} pts): {filter_s:.2f}s")
+
+    score, append_s = timed(lambda: ml._arima_score(series, key, timestamps))
+    print(f"append from state     ({args.append} new pts): {append_s:.3f}s  score={score:.3f}")
+    print(f"speed-up vs refit: {refit_s / append_s:.0f}x, vs full filter: {filter_s / append_s:.0f}x")
+
+
+if __name__ == '__main__':
+    main()
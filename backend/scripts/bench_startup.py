@@ -0,0 +1,60 @@
+"""
+Measures worker boot time and memory with and without the ML warm-up.
+
+Usage: python -m backend.scripts.bench_startup [--runs 3]
+Each run is a fresh interpreter so import caches don't hide the cost.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+PROBE = r"""
+import json, resource, sys, time
+start = time.perf_counter()
+from backend.app import create_app, warm_up_ml
+app = create_app()
+boot_s = time.perf_counter() - start
+heavy = [m for m in ('tensorflow', 'statsmodels', 'sklearn') if m in sys.modules]
+rss_boot = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+warm_s = None
+if sys.argv[1] == 'warm':
+    with app.app_context():
+        warm_s = warm_up_ml()
+print(json.dumps({
+    "boot_s": boot_s,
+    "warm_up_s": warm_s,
+    "rss_boot_mb": rss_boot,
+    "rss_final_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "heavy_modules_at_boot": heavy
+}))
+"""
+
+
+def run_probe(mode):
+    root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+    env = {**os.environ, "ML_WARMUP": "false", "DATABASE_URL": os.getenv("DATABASE_URL", "sqlite://"),
+           "TF_CPP_MIN_LOG_LEVEL": "3", "PYTHONPATH": root}
+    out = subprocess.run([sys.executable, "-c", PROBE, mode], capture_output=True, text=True, env=env, cwd=root)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Worker start-up benchmark")
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+
+    for mode in ('crud', 'warm'):
+        results = [run_probe(mode) for _ in range(args.runs)]
+        boot = sorted(r["boot_s"] for r in results)[len(results) // 2]
+        line = f"{mode:>4}: boot {boot:.2f}s (median of {args.runs}), rss {results[-1]['rss_final_mb']:.0f} MB"
+        if mode == 'warm':
+            line += f", warm-up {results[-1]['warm_up_s']:.2f}s"
+        else:
+            line += f", heavy modules at boot: {results[-1]['heavy_modules_at_boot'] or 'none'}"
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
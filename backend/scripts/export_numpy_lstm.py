@@ -0,0 +1,32 @@
+"""
+One-off export of NumPy weights for LSTM registry versions trained before the NumPy
+runtime existed, so scoring workers never have to load them through TensorFlow.
+
+Usage: python -m backend.scripts.export_numpy_lstm [--model-dir backend/model_store/registry]
+"""
+import argparse
+from backend.services.ml_pipeline import MLPipeline
+from backend.services.model_registry import ModelRegistry, DEFAULT_REGISTRY_DIR
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export NumPy weights for trained LSTM models")
+    parser.add_argument('--model-dir', default=DEFAULT_REGISTRY_DIR)
+    args = parser.parse_args()
+
+    ml = MLPipeline(registry=ModelRegistry(args.model_dir), workers=1)
+    exported = skipped = 0
+    for key in ml.registry.iter_series('lstm'):
+        try:
+            if ml.export_numpy_lstm(key):
+                exported += 1
+                print(f"exported {key[0]}/{key[1]}")
+            else:
+                skipped += 1
+        except Exception as e:
+            print(f"failed {key[0]}/{key[1]}: {e}")
+    print(f"Done: {exported} exported, {skipped} already had NumPy weights")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""
+Scheduled re-scoring of every (asset, metric) in a project, e.g. from cron:
+
+    0 2 * * *  cd /app && python -m backend.scripts.rescore_fleet --project-id 1 --cpu-budget 0.5
+
+Progress is checkpointed after every committed batch; rerunning after a crash or
+restart resumes where it stopped. Use --fresh to ignore an unfinished checkpoint.
+"""
+import argparse
+import logging
+import os
+from flask import Flask
+from backend.config import Config
+from backend.models.shared import db
+from backend.models.inspection import InspectionRecord  # noqa: F401  (Asset relationship target)
+from backend.services.fleet_rescore import FleetRescoreJob
+
+
+def create_app():
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    db.init_app(app)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-score all series of a project")
+    parser.add_argument('--project-id', type=int, required=True)
+    parser.add_argument('--batch-size', type=int, default=50, help="Series per transaction")
+    parser.add_argument('--cpu-budget', type=float, default=0.5, help="Fraction of cores for scoring workers")
+    parser.add_argument('--nice', type=int, default=10, help="Niceness increment for this job (0 to keep)")
+    parser.add_argument('--checkpoint', default=None, help="Checkpoint file (default under backend/model_store/checkpoints)")
+    parser.add_argument('--fresh', action='store_true', help="Start over instead of resuming")
+    parser.add_argument('--max-batches', type=int, default=None)
+    parser.add_argument('--window-days', type=float, default=None, help="Score only the last N days of each series")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    if args.nice:
+        # Workers are spawned after this, so they inherit the lower priority
+        os.nice(args.nice)
+
+    app = create_app()
+    with app.app_context():
+        job = FleetRescoreJob(args.project_id, batch_size=args.batch_size, cpu_budget=args.cpu_budget,
+                              checkpoint_path=args.checkpoint, resume=not args.fresh,
+                              window_days=args.window_days)
+        summary = job.run(max_batches=args.max_batches)
+
+    print(f"Scored {summary['scored']} series ({summary['skipped']} skipped, {summary['remaining']} remaining) "
+          f"in {summary['total_s']:.1f}s, {summary['series_per_s']} series/s on {summary['workers']} workers")
+    print("Stage timings (s): " + ", ".join(f"{k} {v:.2f}" for k, v in summary['stage_s'].items()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""
+Nightly fleet retraining of the shared per-asset-type LSTM forecasters.
+
+Usage: python -m backend.scripts.train_fleet_models [--project-id 1] [--epochs 5] [--threads 4]
+Run it on the host that serves scoring so the registry in backend/model_store is shared.
+"""
+import argparse
+import os
+import time
+import pandas as pd
+from flask import Flask
+from backend.config import Config
+from backend.models.shared import db
+from backend.models.asset import Asset
+from backend.models.sensor import SensorData
+from backend.models.inspection import InspectionRecord  # noqa: F401  (Asset relationship target)
+from backend.services.rbi_library import normalize_asset_type
+
+
+def create_app():
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    db.init_app(app)
+    return app
+
+
+def load_series(project_id=None):
+    query = (
+        db.session.query(SensorData.asset_id, SensorData.type, SensorData.timestamp, SensorData.value, Asset.type.label('asset_type'))
+        .join(Asset, Asset.id == SensorData.asset_id)
+    )
+    if project_id:
+        query = query.filter(Asset.project_id == project_id)
+    df = pd.read_sql(query.statement, db.engine)
+    if df.empty:
+        return {}
+    df = df.sort_values(['asset_id', 'type', 'timestamp'])
+    df['group'] = df['asset_type'].map(lambda t: normalize_asset_type(t) or 'generic')
+
+    groups = {}
+    for (group, asset_id, metric), g in df.groupby(['group', 'asset_id', 'type'], sort=False):
+        groups.setdefault(group, {})[(asset_id, metric)] = g['value'].to_numpy()
+    return groups
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train shared LSTM models per asset type")
+    parser.add_argument('--project-id', type=int, default=None)
+    parser.add_argument('--epochs', type=int, default=5)
+    parser.add_argument('--batch-size', type=int, default=1024)
+    parser.add_argument('--max-windows', type=int, default=5000, help="Most recent windows kept per series")
+    parser.add_argument('--threads', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    import tensorflow as tf
+    tf.config.threading.set_intra_op_parallelism_threads(args.threads)
+    tf.config.threading.set_inter_op_parallelism_threads(min(2, args.threads))
+    from backend.services.ml_pipeline import MLPipeline
+
+    app = create_app()
+    ml = MLPipeline()
+    with app.app_context():
+        started = time.perf_counter()
+        groups = load_series(args.project_id)
+        print(f"Loaded {sum(len(v) for v in groups.values())} series in {time.perf_counter() - started:.1f}s")
+
+        for group, series_map in groups.items():
+            t0 = time.perf_counter()
+            meta = ml.train_fleet(series_map, group, epochs=args.epochs, batch_size=args.batch_size,
+                                  max_windows_per_series=args.max_windows)
+            if not meta:
+                print(f"{group}: no trainable series")
+                continue
+            print(f"{group}: v{meta['version']} {meta['n_series']} series, {meta['n_windows']} windows, "
+                  f"median val mse {meta['baseline_error']:.5f} in {time.perf_counter() - t0:.1f}s")
+
+        print(f"Fleet training complete in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
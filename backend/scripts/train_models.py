@@ -6,7 +6,7 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")
 import pandas as pd
 import numpy as np
 from backend.services.preprocessing_service import PreprocessingService
-from backend.services.feature_engine import FeatureEngine
+from backend.services.feature_pipeline import FeaturePipeline
 from backend.services.baseline_model import BaselineModel
 from backend.services.analysis_engine import AnalysisEngine
 
@@ -18,7 +18,6 @@ def train_models_on_synthetic_data():
     
     # Services
     prep = PreprocessingService()
-    fe = FeatureEngine()
     baseline = BaselineModel()
     analysis = AnalysisEngine() # Note: In real app, we'd need one instance per asset/type
     
@@ -64,11 +63,10 @@ def train_models_on_synthetic_data():
                     continue
                 
                 # 1. Feature Engineering
-                # Calculate rolling stats
-                df_feats = fe.compute_rolling_stats(df, window=5, columns=cols_to_train)
-                
-                # Filter for Feature Columns (rolling mean/std)
-                feat_cols = [c for c in df_feats.columns if 'roll_mean' in c or 'roll_std' in c]
+                # Rolling mean/std of every sensor column, planned and computed in one pass
+                pipeline = FeaturePipeline().rolling_stats(cols_to_train, window=5)
+                df_feats = pipeline.transform(df)
+                feat_cols = pipeline.output_columns
                 if not feat_cols:
                     feat_cols = cols_to_train # Fallback to raw values
                 
@@ -98,7 +96,7 @@ def train_models_on_synthetic_data():
             except Exception as e:
                 print(f"      ❌ Training Failed: {e}")
 
-    # Save aggregated baseline envelopes
+    # Save baseline envelopes (one versioned JSON per asset type)
     baseline.save_model()
 
     print("\n📊 Training Summary:")
@@ -0,0 +1,67 @@
+"""
+Trains the regime envelopes run_diagnosis looks up for "regime_columns" requests, one
+per (asset, metric) of every asset that records all the regime signals, e.g. nightly:
+
+    0 3 * * *  cd /app && python -m backend.scripts.train_regime_baselines --regime-columns rpm load
+
+Run it on the host that serves diagnosis so backend/model_store is shared; series
+without a populated regime bin keep using their unconditioned envelope.
+"""
+import argparse
+import time
+from flask import Flask
+from backend.config import Config
+from backend.models.shared import db
+from backend.models.asset import Asset
+from backend.models.sensor import SensorData
+from backend.models.inspection import InspectionRecord  # noqa: F401  (Asset relationship target)
+from backend.services.regime_baselines import RegimeBaselineService
+
+
+def create_app():
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    db.init_app(app)
+    return app
+
+
+def list_series(regime_columns, project_id=None):
+    """(asset_id, metric) of every asset that has readings of all regime_columns."""
+    query = db.session.query(SensorData.asset_id, SensorData.type).distinct()
+    if project_id:
+        query = query.join(Asset, Asset.id == SensorData.asset_id).filter(Asset.project_id == project_id)
+    metrics = {}
+    for asset_id, metric in query.all():
+        metrics.setdefault(asset_id, set()).add(metric)
+    return [
+        (asset_id, metric)
+        for asset_id, found in sorted(metrics.items()) if set(regime_columns) <= found
+        for metric in sorted(found - set(regime_columns))
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train per-series regime envelopes")
+    parser.add_argument('--regime-columns', nargs='+', required=True, help="Regime signals, e.g. rpm load")
+    parser.add_argument('--project-id', type=int, default=None)
+    parser.add_argument('--modes', nargs='+', default=["sigma", "quantile"], choices=["sigma", "quantile"])
+    parser.add_argument('--n-bins', type=int, default=4)
+    parser.add_argument('--min-count', type=int, default=30)
+    args = parser.parse_args()
+
+    app = create_app()
+    service = RegimeBaselineService()
+    with app.app_context():
+        started = time.perf_counter()
+        series = list_series(args.regime_columns, args.project_id)
+        trained = 0
+        for asset_id, metric in series:
+            for mode in args.modes:
+                params = service.train(asset_id, metric, args.regime_columns, mode,
+                                       n_bins=args.n_bins, min_count=args.min_count)
+                trained += params is not None
+        print(f"Trained {trained} regime envelopes for {len(series)} series in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,32 +1,302 @@
+import io
+import os
+import glob
+import threading
+from collections import OrderedDict
+import numpy as np
 import pandas as pd
+from datetime import datetime
 from ..models.risk import RiskAssessment
 from ..models.asset_graph import AssetEdge
 from ..models.shared import db
+from ..utils.file_store import safe_name, atomic_write_bytes, atomic_write_json, read_json, file_lock
+from .remaining_life import fit_linear_trends
+
+MODEL_DIR = os.path.join(os.path.dirname(__file__), '..', 'model_store')
+
+# Score-grid resolution (cells per axis) per feature count; wider feature sets are
+# scored exactly
+GRID_CELLS = {1: 2048, 2: 512, 3: 128}
+
+# A grid is kept only if its mean risk error over the training rows stays below this
+GRID_MAX_RISK_ERROR = 0.01
+
+
+def _sigmoid(x):
+    return 0.5 * (np.tanh(0.5 * x) + 1.0)
+
 
 class AnalysisEngine:
-    def __init__(self):
-        # In a real app, load models from disk
-        self.models = {} 
+    """
+    IsolationForest anomaly models over rolling features (FeatureEngine output).
+
+    Models are saved as <name>-v<N>.joblib next to a <name>.json pointer in
+    model_store and loaded lazily on first use. For up to three features the forest
+    is additionally evaluated once, at training time, on a grid whose bin edges follow
+    the trees' split thresholds; batch scoring is then a searchsorted + table lookup
+    per row instead of walking 100 trees. The grid is dropped when it misses the
+    forest's risk on the training rows by more than GRID_MAX_RISK_ERROR on average.
+    Four or more features are scored exactly by the forest.
+
+    Named models are kept in an LRU of max_models entries, so an engine shared by
+    request threads holds a bounded set; `current` is for single-user callers
+    (training scripts), requests should score by name.
+    """
+
+    def __init__(self, model_dir=MODEL_DIR, n_estimators=100, contamination=0.1, keep_versions=2, max_models=64):
+        self.model_dir = model_dir
+        self.n_estimators = n_estimators
+        self.contamination = contamination
+        self.keep_versions = keep_versions
+        self.max_models = max_models
+        self.models = OrderedDict()
+        self.current = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def series_model_name(asset_id, metric):
+        """Model name of one (asset, metric) series."""
+        return f"iso_forest__{safe_name(asset_id)}__{safe_name(metric)}"
+
+    def _remember(self, name, entry):
+        with self._lock:
+            self.models[name] = entry
+            self.models.move_to_end(name)
+            while len(self.models) > self.max_models:
+                self.models.popitem(last=False)
+
+    def train_anomaly_model(self, data, features, model_name=None):
+        """
+        Fits an IsolationForest on `features` (see fit_anomaly_model) and makes it the
+        current model; with model_name it is also registered under that name.
+        """
+        entry = self.fit_anomaly_model(data, features)
+        self.current = entry
+        if model_name:
+            self._remember(model_name, entry)
+        return entry
+
+    def fit_anomaly_model(self, data, features):
+        """Fits an IsolationForest on `features` (rows with NaNs are dropped); returns its entry."""
+        from sklearn.ensemble import IsolationForest
+        X = data[features].to_numpy(dtype=np.float64)
+        X = X[~np.isnan(X).any(axis=1)]
+        if len(X) == 0:
+            raise ValueError("No complete feature rows to train on")
+
+        model = IsolationForest(n_estimators=self.n_estimators, contamination=self.contamination, random_state=42)
+        model.fit(X)
+
+        # Risk is a logistic of the anomaly score: 0.5 at the contamination threshold,
+        # ~0.12 at the median training row
+        train_scores = -model.score_samples(X)
+        threshold = float(-model.offset_)
+        scale = max((threshold - float(np.median(train_scores))) / 2, 1e-3)
+
+        entry = {
+            "model": model,
+            "fitted": True,
+            "features": list(features),
+            "threshold": threshold,
+            "scale": scale,
+            "n_train": int(len(X)),
+            "grid": self._build_grid(model, len(features)),
+        }
+        if entry["grid"] is not None:
+            approx = self._grid_scores(entry["grid"], X)
+            risk_error = np.abs(_sigmoid((approx - threshold) / scale) - _sigmoid((train_scores - threshold) / scale))
+            if float(np.mean(risk_error)) > GRID_MAX_RISK_ERROR:
+                entry["grid"] = None
+            else:
+                entry["grid"]["max_abs_error"] = float(np.max(np.abs(approx - train_scores)))
+                entry["grid"]["mean_risk_error"] = float(np.mean(risk_error))
+        return entry
+
+    def _build_grid(self, model, n_features):
+        cells = GRID_CELLS.get(n_features)
+        if cells is None:
+            return None
+        edges = []
+        for j in range(n_features):
+            thresholds = np.concatenate([
+                est.tree_.threshold[est.tree_.feature == j] for est in model.estimators_
+            ])
+            if len(thresholds) == 0:
+                edges.append(np.zeros(0))
+                continue
+            unique = np.unique(thresholds)
+            if len(unique) > cells - 1:
+                # Place edges where the trees actually split
+                unique = np.unique(np.quantile(thresholds, np.linspace(0, 1, cells - 1)))
+            edges.append(unique)
 
-    def train_anomaly_model(self, data, features):
+        # One representative point per cell: (e[i-1], e[i]] midpoints, the lowest edge
+        # itself (x <= threshold goes left) and one step above the highest edge
+        axes = []
+        for e in edges:
+            if len(e) == 0:
+                axes.append(np.zeros(1))
+                continue
+            mids = (e[:-1] + e[1:]) / 2
+            top = e[-1] + max(1.0, abs(e[-1])) * 1e-3
+            axes.append(np.concatenate([[e[0]], mids, [top]]))
+        mesh = np.stack([m.ravel() for m in np.meshgrid(*axes, indexing='ij')], axis=1)
+        table = (-model.score_samples(mesh)).astype(np.float32).reshape([len(a) for a in axes])
+        return {"edges": edges, "table": table}
+
+    @staticmethod
+    def _grid_scores(grid, X):
+        idx = tuple(
+            np.searchsorted(e, X[:, j], side='left') if len(e) else np.zeros(len(X), dtype=np.int64)
+            for j, e in enumerate(grid["edges"])
+        )
+        return grid["table"][idx]
+
+    def _entry(self, model_name=None):
+        if model_name is None:
+            if self.current is None:
+                raise ValueError("No anomaly model trained or loaded")
+            return self.current
+        with self._lock:
+            entry = self.models.get(model_name)
+            if entry is not None:
+                self.models.move_to_end(model_name)
+                return entry
+        entry = self.load_model(model_name)
+        self._remember(model_name, entry)
+        return entry
+
+    def has_model(self, name):
+        """Whether `name` is loaded or stored (versioned or legacy)."""
+        with self._lock:
+            if name in self.models:
+                return True
+        return os.path.exists(self._pointer_path(name)) or os.path.exists(os.path.join(self.model_dir, f"{name}.joblib"))
+
+    def ensure_model(self, name, load_data, features, min_rows=50):
         """
-        Mock training of an IsolationForest or similar.
+        Makes sure `name` is stored: if it isn't, fits it on load_data() (a DataFrame
+        with `features`) and saves it, holding the name's file lock so concurrent first
+        requests train it once. Returns False when load_data() has fewer than min_rows.
         """
-        pass
+        if self.has_model(name):
+            return True
+        with file_lock(self._pointer_path(name)):
+            if self.has_model(name):
+                return True
+            data = load_data()
+            if len(data) < min_rows:
+                return False
+            self.save_model(name, self.fit_anomaly_model(data, features))
+        return True
 
-    def calculate_degradation_score(self, data, features):
+    def score_batch(self, X, model_name=None):
         """
-        Returns a mock risk score between 0.0 and 1.0
+        Vectorized risk (0-1) for a 2-D feature array or DataFrame. Rows with NaNs get 0.
+        """
+        entry = self._entry(model_name)
+        if isinstance(X, pd.DataFrame):
+            X = X[entry["features"]].to_numpy(dtype=np.float64) if entry.get("features") else X.to_numpy(dtype=np.float64)
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X[:, np.newaxis]
+        valid = ~np.isnan(X).any(axis=1)
+        raw = np.zeros(len(X), dtype=np.float64)
+        if valid.any():
+            rows = X[valid]
+            if entry.get("grid") is not None:
+                raw[valid] = self._grid_scores(entry["grid"], rows)
+            else:
+                raw[valid] = -entry["model"].score_samples(rows)
+        risk = _sigmoid((raw - entry["threshold"]) / entry["scale"])
+        return np.where(valid, risk, 0.0)
+
+    def calculate_degradation_score(self, data, features, model_name=None):
+        """
+        Returns anomaly risk between 0.0 and 1.0 per row, as a list.
         """
-        # Simple logic: higher values = higher risk
         if data.empty:
             return []
-            
-        # Mock: normalize the first feature to 0-1 range roughly
-        vals = data[features[0]].values
-        # simple min-max mock
-        scores = [(min(abs(x)/100.0, 1.0)) for x in vals]
-        return scores
+        return self.score_batch(data[features], model_name).tolist()
+
+    def predict_time_to_threshold(self, data, column, failure_threshold, time_column=None):
+        """
+        Fits a linear trend to `column` (against `time_column`, or the row position) and
+        returns how far past the last point it reaches failure_threshold, in the units of
+        the time axis. None when the trend is flat or moves away from the threshold.
+        """
+        values = data[column].to_numpy(dtype=np.float64)
+        x = data[time_column].to_numpy(dtype=np.float64) if time_column else np.arange(len(values), dtype=np.float64)
+        valid = ~np.isnan(values) & ~np.isnan(x)
+        if valid.sum() < 2:
+            return None
+        x, values = x[valid], values[valid]
+        fit = fit_linear_trends(x, values, np.zeros(len(x), dtype=np.int64), 1)
+        slope = fit["slope"][0]
+        current = fit["y_mean"][0] + slope * (x.max() - fit["x_mean"][0])
+        gap = failure_threshold - current
+        if np.isnan(slope) or slope == 0 or gap * slope < 0:
+            return None
+        return float(gap / slope)
+
+    def _pointer_path(self, name):
+        return os.path.join(self.model_dir, f"{name}.json")
+
+    def _version_path(self, name, version):
+        return os.path.join(self.model_dir, f"{name}-v{version}.joblib")
+
+    def save_model(self, name, entry=None):
+        """Persists the current (or given) model as the next version of `name`."""
+        import joblib
+        entry = entry or self.current
+        if entry is None:
+            raise ValueError("No anomaly model to save")
+        previous = read_json(self._pointer_path(name)) or {}
+        version = int(previous.get("version", 0)) + 1
+        entry = {**entry, "version": version}
+
+        buffer = io.BytesIO()
+        joblib.dump(entry, buffer)
+        atomic_write_bytes(self._version_path(name, version), buffer.getvalue())
+        atomic_write_json(self._pointer_path(name), {
+            "version": version,
+            "features": entry["features"],
+            "n_train": entry.get("n_train"),
+            "grid": entry.get("grid") is not None,
+            "trained_at": datetime.utcnow().isoformat() + "Z"
+        })
+        self._remember(name, entry)
+        for path in glob.glob(os.path.join(self.model_dir, f"{glob.escape(name)}-v*.joblib")):
+            try:
+                old = int(os.path.basename(path)[len(name) + 2:].split('.', 1)[0])
+            except ValueError:
+                continue
+            if old <= version - self.keep_versions:
+                os.remove(path)
+        return version
+
+    def load_model(self, name):
+        """
+        Loads the current version of `name`; falls back to an unversioned <name>.joblib
+        written before versioning ({'model', 'fitted'} only, scored exactly).
+        """
+        import joblib
+        pointer = read_json(self._pointer_path(name))
+        if pointer:
+            return joblib.load(self._version_path(name, pointer["version"]))
+        legacy_path = os.path.join(self.model_dir, f"{name}.joblib")
+        if not os.path.exists(legacy_path):
+            raise FileNotFoundError(f"No anomaly model named {name}")
+        legacy = joblib.load(legacy_path)
+        model = legacy["model"]
+        return {
+            **legacy,
+            "features": None,
+            "threshold": float(-model.offset_),
+            "scale": 0.05,
+            "grid": None,
+            "version": 0
+        }
 
     def propagate_failure_risk(self, start_asset_id, initial_risk):
         """
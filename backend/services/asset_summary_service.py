@@ -1,6 +1,5 @@
-import pandas as pd
-from .baseline_model import BaselineModel
 from .analysis_engine import AnalysisEngine
+from .running_stats import RunningStatsService
 from .risk_reasoner import compute_cof, build_explainability, choose_degradation_type
 from ..models.sensor import SensorData
 from ..models.risk import RiskAssessment
@@ -9,7 +8,7 @@ from ..models.project import Project
 
 class AssetSummaryService:
     def __init__(self):
-        self.baseline = BaselineModel()
+        self.running_stats = RunningStatsService()
         self.analysis = AnalysisEngine()
 
     def build_summary(self, asset_id, project_id=None):
@@ -17,18 +16,15 @@ class AssetSummaryService:
         if not asset:
             return None
 
-        # Load sensor data
-        sensors = SensorData.query.filter_by(asset_id=asset_id).order_by(SensorData.timestamp.asc()).all()
-        df = pd.DataFrame([{"timestamp": s.timestamp, "value": s.value, "type": s.type} for s in sensors])
+        latest = SensorData.query.filter_by(asset_id=asset_id).order_by(SensorData.timestamp.desc()).first()
 
-        # Baseline
-        baseline_info = {}
-        baseline_confidence = 0
-        if not df.empty:
-            split = int(len(df) * 0.5)
-            train = df.iloc[:split]
-            baseline_info = self.baseline.train_baseline(asset.type, train, columns=['value'])
-            baseline_confidence = min(1.0, len(train) / 100.0)
+        # Baseline: per-metric envelopes from the running statistics (one row per series),
+        # or from a read-only scan of the history if the asset's were never built
+        baseline_info = self.running_stats.envelopes(asset_id)
+        if not baseline_info and latest is not None:
+            baseline_info = self.running_stats.history_envelopes(asset_id)
+        baseline_count = sum(params["count"] for params in baseline_info.values())
+        baseline_confidence = min(1.0, baseline_count / 100.0)
 
         # Risk assessment
         latest_risk = RiskAssessment.query.filter_by(asset_id=asset_id).order_by(RiskAssessment.timestamp.desc()).first()
@@ -58,7 +54,7 @@ class AssetSummaryService:
             except Exception:
                 explain = None
         if not explain:
-            explain = build_explainability(asset, industry, df['type'].iloc[-1] if not df.empty else '', risk_score, cof_score)
+            explain = build_explainability(asset, industry, latest.type if latest else '', risk_score, cof_score)
         explain['degradation_type'] = choose_degradation_type(explain)
 
         return {
@@ -1,32 +1,62 @@
 import pandas as pd
 import numpy as np
-import pickle
 import os
+from .envelope_store import EnvelopeStore
+from .quantile_sketch import QuantileSketch
+
+LEGACY_PICKLE = "baseline_envelopes.pkl"
+
 
 class BaselineModel:
-    def __init__(self, model_dir="backend/model_store"):
+    """
+    Envelopes per asset type: mean +/- 3 sigma (mode "sigma"), or with mode "quantile"
+    the lower_q / upper_q percentiles of a QuantileSketch, which outliers and skewed
+    signals don't distort. train_regime_baseline keys them additionally by operating
+    regime (binned rpm / load). Envelopes trained in this process live in self.envelopes;
+    anything else is read lazily from the EnvelopeStore under <model_dir>/envelopes,
+    which save_model writes one asset type at a time.
+    """
+
+    def __init__(self, model_dir="backend/model_store", store=None, mode="sigma", lower_q=0.001, upper_q=0.999):
+        if mode not in ("sigma", "quantile"):
+            raise ValueError(f"Unknown baseline mode {mode}")
         self.envelopes = {}
         self.model_dir = model_dir
+        self.mode = mode
+        self.lower_q = lower_q
+        self.upper_q = upper_q
         os.makedirs(self.model_dir, exist_ok=True)
+        self.store = store or EnvelopeStore(os.path.join(self.model_dir, "envelopes"))
 
-    def save_model(self, filename="baseline_envelopes.pkl"):
-        path = os.path.join(self.model_dir, filename)
-        with open(path, 'wb') as f:
-            pickle.dump(self.envelopes, f)
-        print(f"Saved Baseline Model to {path}")
-
-    def load_model(self, filename="baseline_envelopes.pkl"):
-        path = os.path.join(self.model_dir, filename)
-        if os.path.exists(path):
-            with open(path, 'rb') as f:
-                self.envelopes = pickle.load(f)
-            print(f"Loaded Baseline Model from {path}")
-        else:
-            print(f"No model found at {path}")
+    def save_model(self, asset_types=None):
+        """Persists the given (default: all in-memory) envelopes; returns {asset_type: version}."""
+        asset_types = list(self.envelopes) if asset_types is None else asset_types
+        versions = {t: self.store.save(t, self.envelopes[t]) for t in asset_types}
+        print(f"Saved {len(versions)} baseline envelopes to {self.store.store_dir}")
+        return versions
+
+    def load_model(self, asset_types=None):
+        """
+        Envelopes load on first use, so this is only needed to prefetch asset_types or
+        to migrate a legacy baseline_envelopes.pkl left in model_dir.
+        """
+        legacy_path = os.path.join(self.model_dir, LEGACY_PICKLE)
+        if os.path.exists(legacy_path) and not self.store.asset_types():
+            imported = self.store.import_pickle(legacy_path)
+            print(f"Migrated {len(imported)} baseline envelopes from {legacy_path}")
+        for asset_type in asset_types or []:
+            self.get_envelope(asset_type)
+
+    def get_envelope(self, asset_type):
+        """Envelope params for asset_type, or None if it was never trained or saved."""
+        if asset_type in self.envelopes:
+            return self.envelopes[asset_type]
+        return self.store.get(asset_type)
 
     def train_baseline(self, asset_type: str, df: pd.DataFrame, columns=None):
         """
-        Calculates statistical baselines (Mean, Std, Min, Max) for an asset type.
+        Calculates statistical baselines (Mean, Std, Min, Max) for an asset type,
+        as 3-sigma or percentile envelopes depending on the mode.
         Assumes 'df' contains only 'Healthy' / 'Normal' data.
         """
         if df.empty:
@@ -36,8 +66,17 @@ class BaselineModel:
             columns = df.select_dtypes(include=[np.number]).columns
             columns = [c for c in columns if c not in ['timestamp', 'id']]
             
+        params = self._column_envelopes(df, columns)
+        self.envelopes[asset_type] = params
+        return params
+
+    def _column_envelopes(self, df, columns):
         params = {}
         for col in columns:
+            if self.mode == "quantile":
+                sketch = QuantileSketch().update(df[col].to_numpy(dtype=np.float64))
+                params[col] = self.envelope_from_sketch(sketch, self.lower_q, self.upper_q)
+                continue
             mean_val = df[col].mean()
             std_val = df[col].std()
             
@@ -51,33 +90,204 @@ class BaselineModel:
                 "upper_bound": float(upper_bound),
                 "lower_bound": float(lower_bound)
             }
-            
-        self.envelopes[asset_type] = params
         return params
 
-    def check_deviations(self, asset_type: str, df: pd.DataFrame):
+    def train_regime_baseline(self, key, df: pd.DataFrame, regime_columns, columns=None, n_bins=4, min_count=30):
+        """Regime envelopes (see regime_envelopes) kept in self.envelopes under key, e.g. an asset id."""
+        params = self.regime_envelopes(df, regime_columns, columns, n_bins, min_count)
+        if params:
+            self.envelopes[key] = params
+        return params
+
+    def regime_envelopes(self, df: pd.DataFrame, regime_columns, columns=None, n_bins=4, min_count=30):
         """
-        Checks new data against the trained baseline.
-        Returns a dataframe with deviation flags.
+        Envelopes conditioned on the operating regime, e.g.
+        regime_columns=['rpm', 'load']. Each regime column is cut into n_bins
+        equal-population bins (edges from the training data); every combination is a
+        regime with its own 3-sigma or percentile bounds per column, computed for all
+        regimes at once with bincount / one sort. Regimes with fewer than min_count
+        training rows, and rows whose regime is unknown at check time, use the
+        unconditioned envelope stored alongside.
         """
-        if asset_type not in self.envelopes:
+        if df.empty:
+            return {}
+        if columns is None:
+            columns = df.select_dtypes(include=[np.number]).columns
+            columns = [c for c in columns if c not in ['timestamp', 'id'] and c not in regime_columns]
+
+        regimes = {"columns": list(regime_columns), "edges": [], "shape": []}
+        for col in regime_columns:
+            values = df[col].to_numpy(dtype=np.float64)
+            values = values[~np.isnan(values)]
+            edges = np.unique(np.quantile(values, np.linspace(0, 1, n_bins + 1)[1:-1])) if len(values) else np.zeros(0)
+            regimes["edges"].append(edges.tolist())
+            regimes["shape"].append(len(edges) + 1)
+        n_regimes = int(np.prod(regimes["shape"]))
+        bins = self.regime_bins(regimes, df)
+
+        fallback = self._column_envelopes(df, columns)
+        envelopes = {}
+        for col in columns:
+            values = df[col].to_numpy(dtype=np.float64)
+            ok = ~np.isnan(values) & (bins >= 0)
+            envelopes[col] = self._binned_envelope(values[ok], bins[ok], n_regimes, fallback[col], min_count)
+
+        return {"regimes": regimes, "min_count": min_count, "envelopes": envelopes, "global": fallback}
+
+    def _binned_envelope(self, values, bins, n_regimes, fallback, min_count):
+        count = np.bincount(bins, minlength=n_regimes)
+        if self.mode == "quantile":
+            # Exact per-regime percentiles: sort by (regime, value), interpolate by position
+            order = np.lexsort((values, bins))
+            ordered = values[order]
+            starts = np.concatenate([[0], np.cumsum(count)[:-1]])
+
+            def _at(q):
+                pos = starts + q * np.maximum(count - 1, 0)
+                lo = np.minimum(np.floor(pos).astype(np.int64), max(len(ordered) - 1, 0))
+                hi = np.minimum(lo + 1, starts + np.maximum(count - 1, 0))
+                frac = pos - np.floor(pos)
+                return ordered[lo] + frac * (ordered[hi] - ordered[lo]) if len(ordered) else np.full(n_regimes, np.nan)
+
+            lower, center, upper = _at(self.lower_q), _at(0.5), _at(self.upper_q)
+            spread = np.full(n_regimes, np.nan)
+        else:
+            safe = np.maximum(count, 1)
+            center = np.bincount(bins, weights=values, minlength=n_regimes) / safe
+            sq = np.bincount(bins, weights=(values - center[bins]) ** 2, minlength=n_regimes)
+            spread = np.sqrt(sq / np.maximum(count - 1, 1))
+            lower, upper = center - 3 * spread, center + 3 * spread
+
+        sparse = count < max(min_count, 2)
+        lower = np.where(sparse, fallback["lower_bound"], lower)
+        upper = np.where(sparse, fallback["upper_bound"], upper)
+        return {
+            "center": np.where(sparse, fallback.get("median", fallback["mean"]), center).tolist(),
+            "std": np.where(sparse, fallback["std"], spread).tolist(),
+            "upper_bound": upper.tolist(),
+            "lower_bound": lower.tolist(),
+            "count": count.tolist()
+        }
+
+    @staticmethod
+    def regime_bins(regimes, df):
+        """Flat regime index of every row; -1 where a regime column is missing or NaN."""
+        n = len(df)
+        flat = np.zeros(n, dtype=np.int64)
+        valid = np.ones(n, dtype=bool)
+        for col, edges, size in zip(regimes["columns"], regimes["edges"], regimes["shape"]):
+            if col not in df.columns:
+                return np.full(n, -1, dtype=np.int64)
+            values = df[col].to_numpy(dtype=np.float64)
+            valid &= ~np.isnan(values)
+            flat = flat * size + np.searchsorted(np.asarray(edges, dtype=np.float64), values, side='right')
+        return np.where(valid, flat, -1)
+
+    @staticmethod
+    def envelope_from_sketch(sketch, lower_q=0.001, upper_q=0.999):
+        """Percentile envelope of a QuantileSketch, in the same format as the 3-sigma one."""
+        lower, median, upper = sketch.quantile([lower_q, 0.5, upper_q])
+        means, weights = sketch.means, sketch.weights
+        total = max(sketch.count, 1.0)
+        mean = float(np.dot(means, weights) / total) if len(weights) else float('nan')
+        return {
+            "mean": mean,
+            "std": float(np.sqrt(np.dot(weights, (means - mean) ** 2) / total)) if len(weights) else float('nan'),
+            "median": float(median),
+            "upper_bound": float(upper),
+            "lower_bound": float(lower),
+            "method": "quantile",
+            "quantiles": [lower_q, upper_q]
+        }
+
+    def deviation_matrix(self, asset_type: str, df: pd.DataFrame, params=None):
+        """
+        Compares every enveloped column of df against its bounds in one pass (the
+        asset type's envelope, or `params` in the same format when given).
+        Returns a dict with the checked columns, an int8 code matrix (rows x columns:
+        1 above upper_bound, -1 below lower_bound, 0 inside or NaN), the values and
+        bounds used (per row for regime envelopes, with each row's regime index), and
+        per-column / total deviation counts.
+        """
+        params = params if params is not None else self.get_envelope(asset_type)
+        if params is None:
             raise ValueError(f"No baseline trained for {asset_type}")
-            
-        params = self.envelopes[asset_type]
+
+        regime = None
+        if "regimes" in params:
+            # Per-row bounds: gather each row's regime from (regimes + 1) x columns tables,
+            # whose last row is the unconditioned envelope that bin -1 falls back to
+            columns = [col for col in params["envelopes"] if col in df.columns]
+            regime = self.regime_bins(params["regimes"], df)
+            tables = {
+                side: np.array(
+                    [params["envelopes"][col][side] + [params["global"][col][side]] for col in columns],
+                    dtype=np.float64
+                ).reshape(len(columns), -1).T
+                for side in ("upper_bound", "lower_bound")
+            }
+            upper, lower = tables["upper_bound"][regime], tables["lower_bound"][regime]
+        else:
+            columns = [col for col in params if col in df.columns]
+            upper = np.array([params[col]["upper_bound"] for col in columns], dtype=np.float64)
+            lower = np.array([params[col]["lower_bound"] for col in columns], dtype=np.float64)
+        values = df[columns].to_numpy(dtype=np.float64) if columns else np.empty((len(df), 0))
+
+        high = values > upper
+        low = (values < lower) & ~high
+        codes = high.astype(np.int8) - low.astype(np.int8)
+        flagged = codes.any(axis=1)
+        return {
+            "columns": columns,
+            "codes": codes,
+            "values": values,
+            "upper": upper,
+            "lower": lower,
+            "high_counts": dict(zip(columns, high.sum(axis=0).tolist())),
+            "low_counts": dict(zip(columns, low.sum(axis=0).tolist())),
+            "rows_flagged": int(flagged.sum()),
+            "flagged": flagged,
+            "regime": regime
+        }
+
+    @staticmethod
+    def describe_deviations(result, rows):
+        """Human-readable deviation text for the given row positions only."""
+        rows = np.asarray(rows, dtype=np.int64)
+        codes, values = result["codes"][rows], result["values"][rows]
+        shape = (len(rows), len(result["columns"]))
+        upper = result["upper"][rows] if result["upper"].ndim == 2 else np.broadcast_to(result["upper"], shape)
+        lower = result["lower"][rows] if result["lower"].ndim == 2 else np.broadcast_to(result["lower"], shape)
+        parts = [[] for _ in range(len(rows))]
+        for j, col in enumerate(result["columns"]):
+            for i in np.flatnonzero(codes[:, j]):
+                val = values[i, j]
+                if codes[i, j] > 0:
+                    parts[i].append(f"{col} HIGH ({val:.2f} > {upper[i, j]:.2f})")
+                else:
+                    parts[i].append(f"{col} LOW ({val:.2f} < {lower[i, j]:.2f})")
+        return ["; ".join(p) for p in parts]
+
+    def check_deviations(self, asset_type: str, df: pd.DataFrame, describe=True):
+        """
+        Checks new data against the trained baseline.
+        Returns a dataframe with deviation flags: 'baseline_deviation' holds the text for
+        flagged rows (empty otherwise; all empty with describe=False) and
+        'baseline_deviation_level' the number of columns out of bounds. The summary
+        counts are in df_out.attrs['deviation_summary'].
+        """
+        result = self.deviation_matrix(asset_type, df)
         df_out = df.copy()
-        
-        deviations = []
-        for index, row in df.iterrows():
-            row_devs = []
-            for col, bounds in params.items():
-                if col in row:
-                    val = row[col]
-                    if val > bounds["upper_bound"]:
-                        row_devs.append(f"{col} HIGH ({val:.2f} > {bounds['upper_bound']:.2f})")
-                    elif val < bounds["lower_bound"]:
-                        row_devs.append(f"{col} LOW ({val:.2f} < {bounds['lower_bound']:.2f})")
-            
-            deviations.append("; ".join(row_devs))
-            
-        df_out['baseline_deviation'] = deviations
+
+        text = np.full(len(df), "", dtype=object)
+        if describe and result["rows_flagged"]:
+            rows = np.flatnonzero(result["flagged"])
+            text[rows] = self.describe_deviations(result, rows)
+        df_out['baseline_deviation'] = text
+        df_out['baseline_deviation_level'] = np.abs(result["codes"]).sum(axis=1)
+        df_out.attrs['deviation_summary'] = {
+            "rows_flagged": result["rows_flagged"],
+            "high": result["high_counts"],
+            "low": result["low_counts"]
+        }
         return df_out
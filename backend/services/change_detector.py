@@ -0,0 +1,198 @@
+import os
+import numpy as np
+import pandas as pd
+from ..utils.file_store import safe_name, atomic_write_json, read_json, file_lock
+
+DEFAULT_STATE_DIR = os.path.join(os.path.dirname(__file__), '..', 'model_store', 'changepoint')
+
+
+def _cusum(increments, start):
+    """
+    One-sided CUSUM S_t = max(0, S_{t-1} + x_t) for a whole batch at once. By the Lindley
+    identity S_t = W_t - min(-S_0, min_{s<=t} W_s) with W the running sum of x.
+    """
+    walk = np.cumsum(increments)
+    return walk - np.minimum(-start, np.minimum.accumulate(walk))
+
+
+def _empty_moments():
+    return {"n": 0, "mean": 0.0, "m2": 0.0, "lag_sum": 0.0, "pairs": 0}
+
+
+def _moments(x, prev):
+    """Count, mean, M2 and lag-1 cross products of a chunk; prev is the point before it (or None)."""
+    mean = float(np.mean(x))
+    lagged = np.concatenate([[prev], x]) if prev is not None else x
+    return {
+        "n": len(x), "mean": mean, "m2": float(np.sum((x - mean) ** 2)),
+        "lag_sum": float(np.dot(lagged[:-1], lagged[1:])), "pairs": len(lagged) - 1
+    }
+
+
+def _merge(a, b):
+    """Chan et al. parallel merge of two moment sets."""
+    n = a["n"] + b["n"]
+    if n == 0:
+        return _empty_moments()
+    delta = b["mean"] - a["mean"]
+    return {
+        "n": n,
+        "mean": a["mean"] + delta * b["n"] / n,
+        "m2": a["m2"] + b["m2"] + delta * delta * a["n"] * b["n"] / n,
+        "lag_sum": a["lag_sum"] + b["lag_sum"],
+        "pairs": a["pairs"] + b["pairs"]
+    }
+
+
+def _fresh_state():
+    return {
+        "warm": False, "reference": _empty_moments(), "pending": _empty_moments(),
+        "mu": None, "sigma": None, "phi": 0.0, "prev": None,
+        "s_pos": 0.0, "s_neg": 0.0,
+        "last_ts": None, "points": 0, "changes": 0, "last_change": None
+    }
+
+
+class ChangePointDetector:
+    """
+    Streaming two-sided CUSUM per (asset, metric), updated from each ingest batch.
+
+    The first `warmup` points of a regime set the reference: mean, an AR(1) coefficient
+    and the innovation sigma. Every later point becomes a prewhitened residual
+    z_t = (x_t - mu - phi (x_{t-1} - mu)) / sigma, so autocorrelated signals don't
+    alarm on ordinary wander, and the upper/lower CUSUMs of z_t -/+ k are advanced in
+    NumPy. Crossing h emits a change event and restarts the warm-up on the new regime.
+
+    The reference is self-starting: every `refresh_every` points (counted per series,
+    so batching doesn't change the result) a stretch that ended with both statistics
+    below h/2 is merged into it. State is one small JSON file per series; points at or
+    before the stored last timestamp are skipped, so re-sent history is never counted
+    twice.
+    """
+
+    def __init__(self, state_dir=DEFAULT_STATE_DIR, warmup=300, k=0.5, h=12.0, max_phi=0.95, refresh_every=100):
+        self.state_dir = state_dir
+        self.warmup = warmup
+        self.k = k
+        self.h = h
+        self.max_phi = max_phi
+        self.refresh_every = refresh_every
+
+    def _state_path(self, asset_id, metric):
+        return os.path.join(self.state_dir, safe_name(asset_id), f"{safe_name(metric)}.json")
+
+    def load_state(self, asset_id, metric):
+        return read_json(self._state_path(asset_id, metric)) or _fresh_state()
+
+    def save_state(self, asset_id, metric, state):
+        atomic_write_json(self._state_path(asset_id, metric), state)
+
+    def _refresh_reference(self, state):
+        ref = state["reference"]
+        n, mean = ref["n"], ref["mean"]
+        var = ref["m2"] / max(n - 1, 1)
+        # Lag-1 autocovariance from the running cross sum (mean-corrected)
+        lag_cov = (ref["lag_sum"] / max(ref["pairs"], 1)) - mean * mean
+        phi = float(np.clip(lag_cov / var, 0.0, self.max_phi)) if var > 0 else 0.0
+        sigma = float(np.sqrt(var * (1 - phi * phi)))
+        state.update({"mu": mean, "phi": phi, "sigma": max(sigma, 1e-9 + 1e-6 * abs(mean))})
+
+    def _restart(self, state):
+        # The new regime warms up from scratch; its first point has no predecessor in it
+        state.update({"warm": False, "reference": _empty_moments(), "pending": _empty_moments(),
+                      "mu": None, "sigma": None, "phi": 0.0, "prev": None, "s_pos": 0.0, "s_neg": 0.0})
+
+    def update(self, asset_id, metric, values, timestamps):
+        """
+        Advances the detector of one series with a new batch (any order; sorted here).
+        Returns the change events found in it, oldest first. The state's
+        read-modify-write holds the series' file lock, like FeatureEngine.update.
+        """
+        with file_lock(self._state_path(asset_id, metric)):
+            return self._update(asset_id, metric, values, timestamps)
+
+    def _update(self, asset_id, metric, values, timestamps):
+        ts = np.asarray(timestamps, dtype='datetime64[ns]')
+        order = np.argsort(ts, kind='stable')
+        ts, x = ts[order], np.asarray(values, dtype=np.float64)[order]
+        state = self.load_state(asset_id, metric)
+        if state["last_ts"] is not None:
+            fresh = ts > np.datetime64(state["last_ts"], 'ns')
+            ts, x = ts[fresh], x[fresh]
+        valid = ~np.isnan(x)
+        ts, x = ts[valid], x[valid]
+        if len(x) == 0:
+            return []
+
+        events = []
+        i = 0
+        while i < len(x):
+            position = state["points"] + i
+            if not state["warm"]:
+                chunk = x[i:i + self.warmup - state["reference"]["n"]]
+                state["reference"] = _merge(state["reference"], _moments(chunk, state["prev"]))
+                state["prev"] = float(chunk[-1])
+                i += len(chunk)
+                if state["reference"]["n"] >= self.warmup:
+                    self._refresh_reference(state)
+                    state.update({"warm": True, "s_pos": 0.0, "s_neg": 0.0})
+                continue
+
+            # Monitor up to the next refresh boundary of this series
+            end = min(len(x), i + self.refresh_every - position % self.refresh_every)
+            seg = x[i:end]
+            prev = np.concatenate([[state["prev"]], seg[:-1]])
+            z = (seg - state["mu"] - state["phi"] * (prev - state["mu"])) / state["sigma"]
+            s_pos = _cusum(z - self.k, state["s_pos"])
+            s_neg = _cusum(-z - self.k, state["s_neg"])
+            alarms = np.flatnonzero((s_pos > self.h) | (s_neg > self.h))
+
+            if alarms.size == 0:
+                state["pending"] = _merge(state["pending"], _moments(seg, state["prev"]))
+                state["s_pos"], state["s_neg"], state["prev"] = float(s_pos[-1]), float(s_neg[-1]), float(seg[-1])
+                if (state["points"] + end) % self.refresh_every == 0:
+                    # Quiet stretches refine the reference so a short warm-up's
+                    # estimation error doesn't persist; one building toward h doesn't
+                    if max(state["s_pos"], state["s_neg"]) < self.h / 2:
+                        state["reference"] = _merge(state["reference"], state["pending"])
+                        self._refresh_reference(state)
+                    state["pending"] = _empty_moments()
+                i = end
+                continue
+
+            j = int(alarms[0])
+            up = s_pos[j] > self.h
+            path = s_pos if up else s_neg
+            # Onset: just after the statistic last sat at zero before the alarm
+            zeros = np.flatnonzero(path[:j + 1] <= 0)
+            onset = min(int(zeros[-1]) + 1 if zeros.size else 0, j)
+            events.append({
+                "asset_id": asset_id,
+                "metric": metric,
+                "timestamp": pd.Timestamp(ts[i + j]).isoformat(),
+                "onset": pd.Timestamp(ts[i + onset]).isoformat(),
+                "direction": "up" if up else "down",
+                "statistic": round(float(path[j]), 3),
+                "baseline_mean": round(state["mu"], 6),
+                "shift": round(float(np.mean(seg[onset:j + 1]) - state["mu"]), 6)
+            })
+            state["changes"] += 1
+            state["last_change"] = events[-1]["timestamp"]
+            self._restart(state)
+            i += j + 1
+
+        state["points"] += int(len(x))
+        state["last_ts"] = str(ts[-1])
+        self.save_state(asset_id, metric, state)
+        return events
+
+    def update_records(self, records):
+        """Advances every series present in a batch of SensorData rows; returns all change events."""
+        grouped = {}
+        for r in records:
+            grouped.setdefault((r.asset_id, r.type), []).append((r.timestamp, r.value))
+        events = []
+        for (asset_id, metric), rows in grouped.items():
+            timestamps, values = zip(*rows)
+            events.extend(self.update(asset_id, metric, values, np.array(timestamps, dtype='datetime64[ns]')))
+        return events
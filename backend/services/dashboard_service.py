@@ -0,0 +1,243 @@
+import threading
+import time
+from sqlalchemy import case, event, func, inspect, select, text
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.util import identity_key
+from ..models.shared import db
+from ..models.asset import Asset
+from ..models.risk import RiskAssessment
+from ..models.action import ActionItem
+from ..models.dashboard_version import DashboardVersion
+
+# Same thresholds as the asset list (routes/assets.py)
+HIGH_RISK_THRESHOLD = 0.7
+MEDIUM_RISK_THRESHOLD = 0.3
+
+# Version row bumped by writes that can't be tied to one project; it invalidates all of them
+ALL_PROJECTS = 0
+
+_BUMP = text("""
+    INSERT INTO dashboard_versions (project_id, version) VALUES (:project_id, 1)
+    ON CONFLICT (project_id) DO UPDATE SET version = dashboard_versions.version + 1
+""")
+
+
+class DashboardService:
+    """
+    Project overview aggregates computed in SQL, cached per project.
+
+    The cache lives in each worker process. Every flush that writes an Asset,
+    RiskAssessment or ActionItem bumps its project's row in dashboard_versions in
+    the same transaction, and entries remember the version they were built at. A
+    hit costs one primary-key read, and commits made by other workers are seen on
+    the next read. Locally, entries are also dropped as soon as such a commit lands.
+    Bulk writes that bypass the session (bulk_*_mappings) call bump() themselves.
+    """
+    _cache = {}
+    _lock = threading.Lock()
+
+    def __init__(self, ttl_seconds=300):
+        self.ttl_seconds = ttl_seconds
+
+    @classmethod
+    def invalidate(cls, project_id=None):
+        with cls._lock:
+            if project_id is None:
+                cls._cache.clear()
+            else:
+                for key in [k for k in cls._cache if k[0] == project_id]:
+                    cls._cache.pop(key, None)
+
+    @staticmethod
+    def bump(session, project_ids):
+        """Bumps the dashboard version of each project (None: all projects) in session's transaction."""
+        ids = sorted({ALL_PROJECTS if pid is None else pid for pid in project_ids})
+        connection = session.connection()
+        for project_id in ids:  # fixed order, so concurrent writers lock rows alike
+            connection.execute(_BUMP, {"project_id": project_id})
+
+    def get_dashboard(self, project_id, top_n=10):
+        key = (project_id, top_n)
+        now = time.monotonic()
+        # Read before the aggregates, so the stored version is never newer than the payload
+        version = self._version(project_id)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached and cached[0] > now and cached[1] == version:
+                return {**cached[2], "cached": True}
+
+        payload = self._build(project_id, top_n)
+        with self._lock:
+            self._cache[key] = (now + self.ttl_seconds, version, payload)
+        return {**payload, "cached": False}
+
+    def _version(self, project_id):
+        versions = dict(
+            db.session.query(DashboardVersion.project_id, DashboardVersion.version)
+            .filter(DashboardVersion.project_id.in_([project_id, ALL_PROJECTS]))
+            .all()
+        )
+        return versions.get(project_id, 0), versions.get(ALL_PROJECTS, 0)
+
+    def _latest_risk_subquery(self, project_id):
+        latest_ts = (
+            db.session.query(
+                RiskAssessment.asset_id.label('asset_id'),
+                func.max(RiskAssessment.timestamp).label('ts')
+            )
+            .join(Asset, Asset.id == RiskAssessment.asset_id)
+            .filter(Asset.project_id == project_id)
+            .group_by(RiskAssessment.asset_id)
+            .subquery()
+        )
+        # Assessments sharing the latest timestamp: the highest id wins, one row per asset
+        latest_id = (
+            db.session.query(func.max(RiskAssessment.id).label('id'))
+            .join(latest_ts, (RiskAssessment.asset_id == latest_ts.c.asset_id) & (RiskAssessment.timestamp == latest_ts.c.ts))
+            .group_by(RiskAssessment.asset_id)
+            .subquery()
+        )
+        return (
+            db.session.query(
+                RiskAssessment.asset_id.label('asset_id'),
+                RiskAssessment.risk_score.label('risk_score'),
+                RiskAssessment.degradation_type.label('degradation_type'),
+                RiskAssessment.timestamp.label('timestamp')
+            )
+            .join(latest_id, RiskAssessment.id == latest_id.c.id)
+            .subquery()
+        )
+
+    def _build(self, project_id, top_n):
+        latest = self._latest_risk_subquery(project_id)
+        score = func.coalesce(latest.c.risk_score, 0.0)
+        risk_level = case(
+            (score > HIGH_RISK_THRESHOLD, 'High'),
+            (score > MEDIUM_RISK_THRESHOLD, 'Medium'),
+            else_='Low'
+        )
+
+        # 1. Histogram + degradation distribution in one grouped aggregate
+        grouped = (
+            db.session.query(risk_level.label('level'), latest.c.degradation_type, func.count(Asset.id))
+            .select_from(Asset)
+            .outerjoin(latest, latest.c.asset_id == Asset.id)
+            .filter(Asset.project_id == project_id)
+            .group_by(risk_level, latest.c.degradation_type)
+            .all()
+        )
+        histogram = {"High": 0, "Medium": 0, "Low": 0}
+        degradation = {}
+        for level, degradation_type, count in grouped:
+            histogram[level] = histogram.get(level, 0) + count
+            if degradation_type:
+                degradation[degradation_type] = degradation.get(degradation_type, 0) + count
+
+        # 2. Top-N risky assets
+        top_rows = (
+            db.session.query(Asset.id, Asset.name, Asset.type, latest.c.risk_score, latest.c.degradation_type, latest.c.timestamp)
+            .join(latest, latest.c.asset_id == Asset.id)
+            .order_by(latest.c.risk_score.desc())
+            .limit(top_n)
+            .all()
+        )
+        top_assets = [
+            {
+                "id": asset_id,
+                "name": name,
+                "type": asset_type,
+                "risk_score": risk_score,
+                "degradation_type": degradation_type,
+                "timestamp": ts.isoformat() if ts else None
+            }
+            for asset_id, name, asset_type, risk_score, degradation_type, ts in top_rows
+        ]
+
+        # 3. Open actions by recommendation
+        open_actions = dict(
+            db.session.query(ActionItem.recommendation, func.count(ActionItem.id))
+            .filter(ActionItem.project_id == project_id, ActionItem.status == 'OPEN')
+            .group_by(ActionItem.recommendation)
+            .all()
+        )
+
+        return {
+            "project_id": project_id,
+            "asset_count": sum(histogram.values()),
+            "risk_histogram": histogram,
+            "top_assets": top_assets,
+            "open_actions": open_actions,
+            "degradation_types": degradation
+        }
+
+
+_PENDING_KEY = 'dashboard_invalidate'
+
+
+def _project_ids(value, history=None):
+    """
+    The project id and, for an edited row, the one it had before (an asset moved between
+    projects). Rows without a project are on no dashboard.
+    """
+    values = [value] + (list(history.deleted) if history is not None else [])
+    out = set()
+    for v in values:
+        if v is None:
+            continue
+        try:
+            out.add(int(v))
+        except (TypeError, ValueError):
+            out.add(None)
+    return out
+
+
+def _collect_changes(session, flush_context):
+    """
+    Bumps the version of every project a flush touched, in the flush's transaction,
+    and remembers them so this process drops its entries once the commit lands.
+    """
+    projects, risk_assets = set(), set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, (Asset, ActionItem)):
+            projects |= _project_ids(obj.project_id, inspect(obj).attrs.project_id.history)
+        elif isinstance(obj, RiskAssessment):
+            risk_assets.add(obj.asset_id)
+    if risk_assets:
+        # Risk rows carry no project_id: their assets' projects come from the identity map
+        # (scoring batches have them loaded) or one lookup; an unknown asset bumps every project
+        found = {}
+        for asset_id in risk_assets:
+            asset = session.identity_map.get(identity_key(Asset, asset_id))
+            if asset is not None:
+                found[asset_id] = asset.project_id
+        missing = risk_assets - set(found)
+        if missing:
+            found.update(session.connection().execute(
+                select(Asset.id, Asset.project_id).where(Asset.id.in_(missing))
+            ).all())
+        for asset_id in risk_assets:
+            projects |= _project_ids(found[asset_id]) if asset_id in found else {None}
+    if not projects:
+        return
+    DashboardService.bump(session, projects)
+    session.info.setdefault(_PENDING_KEY, set()).update(projects)
+
+
+def _invalidate_committed(session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+    if None in pending:
+        DashboardService.invalidate()
+    else:
+        for project_id in pending:
+            DashboardService.invalidate(project_id)
+
+
+def _discard_changes(session):
+    session.info.pop(_PENDING_KEY, None)
+
+
+event.listen(Session, 'after_flush', _collect_changes)
+event.listen(Session, 'after_commit', _invalidate_committed)
+event.listen(Session, 'after_rollback', _discard_changes)
@@ -0,0 +1,118 @@
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from ..utils.file_store import safe_name, atomic_write_json, read_json, file_lock
+
+FORMAT_VERSION = 1
+
+
+class _PlainDataUnpickler(pickle.Unpickler):
+    """Accepts only built-in containers and scalars; any class reference is refused."""
+
+    def find_class(self, module, name):
+        raise pickle.UnpicklingError(f"Refusing to load {module}.{name} from an envelope pickle")
+
+
+class EnvelopeStore:
+    """
+    Baseline envelopes on disk, one JSON document per asset type:
+    <store_dir>/<asset_type>.json = {"asset_type", "version", "format", "saved_at", "params"}.
+
+    Each save bumps the version and replaces the file atomically, so workers saving
+    different asset types never touch each other's files and readers always see a
+    complete document. Reads are lazy and go through an LRU of max_entries types; a
+    cached entry is reused while the file's mtime is unchanged.
+    """
+
+    def __init__(self, store_dir, max_entries=256):
+        self.store_dir = store_dir
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path(self, asset_type):
+        return os.path.join(self.store_dir, f"{safe_name(asset_type)}.json")
+
+    @staticmethod
+    def _mtime(path):
+        try:
+            return os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _remember(self, asset_type, mtime, doc):
+        with self._lock:
+            self._entries[asset_type] = (mtime, doc)
+            self._entries.move_to_end(asset_type)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_document(self, asset_type):
+        """The stored document for asset_type, or None if nothing was saved."""
+        path = self._path(asset_type)
+        mtime = self._mtime(path)
+        if mtime is None:
+            return None
+        with self._lock:
+            cached = self._entries.get(asset_type)
+            if cached and cached[0] == mtime:
+                self._entries.move_to_end(asset_type)
+                return cached[1]
+        doc = read_json(path)
+        if not doc or doc.get("asset_type") != asset_type:
+            return None
+        self._remember(asset_type, mtime, doc)
+        return doc
+
+    def get(self, asset_type):
+        """Envelope params ({column: {mean, std, upper_bound, lower_bound}}) or None."""
+        doc = self.get_document(asset_type)
+        return doc["params"] if doc else None
+
+    def save(self, asset_type, params):
+        """
+        Writes params as the next version of asset_type; returns the version. The version
+        read and the write hold the type's file lock, so concurrent saves get distinct versions.
+        """
+        path = self._path(asset_type)
+        with file_lock(path):
+            previous = read_json(path) or {}
+            doc = {
+                "asset_type": asset_type,
+                "version": int(previous.get("version", 0)) + 1,
+                "format": FORMAT_VERSION,
+                "saved_at": datetime.utcnow().isoformat() + "Z",
+                "params": params
+            }
+            atomic_write_json(path, doc)
+            mtime = self._mtime(path)
+        self._remember(asset_type, mtime, doc)
+        return doc["version"]
+
+    def asset_types(self):
+        if not os.path.isdir(self.store_dir):
+            return []
+        types = []
+        for filename in sorted(os.listdir(self.store_dir)):
+            if filename.endswith('.json') and not filename.startswith('.'):
+                doc = read_json(os.path.join(self.store_dir, filename))
+                if doc and "asset_type" in doc:
+                    types.append(doc["asset_type"])
+        return types
+
+    def import_pickle(self, path):
+        """
+        One-time migration of a legacy baseline_envelopes.pkl (a plain dict of dicts).
+        Only built-in types are unpickled. Returns the asset types imported.
+        """
+        with open(path, 'rb') as f:
+            envelopes = _PlainDataUnpickler(f).load()
+        for asset_type, params in envelopes.items():
+            self.save(asset_type, params)
+        return list(envelopes)
+
+    def clear_cache(self):
+        with self._lock:
+            self._entries.clear()
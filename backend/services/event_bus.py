@@ -0,0 +1,143 @@
+import itertools
+import os
+import queue
+import threading
+from collections import deque
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from ..models.asset import Asset
+from ..models.risk import RiskAssessment
+from ..models.action import ActionItem
+
+
+# Each SSE client holds a gthread worker thread for as long as it is connected; the
+# cap keeps enough of the worker's threads (render.yaml: --threads 16) for normal requests
+MAX_SUBSCRIBERS = int(os.getenv('SSE_MAX_CLIENTS', '8'))
+
+
+class TooManySubscribers(Exception):
+    """Raised by EventBus.subscribe when the process already serves max_subscribers clients."""
+
+
+class Subscription:
+    """One connected client: a bounded queue plus an overflow flag."""
+
+    def __init__(self, project_id, maxsize):
+        self.project_id = project_id
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.overflowed = False
+
+    def offer(self, evt):
+        try:
+            self.queue.put_nowait(evt)
+            return True
+        except queue.Full:
+            # Slow client: drop it, it reconnects with Last-Event-ID and replays history
+            self.overflowed = True
+            return False
+
+    def get(self, timeout=15):
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class EventBus:
+    """
+    In-process fan-out of project events (risk, action, ingest) to SSE clients.
+    Keeps a short per-project history so clients can resume from a Last-Event-ID.
+
+    The bus lives in one process: clients only see events published by the worker
+    they are connected to, so the app runs as a single gunicorn worker (render.yaml).
+    Scaling out needs a shared broker behind publish / subscribe. At most
+    max_subscribers clients are served at once; the rest are turned away.
+    """
+
+    def __init__(self, history_size=500, client_queue_size=100, max_subscribers=MAX_SUBSCRIBERS):
+        self.history_size = history_size
+        self.client_queue_size = client_queue_size
+        self.max_subscribers = max_subscribers
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._history = {}
+        self._subscribers = {}
+
+    def publish(self, project_id, event_type, data):
+        if project_id is None:
+            return None
+        project_id = str(project_id)
+        with self._lock:
+            evt = {"id": next(self._ids), "type": event_type, "data": data}
+            self._history.setdefault(project_id, deque(maxlen=self.history_size)).append(evt)
+            subscribers = list(self._subscribers.get(project_id, ()))
+        for sub in subscribers:
+            if not sub.offer(evt):
+                self.unsubscribe(sub)
+        return evt["id"]
+
+    def subscribe(self, project_id, last_event_id=None):
+        project_id = str(project_id)
+        sub = Subscription(project_id, self.client_queue_size)
+        with self._lock:
+            if sum(len(subs) for subs in self._subscribers.values()) >= self.max_subscribers:
+                raise TooManySubscribers(f"{self.max_subscribers} event streams already open")
+            if last_event_id is not None:
+                for evt in self._history.get(project_id, ()):
+                    if evt["id"] > last_event_id and not sub.offer(evt):
+                        break
+            self._subscribers.setdefault(project_id, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            subs = self._subscribers.get(sub.project_id)
+            if subs:
+                subs.discard(sub)
+
+    def subscriber_count(self, project_id=None):
+        with self._lock:
+            if project_id is not None:
+                return len(self._subscribers.get(str(project_id), ()))
+            return sum(len(s) for s in self._subscribers.values())
+
+
+event_bus = EventBus()
+
+
+def _risk_payload(session, risk):
+    with session.no_autoflush:
+        asset = session.get(Asset, risk.asset_id)
+    return asset.project_id if asset else None, {
+        "id": risk.id,
+        "asset_id": risk.asset_id,
+        **risk.to_dict()
+    }
+
+
+def _collect_events(session, flush_context):
+    """Stage risk/action events during flush; they are only published on commit."""
+    pending = session.info.setdefault('pending_events', [])
+    for obj in session.new:
+        if isinstance(obj, RiskAssessment):
+            project_id, payload = _risk_payload(session, obj)
+            pending.append((project_id, 'risk', payload))
+        elif isinstance(obj, ActionItem):
+            pending.append((obj.project_id, 'action', obj.to_dict()))
+    for obj in session.dirty:
+        if isinstance(obj, ActionItem) and session.is_modified(obj):
+            pending.append((obj.project_id, 'action_updated', obj.to_dict()))
+
+
+def _publish_events(session):
+    for project_id, event_type, payload in session.info.pop('pending_events', []):
+        event_bus.publish(project_id, event_type, payload)
+
+
+def _discard_events(session, *args):
+    session.info.pop('pending_events', None)
+
+
+event.listen(Session, 'after_flush', _collect_events)
+event.listen(Session, 'after_commit', _publish_events)
+event.listen(Session, 'after_rollback', _discard_events)
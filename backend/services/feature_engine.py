@@ -1,9 +1,29 @@
+import os
 import pandas as pd
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from ..utils.file_store import safe_name, atomic_write_json, read_json, file_lock
+
+DEFAULT_STATE_DIR = os.path.join(os.path.dirname(__file__), '..', 'model_store', 'features')
 
 class FeatureEngine:
-    def __init__(self):
-        pass
+    """
+    Batch features of a frame (compute_* methods), plus an incremental mode for
+    appended data: update() computes rolling mean/std, rate of change and dominant
+    frequency of one (asset, metric) series for the new points only.
+
+    Per series the engine keeps the last values needed as look-back (one less than
+    the longest window, a bounded buffer) in a small JSON file. Each batch is
+    evaluated over look-back + batch, so the cost per ingest follows the batch size,
+    not the history length, and every row with a full window gets the same value a
+    full-history recompute would give. Windows are re-summed over that short span
+    rather than carried as running sums, which would drift over a long series.
+    """
+
+    def __init__(self, state_dir=DEFAULT_STATE_DIR, window=3, fft_window=10):
+        self.state_dir = state_dir
+        self.window = window
+        self.fft_window = fft_window
 
     def compute_rolling_stats(self, df: pd.DataFrame, window=3, columns=None):
         """
@@ -49,35 +69,192 @@ class FeatureEngine:
         """
         Computes dominant frequency using FFT over a rolling window.
         Useful for vibration data.
-        This is a simplified implementation for the prototype.
+        Same values as a rolling apply of rfft/argmax, via compute_spectral_features.
+        """
+        return self.compute_spectral_features(df, column, window_size=window_size, features=("dom_freq",))
+
+    def compute_spectral_features(self, df: pd.DataFrame, column, window_size=64, hop=1, sample_rate=1.0,
+                                  features=("dom_freq", "centroid", "bands"), bands=4, chunk_windows=4096):
+        """
+        Rolling spectral features of one column. Windows of window_size samples every
+        `hop` samples are taken as strided views of the series (no copies) and
+        transformed with one batched rfft per chunk of windows (DC removed).
+
+        features: any of
+          "dom_freq" -> <col>_dom_freq, frequency of the largest magnitude bin
+          "centroid" -> <col>_spec_centroid, magnitude-weighted mean frequency
+          "bands"    -> <col>_band_<lo>_<hi>, spectral energy per band; `bands` is a
+                        count of equal-width bands up to Nyquist or a list of (lo, hi)
+        Frequencies are in cycles per sample unless sample_rate (Hz) is given. Each
+        value lands on the row that ends its window (as with rolling); rows between
+        hops carry the last value forward and the leading rows are back-filled.
+        Windows containing NaN give NaN.
         """
         if column not in df.columns:
             return df
-            
+
         df = df.copy()
-        # Create a placeholder for dom_freq
-        df[f'{column}_dom_freq'] = 0.0
-        
-        # We need a numeric numpy array
-        vals = df[column].values
-        
-        # Loop with stride of 1 (expensive) or stride=window for features?
-        # For simplicity, let's just do it for every 'window_size' chunk or just skip complicated FFT for now if rows are few.
-        # Let's do a simple rolling window apply
-        
-        def get_dominant_freq(x):
-            if len(x) < window_size:
-                return 0
-            # Remove DC component
-            x = x - np.mean(x)
-            fft_vals = np.fft.rfft(x)
-            fft_freq = np.fft.rfftfreq(len(x))
-            # Find max magnitude index
-            idx = np.argmax(np.abs(fft_vals))
-            return fft_freq[idx]
-
-        # Use pandas rolling apply
-        # Note: 'raw=True' passes ndarray
-        df[f'{column}_dom_freq'] = df[column].rolling(window=window_size).apply(get_dominant_freq, raw=True).bfill()
-        
+        results = spectral_features(df[column].to_numpy(dtype=np.float64), column, window_size, hop,
+                                    sample_rate, features, bands, chunk_windows)
+        for name, series in results.items():
+            # Leading rows before the first full window take its value
+            df[name] = pd.Series(series, index=df.index).bfill()
         return df
+
+    # Incremental mode -----------------------------------------------------
+
+    @property
+    def lookback(self):
+        """Points kept per series: enough for the longest window and the difference."""
+        return max(self.window, self.fft_window or 0, 2) - 1
+
+    def _config(self):
+        return {"window": self.window, "fft_window": self.fft_window}
+
+    def _state_path(self, asset_id, metric):
+        return os.path.join(self.state_dir, safe_name(asset_id), f"{safe_name(metric)}.json")
+
+    def load_state(self, asset_id, metric):
+        state = read_json(self._state_path(asset_id, metric))
+        # Windows changed since the state was written -> its tail may be too short
+        if not state or state.get("config") != self._config():
+            return {"config": self._config(), "tail": [], "last_ts": None, "points": 0, "latest": {}}
+        return state
+
+    def save_state(self, asset_id, metric, state):
+        atomic_write_json(self._state_path(asset_id, metric), state)
+
+    def update(self, asset_id, metric, values, timestamps):
+        """
+        Features of a new batch of one series (any order; sorted here), indexed by
+        timestamp: <metric>_roll_mean, <metric>_roll_std, <metric>_roc and, with an
+        fft_window, <metric>_dom_freq. Points at or before the last one seen are
+        skipped. Rows still short of a full window take the first full one in the
+        batch, as the batch methods back-fill; the first point of a series has roc 0.
+        """
+        # The state's read-modify-write holds the series' file lock, so concurrent
+        # ingests of one series neither skip nor repeat points
+        with file_lock(self._state_path(asset_id, metric)):
+            return self._update(asset_id, metric, values, timestamps)
+
+    def _update(self, asset_id, metric, values, timestamps):
+        ts = np.asarray(timestamps, dtype='datetime64[ns]')
+        order = np.argsort(ts, kind='stable')
+        ts, x = ts[order], np.asarray(values, dtype=np.float64)[order]
+        state = self.load_state(asset_id, metric)
+        if state["last_ts"] is not None:
+            fresh = ts > np.datetime64(state["last_ts"], 'ns')
+            ts, x = ts[fresh], x[fresh]
+        if len(x) == 0:
+            return pd.DataFrame(index=pd.DatetimeIndex([], name="timestamp"))
+
+        tail = np.asarray(state["tail"], dtype=np.float64)
+        vals = np.concatenate([tail, x])
+        new = slice(len(tail), None)
+        rolling = pd.Series(vals).rolling(window=self.window)
+        windowed = {
+            f'{metric}_roll_mean': rolling.mean().to_numpy()[new],
+            f'{metric}_roll_std': rolling.std().to_numpy()[new]
+        }
+        if self.fft_window:
+            spectral = spectral_features(vals, metric, self.fft_window, features=("dom_freq",))
+            windowed.update({name: series[new] for name, series in spectral.items()})
+
+        out = pd.DataFrame(windowed, index=pd.DatetimeIndex(ts, name="timestamp")).bfill()
+        out[f'{metric}_roc'] = np.nan_to_num(np.diff(vals, prepend=np.nan)[new], nan=0.0)
+
+        state["tail"] = vals[-self.lookback:].tolist()
+        state["last_ts"] = str(ts[-1])
+        state["points"] += int(len(x))
+        latest = out.iloc[-1]
+        state["latest"] = {name: (None if pd.isna(v) else float(v)) for name, v in latest.items()}
+        self.save_state(asset_id, metric, state)
+        return out
+
+    def update_records(self, records):
+        """Advances every series present in a batch of SensorData rows; returns {(asset_id, metric): features}."""
+        grouped = {}
+        for r in records:
+            grouped.setdefault((r.asset_id, r.type), []).append((r.timestamp, r.value))
+        out = {}
+        for (asset_id, metric), rows in grouped.items():
+            timestamps, values = zip(*rows)
+            out[(asset_id, metric)] = self.update(asset_id, metric, values, np.array(timestamps, dtype='datetime64[ns]'))
+        return out
+
+    def latest_features(self, asset_id, metrics):
+        """
+        Latest incremental feature values of an asset's series ({feature: value}), e.g. for
+        PhysicsMapper. `metrics` is a list of metric names, or a {metric: name} mapping that
+        reports a series' features under another name ({"vib": "vibration"} -> vibration_roll_mean).
+        """
+        names = metrics if isinstance(metrics, dict) else {metric: metric for metric in metrics}
+        features = {}
+        for metric, name in names.items():
+            state = read_json(self._state_path(asset_id, metric))
+            if state:
+                features.update({
+                    name + k[len(metric):] if k.startswith(metric + "_") else k: v
+                    for k, v in state.get("latest", {}).items() if v is not None
+                })
+        return features
+
+def spectral_features(vals, column, window_size=64, hop=1, sample_rate=1.0,
+                      features=("dom_freq", "centroid", "bands"), bands=4, chunk_windows=4096):
+    """
+    Row-aligned spectral feature arrays of one series ({output column: array}), NaN
+    before the first full window. See FeatureEngine.compute_spectral_features.
+    """
+    n = len(vals)
+    freqs = np.fft.rfftfreq(window_size, d=1.0 / sample_rate)
+    if np.isscalar(bands):
+        edges = np.linspace(0, freqs[-1], int(bands) + 1)
+        band_ranges = list(zip(edges[:-1], edges[1:]))
+    else:
+        band_ranges = [tuple(b) for b in bands]
+    # Half-open bands, except the top one which includes Nyquist
+    band_masks = [
+        (freqs >= lo) & ((freqs < hi) | ((hi >= freqs[-1]) & (freqs <= hi)))
+        for lo, hi in band_ranges
+    ]
+
+    names = {
+        "dom_freq": [f'{column}_dom_freq'],
+        "centroid": [f'{column}_spec_centroid'],
+        "bands": [f'{column}_band_{lo:g}_{hi:g}' for lo, hi in band_ranges]
+    }
+    out_cols = [name for f in features for name in names[f]]
+    if n < window_size:
+        return {name: np.full(n, np.nan) for name in out_cols}
+
+    windows = sliding_window_view(vals, window_size)[::hop]
+    ends = np.arange(window_size - 1, n, hop)
+    nan_count = np.concatenate([[0], np.cumsum(np.isnan(vals))])
+    nan_windows = (nan_count[ends + 1] - nan_count[ends + 1 - window_size]) > 0
+    results = {name: np.empty(len(windows)) for name in out_cols}
+
+    for start in range(0, len(windows), chunk_windows):
+        spectrum = np.fft.rfft(windows[start:start + chunk_windows], axis=1)
+        spectrum[:, 0] = 0 # same as subtracting each window's mean
+        magnitude = np.abs(spectrum)
+        block = slice(start, start + len(magnitude))
+        if "dom_freq" in features:
+            results[names["dom_freq"][0]][block] = freqs[np.argmax(magnitude, axis=1)]
+        if "centroid" in features:
+            total = magnitude.sum(axis=1)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                results[names["centroid"][0]][block] = np.where(total > 0, magnitude @ freqs / total, 0.0)
+        if "bands" in features:
+            power = magnitude * magnitude
+            for name, mask in zip(names["bands"], band_masks):
+                results[name][block] = power[:, mask].sum(axis=1)
+
+    # Row -> index of the last window ending at or before it
+    owner = (np.arange(window_size - 1, n) - (window_size - 1)) // hop
+    out = {}
+    for name in out_cols:
+        values = results[name]
+        values[nan_windows] = np.nan
+        series = values if hop == 1 else values[owner]
+        out[name] = np.concatenate([np.full(window_size - 1, np.nan), series])
+    return out
@@ -0,0 +1,193 @@
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from .feature_engine import spectral_features
+
+
+class _Node:
+    __slots__ = ("key", "deps", "fn")
+
+    def __init__(self, key, deps, fn):
+        self.key = key
+        self.deps = deps
+        self.fn = fn
+
+
+class FeaturePipeline:
+    """
+    Declarative feature set: features are declared once (rolling_stats,
+    rate_of_change, spectral) and planned into a DAG of
+        column arrays -> shared intermediates -> output columns
+    with each node keyed by what it computes, so e.g. the rolling mean and std of a
+    column over the same window share one pass of windowed sums, and every spectral
+    feature of a (column, window, hop) shares one batched FFT. Outputs are written
+    into a single preallocated float64 matrix and joined to the input once.
+
+    Results can be cached per (series key, version), where version is whatever
+    identifies the data (e.g. last timestamp and row count); the cache is an LRU.
+    Output columns are named as FeatureEngine names them. Leading rows without a full
+    window are back-filled; the first rate of change is 0.
+    """
+
+    def __init__(self, cache_size=256):
+        self._features = []
+        self._cache = OrderedDict()
+        self._cache_size = cache_size
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    # Declarations ---------------------------------------------------------
+
+    def rolling_stats(self, columns, window=3, stats=("mean", "std")):
+        for col in self._as_list(columns):
+            for stat in stats:
+                self._features.append({"kind": "rolling", "column": col, "window": window, "stat": stat,
+                                       "name": f'{col}_roll_{stat}'})
+        return self
+
+    def rate_of_change(self, columns):
+        for col in self._as_list(columns):
+            self._features.append({"kind": "roc", "column": col, "name": f'{col}_roc'})
+        return self
+
+    def spectral(self, column, window_size=64, hop=1, sample_rate=1.0,
+                 features=("dom_freq", "centroid", "bands"), bands=4):
+        spec = (window_size, hop, float(sample_rate), bands if np.isscalar(bands) else tuple(map(tuple, bands)))
+        for kind in features:
+            for name in spectral_features(np.zeros(0), column, window_size, hop, sample_rate, (kind,), bands):
+                self._features.append({"kind": "spectral", "column": column, "spec": spec,
+                                       "spectral": kind, "name": name})
+        return self
+
+    @staticmethod
+    def _as_list(columns):
+        return [columns] if isinstance(columns, str) else list(columns)
+
+    @property
+    def output_columns(self):
+        return [f["name"] for f in self._features]
+
+    @property
+    def signature(self):
+        return tuple(tuple(sorted((k, str(v)) for k, v in f.items())) for f in self._features)
+
+    # Planning -------------------------------------------------------------
+
+    def plan(self):
+        """Topologically ordered nodes: column arrays, then intermediates, then outputs."""
+        nodes = OrderedDict()
+
+        def add(key, deps, fn):
+            if key not in nodes:
+                nodes[key] = _Node(key, deps, fn)
+            return key
+
+        def column(col):
+            return add(("column", col), (), lambda df, memo, col=col: df[col].to_numpy(dtype=np.float64))
+
+        # Spectral outputs sharing (column, spec) are produced by one node
+        spectral_groups = OrderedDict()
+        for f in self._features:
+            if f["kind"] == "spectral":
+                kinds = spectral_groups.setdefault((f["column"], f["spec"]), [])
+                if f["spectral"] not in kinds:
+                    kinds.append(f["spectral"])
+
+        outputs = []
+        for j, f in enumerate(self._features):
+            src = column(f["column"])
+            if f["kind"] == "rolling":
+                sums = add(("window_sums", f["column"], f["window"]), (src,),
+                           lambda df, memo, src=src, w=f["window"]: _window_moments(memo[src], w))
+                outputs.append(add(("output", j), (sums,), lambda df, memo, sums=sums, stat=f["stat"]: memo[sums][stat]))
+            elif f["kind"] == "roc":
+                outputs.append(add(("output", j), (src,), lambda df, memo, src=src: _diff(memo[src])))
+            else:
+                key = ("spectrum", f["column"], f["spec"])
+                window_size, hop, sample_rate, bands = f["spec"]
+                wanted = tuple(spectral_groups[(f["column"], f["spec"])])
+                spec_node = add(key, (src,), lambda df, memo, src=src, col=f["column"], ws=window_size, hop=hop,
+                                sr=sample_rate, wanted=wanted, bands=bands:
+                                spectral_features(memo[src], col, ws, hop, sr, wanted, bands))
+                outputs.append(add(("output", j), (spec_node,), lambda df, memo, node=spec_node, name=f["name"]: memo[node][name]))
+
+        # Outputs last; dependencies were always added before their dependents
+        ordered = [n for k, n in nodes.items() if k[0] != "output"] + [nodes[k] for k in outputs]
+        return ordered, outputs
+
+    # Execution ------------------------------------------------------------
+
+    def compute(self, df):
+        """Feature matrix (rows x declared features) for df, without the input columns."""
+        ordered, outputs = self.plan()
+        # One row per feature, so each output is a contiguous write; the frame built
+        # from its transpose uses the buffer as its block without copying
+        out = np.empty((len(outputs), len(df)), dtype=np.float64)
+        memo = {}
+        position = {key: j for j, key in enumerate(outputs)}
+        for node in ordered:
+            result = node.fn(df, memo)
+            if node.key not in position:
+                memo[node.key] = result
+                continue
+            j = position[node.key]
+            out[j] = result
+            if self._features[j]["kind"] == "roc":
+                np.nan_to_num(out[j], copy=False, nan=0.0)
+            else:
+                _bfill(out[j])
+        return pd.DataFrame(out.T, columns=self.output_columns, index=df.index, copy=False)
+
+    def transform(self, df, key=None, version=None, include_input=True):
+        """
+        Input columns plus the declared features. With a series key and version the
+        result is cached; a different version (new data) recomputes. Cached frames
+        are shared, so treat them as read-only.
+        """
+        cache_key = (key, version, include_input, self.signature) if key is not None else None
+        if cache_key is not None:
+            with self._lock:
+                cached = self._cache.get(cache_key)
+                if cached is not None:
+                    self._cache.move_to_end(cache_key)
+                    self.hits += 1
+                    return cached
+                self.misses += 1
+
+        features = self.compute(df)
+        result = pd.concat([df, features], axis=1) if include_input else features
+
+        if cache_key is not None:
+            with self._lock:
+                self._cache[cache_key] = result
+                while len(self._cache) > self._cache_size:
+                    self._cache.popitem(last=False)
+        return result
+
+
+def _window_moments(values, window):
+    """Rolling mean and sample std over one shared pandas rolling window (NaN windows stay NaN)."""
+    rolling = pd.Series(values, copy=False).rolling(window=window)
+    return {"mean": rolling.mean().to_numpy(), "std": rolling.std().to_numpy()}
+
+
+def _bfill(values):
+    """In-place back-fill of NaNs from the next valid value (trailing NaNs stay)."""
+    missing = np.isnan(values)
+    if missing.any():
+        n = len(values)
+        nxt = np.where(missing, n, np.arange(n))
+        nxt = np.minimum.accumulate(nxt[::-1])[::-1]
+        filled = nxt < n
+        values[missing & filled] = values[nxt[missing & filled]]
+    return values
+
+
+def _diff(values):
+    out = np.empty(len(values))
+    if len(values):
+        out[0] = 0.0
+        out[1:] = np.diff(values)
+    return out
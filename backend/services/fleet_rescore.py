@@ -0,0 +1,161 @@
+import logging
+import math
+import os
+import time
+import uuid
+from datetime import datetime, timedelta
+from sqlalchemy import tuple_
+from ..models.shared import db
+from ..models.asset import Asset
+from ..models.sensor import SensorData
+from ..utils.file_store import atomic_write_json, read_json
+from .ml_pipeline import MLPipeline
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHECKPOINT_DIR = os.path.join(os.path.dirname(__file__), '..', 'model_store', 'checkpoints')
+STAGES = ("load", "prepare", "screen", "full", "write", "checkpoint")
+
+
+def workers_for_budget(cpu_budget, cpu_count=None):
+    """Scoring processes allowed by a CPU budget given as a fraction of the cores (0-1]."""
+    cpu_count = cpu_count or os.cpu_count() or 1
+    return max(1, int(math.floor(cpu_count * min(max(cpu_budget, 0.0), 1.0))))
+
+
+class FleetRescoreJob:
+    """
+    Re-scores every (asset, metric) of a project in batches: one query loads a batch,
+    the MLPipeline cascade scores it (in parallel above one worker), and results are
+    written in a single transaction per batch. After each commit the checkpoint file
+    records the finished series, so a restarted job skips them. window_days limits the
+    readings loaded per series to the most recent days (default: the full history, as
+    MLPipeline.run_for_asset_metric scores).
+    """
+
+    def __init__(self, project_id, ml_pipeline=None, batch_size=50, cpu_budget=0.5,
+                 checkpoint_path=None, resume=True, window_days=None):
+        self.project_id = project_id
+        self.window_days = window_days
+        self.batch_size = batch_size
+        self.workers = workers_for_budget(cpu_budget)
+        self.ml = ml_pipeline or MLPipeline(workers=self.workers, threads_per_worker=1)
+        self.checkpoint_path = checkpoint_path or os.path.join(
+            DEFAULT_CHECKPOINT_DIR, f"rescore-project-{project_id}.json")
+        self.resume = resume
+        self.timings = {stage: 0.0 for stage in STAGES}
+
+    def series_keys(self):
+        rows = (
+            db.session.query(SensorData.asset_id, SensorData.type)
+            .join(Asset, Asset.id == SensorData.asset_id)
+            .filter(Asset.project_id == self.project_id)
+            .distinct()
+            .all()
+        )
+        return sorted((asset_id, metric) for asset_id, metric in rows)
+
+    def _load_checkpoint(self):
+        checkpoint = read_json(self.checkpoint_path) if self.resume else None
+        if not checkpoint or checkpoint.get("project_id") != self.project_id or checkpoint.get("finished"):
+            return {
+                "run_id": uuid.uuid4().hex[:12],
+                "project_id": self.project_id,
+                "started_at": datetime.utcnow().isoformat() + "Z",
+                "done": [],
+                "finished": False
+            }
+        return checkpoint
+
+    def _save_checkpoint(self, checkpoint):
+        checkpoint["updated_at"] = datetime.utcnow().isoformat() + "Z"
+        atomic_write_json(self.checkpoint_path, checkpoint)
+
+    def _load_batch(self, batch):
+        """
+        The batch's readings, grouped per series: only the wanted (asset, metric) pairs
+        and, with a window, the recent rows are read, as (timestamp, value) row tuples.
+        """
+        query = (
+            db.session.query(SensorData.asset_id, SensorData.type, SensorData.timestamp, SensorData.value)
+            .filter(tuple_(SensorData.asset_id, SensorData.type).in_(batch))
+        )
+        if self.window_days is not None:
+            query = query.filter(SensorData.timestamp >= datetime.utcnow() - timedelta(days=self.window_days))
+        grouped = {key: [] for key in batch}
+        for row in query.order_by(SensorData.timestamp.asc()):
+            grouped[(row.asset_id, row.type)].append(row)
+        return grouped
+
+    def _timed(self, stage, started):
+        self.timings[stage] += time.perf_counter() - started
+
+    def run(self, max_batches=None):
+        """Runs (or resumes) the job. Returns a summary dict; max_batches stops early."""
+        checkpoint = self._load_checkpoint()
+        done = {tuple(k) for k in checkpoint["done"]}
+        pending = [key for key in self.series_keys() if key not in done]
+        logger.info("rescore run %s project %s: %d series pending, %d already done, %d workers",
+                    checkpoint["run_id"], self.project_id, len(pending), len(done), self.workers)
+
+        job_started = time.perf_counter()
+        scored_count = skipped = batches = processed = 0
+        try:
+            for start in range(0, len(pending), self.batch_size):
+                if max_batches is not None and batches >= max_batches:
+                    break
+                batch = pending[start:start + self.batch_size]
+                batch_started = time.perf_counter()
+
+                t = time.perf_counter()
+                grouped = self._load_batch(batch)
+                self._timed("load", t)
+
+                self.ml.run_batch(self.project_id, grouped, workers=self.workers)
+                stats = self.ml.last_run_stats
+                failed = {(s["asset_id"], s["metric"]) for s in stats["skipped"]}
+                scored_count += stats["series"] - len(failed)
+                self.timings["prepare"] += stats["prepare_s"]
+                self.timings["screen"] += stats["tiers"]["screen"]["seconds"]
+                self.timings["full"] += stats["tiers"]["full"]["seconds"]
+                self.timings["write"] += stats["write_s"]
+
+                # Only committed series go into the checkpoint; timed-out ones are retried on resume
+                t = time.perf_counter()
+                skipped += len(failed)
+                checkpoint["done"].extend([list(key) for key in batch if key not in failed])
+                checkpoint["failed"] = sorted({tuple(k) for k in checkpoint.get("failed", [])} - set(batch) | failed)
+                self._save_checkpoint(checkpoint)
+                self._timed("checkpoint", t)
+
+                batches += 1
+                processed += len(batch)
+                elapsed = time.perf_counter() - batch_started
+                logger.info("batch %d: %d series in %.2fs (%.1f series/s), %d sent to ARIMA/LSTM",
+                            batches, len(batch), elapsed, len(batch) / max(elapsed, 1e-9), stats["tiers"]["full"]["series"])
+        except Exception:
+            db.session.rollback()
+            raise
+        finally:
+            self.ml.shutdown()
+
+        remaining = len(pending) - processed
+        if remaining == 0:
+            checkpoint["finished"] = True
+            self._save_checkpoint(checkpoint)
+
+        total_s = time.perf_counter() - job_started
+        summary = {
+            "run_id": checkpoint["run_id"],
+            "project_id": self.project_id,
+            "batches": batches,
+            "scored": scored_count,
+            "skipped": skipped,
+            "remaining": remaining,
+            "workers": self.workers,
+            "total_s": round(total_s, 3),
+            "series_per_s": round((scored_count + skipped) / total_s, 2) if total_s > 0 else None,
+            "stage_s": {stage: round(v, 3) for stage, v in self.timings.items()}
+        }
+        logger.info("rescore run %s finished=%s: %s", checkpoint["run_id"], checkpoint["finished"], summary)
+        return summary
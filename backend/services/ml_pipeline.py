@@ -1,9 +1,13 @@
+import os
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed, TimeoutError as FuturesTimeout
+from concurrent.futures.process import BrokenProcessPool
 import numpy as np
 import pandas as pd
 from datetime import datetime
-from statsmodels.tsa.arima.model import ARIMA
-import tensorflow as tf
-from tensorflow.keras import layers, models
+from sqlalchemy import func
+from numpy.lib.stride_tricks import sliding_window_view
 
 from ..models.sensor import SensorData
 from ..models.asset import Asset
@@ -11,11 +15,71 @@ from ..models.risk import RiskAssessment
 from ..models.action import ActionItem
 from ..models.shared import db
 from .risk_reasoner import compute_cof, build_explainability, choose_degradation_type, serialize_explainability
+from .model_registry import ModelRegistry
+from .rbi_library import normalize_asset_type
+from .screening import ScreeningTier
+from .score_cache import ScoreCache
+from .numpy_lstm import NumpyLSTM, export_keras_lstm, has_weights
+from .multivariate_scorer import MultivariateScorer, MULTIVARIATE_METRIC
+from . import scoring_worker
+
+# Registry "asset id" under which shared per-asset-type models are stored
+FLEET_ASSET_ID = "__fleet__"
+
+# Hours a full-model RoF is replayed for a series that keeps passing screening;
+# after that the series goes through ARIMA/LSTM again
+SCREEN_REFRESH_HOURS = 24.0
+
+# Asset ids per IN (...) query when prefetching a batch; stays under SQLite's variable limit
+PREFETCH_CHUNK = 500
+
+
+def _arima_cls():
+    # statsmodels / TensorFlow load on first use, so CRUD-only workers never import them
+    from statsmodels.tsa.arima.model import ARIMA
+    return ARIMA
+
+
+def _tensorflow():
+    # Only needed to train; trained LSTMs are scored by the NumPy runtime
+    import tensorflow as tf
+    return tf
+
+
+class _KerasForecaster:
+    """Adapter for registry versions saved before NumPy weights were exported."""
+
+    def __init__(self, model):
+        self.model = model
+
+    def predict(self, X):
+        return self.model(X[..., np.newaxis], training=False).numpy().flatten()
 
 class MLPipeline:
-    def __init__(self):
+    def __init__(self, registry=None, workers=None, threads_per_worker=None, series_timeout=None, screening=None,
+                 score_cache=None):
         self.min_points_arima = 30
         self.min_points_lstm = 50
+        self.arima_order = (2, 1, 2)
+        self.lstm_window = 10
+        # Points scored at request time once a model is trained
+        self.inference_window = 500
+        self.registry = registry or ModelRegistry()
+        self._lstm_cache = {}
+        # Parallel scoring (run_for_assets); 1 worker = serial in-process
+        self.workers = workers if workers is not None else int(os.getenv('ML_SCORING_WORKERS', '1'))
+        self.threads_per_worker = threads_per_worker or int(os.getenv('ML_THREADS_PER_WORKER', '1'))
+        self.series_timeout = series_timeout or float(os.getenv('ML_SERIES_TIMEOUT', '120'))
+        self._executor = None
+        self.last_run_stats = {}
+        # Tier 1 of the cascade; None (or ML_SCREENING=false) sends every series to ARIMA/LSTM
+        if screening is None and os.getenv('ML_SCREENING', 'true').lower() == 'true':
+            screening = ScreeningTier(window=self.inference_window, min_points=self.min_points_arima,
+                                      state_path=os.path.join(self.registry.model_dir, 'screening.json'))
+        self.screening = screening or None
+        self.screen_refresh_hours = float(os.getenv('ML_SCREEN_REFRESH_HOURS', SCREEN_REFRESH_HOURS))
+        self.score_cache = score_cache or ScoreCache()
+        self.multivariate = MultivariateScorer(self.registry, window=self.inference_window)
 
     def _series_from_records(self, records):
         df = pd.DataFrame([
@@ -32,86 +96,387 @@ class MLPipeline:
         metric = df["metric"].iloc[-1]
         return df["value"].values.astype(np.float32), metric, df
 
-    def _arima_score(self, series):
+    def _residual_error(self, residuals, series):
+        # First residual of a differenced model is the raw level, skip it
+        residuals = np.asarray(residuals)[self.arima_order[1]:]
+        return float(np.mean(np.abs(residuals)) / (np.std(series) + 1e-6))
+
+    def _save_arima_state(self, key, version, filter_results, residuals, values, last_ts):
+        """Final predicted state + recent residuals, so new points can be filtered on their own."""
+        self.registry.save_state(
+            *key, 'arima', version,
+            state=filter_results.predicted_state[:, -1],
+            state_cov=filter_results.predicted_state_cov[:, :, -1],
+            recent_resid=np.asarray(residuals, dtype=np.float64)[-self.inference_window:],
+            recent_values=np.asarray(values, dtype=np.float64)[-self.inference_window:],
+            last_ts=np.array([last_ts], dtype=np.int64)
+        )
+
+    def _train_arima(self, series, key=None, timestamps=None):
+        model = _arima_cls()(series, order=self.arima_order)
+        fitted = model.fit()
+        error = self._residual_error(fitted.resid, series)
+        if key is not None:
+            meta = self.registry.save(*key, 'arima', {
+                "order": list(self.arima_order),
+                "n_obs": int(len(series)),
+                "baseline_error": error
+            }, arrays={"params": np.asarray(fitted.params, dtype=np.float64)})
+            if timestamps is not None:
+                residuals = np.asarray(fitted.resid)[self.arima_order[1]:]
+                self._save_arima_state(key, meta["version"], fitted.filter_results, residuals, series, timestamps[-1])
+        return error
+
+    def _arima_append(self, key, meta, params, state, series, timestamps):
+        """
+        Extends the stored filter with observations newer than the saved watermark.
+        Cost is O(new points): no re-estimation and no pass over the history.
+        """
+        new_mask = timestamps > state["last_ts"][0]
+        recent_resid, recent_values = state["recent_resid"], state["recent_values"]
+        if new_mask.any():
+            new_values = series[new_mask]
+            model = _arima_cls()(new_values, order=tuple(meta["order"]))
+            model.initialize_known(state["state"], state["state_cov"])
+            filtered = model.filter(params)
+            recent_resid = np.concatenate([recent_resid, filtered.filter_results.forecasts_error[0]])
+            recent_values = np.concatenate([recent_values, new_values])
+            self._save_arima_state(key, meta["version"], filtered.filter_results, recent_resid, recent_values, timestamps[new_mask][-1])
+        return float(np.mean(np.abs(recent_resid[-self.inference_window:])) /
+                     (np.std(recent_values[-self.inference_window:]) + 1e-6))
+
+    def _arima_score(self, series, key=None, timestamps=None):
+        """
+        key=(asset_id, metric) enables the model registry: the first call fits and
+        persists ARIMA params, later calls reuse them without re-estimation. With
+        timestamps (int64 ns) the saved filter state is extended with only the points
+        after the last watermark; otherwise the recent window is filtered from scratch.
+        """
         if series is None or len(series) < self.min_points_arima:
             return None
         try:
-            model = ARIMA(series, order=(2, 1, 2))
-            fitted = model.fit()
-            residuals = fitted.resid
-            score = np.mean(np.abs(residuals)) / (np.std(series) + 1e-6)
-            return float(np.tanh(score))
+            entry = self.registry.load(*key, 'arima') if key is not None else None
+            if entry is None:
+                return float(np.tanh(self._train_arima(series, key, timestamps)))
+
+            meta, arrays = entry
+            state = None
+            if timestamps is not None:
+                state = self.registry.load_state(*key, 'arima', meta["version"])
+            if state is not None:
+                error = self._arima_append(key, meta, arrays["params"], state, series, timestamps)
+            else:
+                window = series[-self.inference_window:]
+                filtered = _arima_cls()(window, order=tuple(meta["order"])).filter(arrays["params"])
+                error = self._residual_error(filtered.resid, window)
+            if self.registry.needs_retrain(meta, error):
+                self._train_arima(series, key, timestamps)
+            return float(np.tanh(error))
         except Exception:
             return None
 
-    def _lstm_score(self, series):
+    def _make_windows(self, norm):
+        windows = sliding_window_view(norm, self.lstm_window + 1)
+        return windows[:, :-1], windows[:, -1]
+
+    def _build_lstm_model(self):
+        tf = _tensorflow()
+        layers = tf.keras.layers
+        model = tf.keras.models.Sequential([
+            layers.Input(shape=(self.lstm_window, 1)),
+            layers.LSTM(16, return_sequences=False),
+            layers.Dense(1)
+        ])
+        model.compile(optimizer='adam', loss='mse')
+        return model
+
+    def _train_lstm(self, series, min_v, max_v, key=None):
+        _tensorflow().random.set_seed(42)
+        norm = (series - min_v) / (max_v - min_v)
+        X, y = self._make_windows(norm)
+
+        # Train/test split
+        split = int(len(X) * 0.8)
+        X_train, y_train = X[:split, :, np.newaxis], y[:split]
+        X_test, y_test = X[split:, :, np.newaxis], y[split:]
+
+        model = self._build_lstm_model()
+        model.fit(X_train, y_train, epochs=10, batch_size=16, verbose=0)
+
+        preds = model.predict(X_test, verbose=0).flatten()
+        mse = float(np.mean((preds - y_test) ** 2))
+        if key is not None:
+            meta = self.registry.save(*key, 'lstm', {
+                "window": self.lstm_window,
+                "min": float(min_v),
+                "max": float(max_v),
+                "n_obs": int(len(series)),
+                "baseline_error": mse
+            }, arrays=export_keras_lstm(model), extra_writer=model.save, extra_ext='keras')
+        return mse
+
+    def build_fleet_windows(self, series_map, max_windows_per_series=None):
+        """
+        Windows many series at once with sliding_window_view (no Python loop per window).
+        Returns keys, per-series min/max, X (n, window), y (n,), the owning series index
+        of every window and a validation mask (last 20% of each series).
+        """
+        keys, mins, maxs, parts, owners, val_masks = [], [], [], [], [], []
+        for key, series in series_map.items():
+            series = np.asarray(series, dtype=np.float32)
+            if len(series) <= self.lstm_window:
+                continue
+            min_v, max_v = float(series.min()), float(series.max())
+            if max_v - min_v < 1e-6:
+                continue
+            windows = sliding_window_view((series - min_v) / (max_v - min_v), self.lstm_window + 1)
+            if max_windows_per_series and len(windows) > max_windows_per_series:
+                windows = windows[-max_windows_per_series:]
+            idx = len(keys)
+            keys.append(key)
+            mins.append(min_v)
+            maxs.append(max_v)
+            parts.append(windows)
+            owners.append(np.full(len(windows), idx, dtype=np.int32))
+            val_masks.append(np.arange(len(windows)) >= int(len(windows) * 0.8))
+
+        if not parts:
+            return keys, None, None, None, None, None, None
+        windows = np.concatenate(parts)
+        return (keys, np.array(mins, dtype=np.float32), np.array(maxs, dtype=np.float32),
+                windows[:, :-1], windows[:, -1], np.concatenate(owners), np.concatenate(val_masks))
+
+    def train_fleet(self, series_map, group, epochs=5, batch_size=1024, max_windows_per_series=5000):
+        """
+        Trains one shared LSTM for a group of series (e.g. every series of an asset type)
+        in large batches. Per-series normalization stats and validation errors are stored
+        in the same registry version as the model.
+        """
+        keys, mins, maxs, X, y, owner, val = self.build_fleet_windows(series_map, max_windows_per_series)
+        if X is None:
+            return None
+
+        _tensorflow().random.set_seed(42)
+        model = self._build_lstm_model()
+        model.fit(X[~val, :, np.newaxis], y[~val], epochs=epochs, batch_size=batch_size, shuffle=True, verbose=0)
+
+        preds = model.predict(X[val, :, np.newaxis], batch_size=8192, verbose=0).flatten()
+        sq_err = (preds - y[val]) ** 2
+        counts = np.bincount(owner[val], minlength=len(keys))
+        errors = np.bincount(owner[val], weights=sq_err, minlength=len(keys)) / np.maximum(counts, 1)
+
+        meta = self.registry.save(FLEET_ASSET_ID, group, 'lstm', {
+            "window": self.lstm_window,
+            "n_series": len(keys),
+            "n_windows": int(len(X)),
+            "epochs": epochs,
+            "batch_size": batch_size,
+            "baseline_error": float(np.median(errors))
+        }, arrays={
+            "keys": np.array([f"{a}\x1f{m}" for a, m in keys]),
+            "mins": mins,
+            "maxs": maxs,
+            "errors": errors.astype(np.float32),
+            **export_keras_lstm(model)
+        }, extra_writer=model.save, extra_ext='keras')
+        return meta
+
+    def _fleet_norm(self, arrays, key, series):
+        """Stored (min, max, baseline error) for a series in a fleet model, else its own range."""
+        matches = np.flatnonzero(arrays["keys"] == f"{key[0]}\x1f{key[1]}") if key is not None else []
+        if len(matches):
+            i = matches[0]
+            return float(arrays["mins"][i]), float(arrays["maxs"][i]), float(arrays["errors"][i])
+        return float(series.min()), float(series.max()), None
+
+    def _load_lstm(self, key, meta, arrays=None):
+        """
+        Forecaster for a registry version: the NumPy runtime when the exported weights
+        are in the version's arrays, else the saved Keras model (imports TensorFlow).
+        """
+        cache_key = (key, meta["version"])
+        model = self._lstm_cache.get(cache_key)
+        if model is None:
+            if has_weights(arrays):
+                model = NumpyLSTM(arrays)
+            else:
+                path = self.registry.artifact_path(*key, 'lstm', meta["version"], 'keras')
+                model = _KerasForecaster(_tensorflow().keras.models.load_model(path, compile=False))
+            self._lstm_cache = {k: v for k, v in self._lstm_cache.items() if k[0] != key}
+            self._lstm_cache[cache_key] = model
+        return model
+
+    def export_numpy_lstm(self, key):
+        """
+        Adds NumPy weights to the current LSTM version of `key` if it only has the Keras
+        artifact. Same version number: the model itself is unchanged. Returns True if exported.
+        """
+        entry = self.registry.load(*key, 'lstm')
+        if entry is None or has_weights(entry[1]):
+            return False
+        meta, _ = entry
+        path = self.registry.artifact_path(*key, 'lstm', meta["version"], 'keras')
+        model = _tensorflow().keras.models.load_model(path, compile=False)
+        self.registry.update_arrays(*key, 'lstm', meta["version"], **export_keras_lstm(model))
+        self._lstm_cache.pop((key, meta["version"]), None)
+        return True
+
+    def _lstm_score(self, series, key=None, group=None):
+        """
+        key=(asset_id, metric) enables the model registry: train once, then only
+        predict over the recent window with the stored model and normalization.
+        A per-series model wins; otherwise the fleet model for `group` (asset type)
+        is used, and only when neither exists is a per-series model trained inline.
+        """
         if series is None or len(series) < self.min_points_lstm:
             return None
         try:
-            tf.random.set_seed(42)
             series = np.array(series, dtype=np.float32)
             # Normalize
             min_v, max_v = series.min(), series.max()
             if max_v - min_v < 1e-6:
                 return 0.0
-            norm = (series - min_v) / (max_v - min_v)
-
-            window = 10
-            X, y = [], []
-            for i in range(len(norm) - window):
-                X.append(norm[i:i+window])
-                y.append(norm[i+window])
-            X = np.array(X)
-            y = np.array(y)
-
-            # Train/test split
-            split = int(len(X) * 0.8)
-            X_train, y_train = X[:split], y[:split]
-            X_test, y_test = X[split:], y[split:]
-
-            X_train = X_train[..., np.newaxis]
-            X_test = X_test[..., np.newaxis]
-
-            model = models.Sequential([
-                layers.Input(shape=(window, 1)),
-                layers.LSTM(16, return_sequences=False),
-                layers.Dense(1)
-            ])
-            model.compile(optimizer='adam', loss='mse')
-            model.fit(X_train, y_train, epochs=10, batch_size=16, verbose=0)
-
-            preds = model.predict(X_test, verbose=0).flatten()
-            mse = np.mean((preds - y_test) ** 2)
+
+            entry = self.registry.load(*key, 'lstm') if key is not None else None
+            fleet = None
+            if entry is None and key is not None and group:
+                fleet = self.registry.load(FLEET_ASSET_ID, group, 'lstm')
+            if entry is None and fleet is None:
+                return float(np.tanh(self._train_lstm(series, min_v, max_v, key) * 10))
+
+            if fleet is not None:
+                meta, arrays = fleet
+                model = self._load_lstm((FLEET_ASSET_ID, group), meta, arrays)
+                norm_min, norm_max, _ = self._fleet_norm(arrays, key, series)
+            else:
+                meta, arrays = entry
+                model = self._load_lstm(key, meta, arrays)
+                norm_min, norm_max = meta["min"], meta["max"]
+
+            window = series[-(self.inference_window + meta["window"]):]
+            norm = (window - norm_min) / (norm_max - norm_min + 1e-12)
+            X, y = self._make_windows(norm)
+            preds = model.predict(X)
+            mse = float(np.mean((preds - y) ** 2))
+            # Fleet models are retrained by the nightly job, not inline
+            if fleet is None and self.registry.needs_retrain(meta, mse):
+                self._train_lstm(series, min_v, max_v, key)
             return float(np.tanh(mse * 10))
         except Exception:
             return None
 
+    @staticmethod
+    def _risk_score(rof_score, cof_score):
+        return float(min(rof_score * cof_score + rof_score * 0.2, 1.0))
+
+    @staticmethod
+    def _recommendation(risk_score):
+        if risk_score >= 0.7:
+            return "REPAIR"
+        if risk_score >= 0.4:
+            return "MONITOR"
+        if risk_score >= 0.25:
+            return "DEFER"
+        return None
+
     def _combined_score(self, arima_score, lstm_score):
         scores = [s for s in [arima_score, lstm_score] if s is not None]
         if not scores:
             return 0.0
         return float(sum(scores) / len(scores))
 
-    def run_for_assets(self, project_id, records):
-        summary = []
-        if not records:
-            return summary
+    def warm_up(self):
+        """
+        Explicit warm-up for scoring processes: imports statsmodels and runs one tiny
+        ARIMA filter and NumPy LSTM forward pass so the first request doesn't pay for it.
+        TensorFlow stays unloaded until a model has to be trained.
+        Returns the time taken in seconds.
+        """
+        start = time.perf_counter()
+        series = np.sin(np.linspace(0, 6, self.min_points_arima)).astype(np.float64)
+        _arima_cls()(series, order=self.arima_order).filter(np.array([0.1, 0.1, 0.1, 0.1, 1.0]))
+        units = 16
+        NumpyLSTM({
+            "lstm_kernel": np.zeros((1, 4 * units)), "lstm_recurrent": np.zeros((units, 4 * units)),
+            "lstm_bias": np.zeros(4 * units), "dense_kernel": np.zeros((units, 1)), "dense_bias": np.zeros(1)
+        }).predict(np.zeros((1, self.lstm_window)))
+        return time.perf_counter() - start
 
-        # Group by asset + metric
-        grouped = {}
-        for r in records:
-            key = (r.asset_id, r.type)
-            grouped.setdefault(key, []).append(r)
+    def score_series(self, series, key=None, group=None, timestamps=None):
+        """ARIMA + LSTM scores for one series (pure computation, no DB access)."""
+        return self._arima_score(series, key, timestamps), self._lstm_score(series, key, group=group)
 
-        for (asset_id, metric), recs in grouped.items():
-            risk = self.run_for_asset_metric(project_id, asset_id, metric, recs)
-            if risk:
-                summary.append(risk)
+    def _get_executor(self):
+        if self._executor is None:
+            # spawn: TensorFlow is not fork-safe once initialized in the parent
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=scoring_worker.init_worker,
+                initargs=(self.threads_per_worker, self.registry.model_dir)
+            )
+        return self._executor
 
-        return summary
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
 
-    def run_for_asset_metric(self, project_id, asset_id, metric, records=None):
-        asset = Asset.query.get(asset_id)
+    def _score_parallel(self, jobs):
+        """
+        Fans series out to the process pool. Each task has its own timeout inside the
+        worker; the batch as a whole also gets a deadline so a stuck worker can't hang it.
+        Returns {key: result dict}.
+        """
+        executor = self._get_executor()
+        futures = {
+            executor.submit(scoring_worker.score_series, job["key"], job["group"], job["series"],
+                            self.series_timeout, job["timestamps"]): job["key"]
+            for job in jobs
+        }
+        rounds = -(-len(jobs) // self.workers)
+        batch_deadline = self.series_timeout * rounds + 60  # slack for worker start-up
+        results = {}
+        try:
+            for future in as_completed(futures, timeout=batch_deadline):
+                key = futures[future]
+                try:
+                    results[key] = future.result()
+                except Exception as e:
+                    results[key] = {"key": key, "arima": None, "lstm": None, "status": "error", "error": str(e)}
+                    if isinstance(e, BrokenProcessPool):
+                        self._executor = None
+        except FuturesTimeout:
+            for future, key in futures.items():
+                if key not in results:
+                    future.cancel()
+                    results[key] = {"key": key, "arima": None, "lstm": None, "status": "timeout"}
+        return results
+
+    def _prefetch(self, project_id, asset_ids):
+        """
+        Everything _record_results needs for a batch in three queries: the assets, the
+        project industry, and which assets already have an OPEN action.
+        """
+        asset_ids = sorted(set(asset_ids))
+        assets, open_actions = {}, set()
+        for start in range(0, len(asset_ids), PREFETCH_CHUNK):
+            chunk = asset_ids[start:start + PREFETCH_CHUNK]
+            assets.update((a.id, a) for a in Asset.query.filter(Asset.id.in_(chunk)).all())
+            open_actions.update(
+                row[0] for row in db.session.query(ActionItem.asset_id)
+                .filter(ActionItem.asset_id.in_(chunk), ActionItem.status == "OPEN")
+                .distinct()
+            )
+        industry = ""
+        if project_id:
+            from ..models.project import Project
+            row = db.session.query(Project.industry).filter(Project.id == project_id).first()
+            industry = (row[0] or "") if row else ""
+        return {"assets": assets, "industry": industry, "open_actions": open_actions}
+
+    def _prepare_job(self, asset_id, metric, records=None, asset=None):
+        asset = asset or Asset.query.get(asset_id)
         if not asset:
             return None
 
@@ -121,68 +486,374 @@ class MLPipeline:
         series, metric_label, df = self._series_from_records(records)
         if series is None:
             return None
+        return {
+            "asset": asset,
+            "key": (asset_id, metric or metric_label),
+            "group": normalize_asset_type(asset.type) or "generic",
+            "series": series,
+            "timestamps": pd.to_datetime(df["timestamp"]).values.astype('datetime64[ns]').astype(np.int64),
+            "metric_label": metric_label,
+            "df": df
+        }
 
-        arima_score = self._arima_score(series)
-        lstm_score = self._lstm_score(series)
-        rof_score = self._combined_score(arima_score, lstm_score)
+    def _prepare_jobs(self, grouped, context):
+        """grouped: {(asset_id, metric): records}. Assets come from the prefetched context."""
+        jobs = []
+        for (asset_id, metric), records in grouped.items():
+            asset = context["assets"].get(asset_id)
+            job = self._prepare_job(asset_id, metric, records, asset=asset) if asset else None
+            if job:
+                jobs.append(job)
+        return jobs
+
+    def _build_result(self, job, scores, industry):
+        """
+        Builds the RiskAssessment for one scored series without touching the database.
+        `scores` carries arima/lstm, or `screen` for series that never reached ARIMA/LSTM
+        (their RoF is the last full-model one), or `multivariate` for the joint VAR result of a whole asset.
+        Returns (risk record, recommendation or None, summary dict).
+        """
+        screen = scores.get("screen")
+        multivariate = scores.get("multivariate")
+        asset = job["asset"]
+        metric_label = job["metric_label"]
+        df = job["df"]
+        if screen is not None:
+            rof_score = float(screen["rof_score"])
+        elif multivariate is not None:
+            rof_score = multivariate["rof_score"]
+        else:
+            rof_score = self._combined_score(scores.get("arima"), scores.get("lstm"))
 
         # CoF based on industry + asset
-        industry = ""
-        if project_id:
-            from ..models.project import Project
-            project = Project.query.get(project_id)
-            industry = project.industry if project else ""
         cof_score, _ = compute_cof(industry, asset.type)
 
         # Combine into overall risk
-        risk_score = float(min(rof_score * cof_score + rof_score * 0.2, 1.0))
+        risk_score = self._risk_score(rof_score, cof_score)
 
         signal_weights = None
-        if df is not None and not df.empty:
+        if multivariate is not None:
+            signal_weights = multivariate["contributions"]
+        elif df is not None and not df.empty:
             weights = df.groupby('metric')['value'].std().fillna(0)
             total = weights.sum()
             if total > 0:
                 signal_weights = {k: float(v / total) for k, v in weights.to_dict().items()}
         explain = build_explainability(asset, industry, metric_label, rof_score, cof_score, signal_weights=signal_weights)
+        if screen is not None:
+            explain["screening"] = screen
+        if multivariate is not None:
+            explain["multivariate"] = multivariate
+        if job.get("change_points"):
+            explain["change_points"] = job["change_points"]
         degradation_type = choose_degradation_type(explain)
 
         risk_record = RiskAssessment(
-            asset_id=asset_id,
+            asset_id=asset.id,
             risk_score=risk_score,
             degradation_type=degradation_type,
             confidence_score=float(max(0.5, rof_score)),
             notes=serialize_explainability(explain)
         )
-        db.session.add(risk_record)
-        db.session.commit()
 
-        # Create action recommendation if risk exceeds threshold and no open action exists
-        recommendation = None
-        if risk_score >= 0.7:
-            recommendation = "REPAIR"
-        elif risk_score >= 0.4:
-            recommendation = "MONITOR"
-        elif risk_score >= 0.25:
-            recommendation = "DEFER"
-
-        if recommendation:
-            existing = ActionItem.query.filter_by(asset_id=asset_id, status="OPEN").first()
-            if not existing:
-                action = ActionItem(
-                    asset_id=asset_id,
-                    project_id=project_id,
-                    risk_assessment_id=risk_record.id,
-                    recommendation=recommendation,
-                    notes=f"Auto-generated from ML risk score {risk_score:.2f}"
-                )
-                db.session.add(action)
-                db.session.commit()
+        # Action recommendation if risk exceeds threshold
+        recommendation = self._recommendation(risk_score)
 
-        return {
-            "asset_id": asset_id,
+        summary = {
+            "asset_id": asset.id,
             "metric": metric_label,
             "risk_score": risk_score,
             "rof_score": rof_score,
             "cof_score": cof_score,
-            "degradation_type": degradation_type
+            "degradation_type": degradation_type,
+            "tier": "screen" if screen is not None else "full"
         }
+        return risk_record, recommendation, summary
+
+    def _record_results(self, project_id, outcomes, context=None):
+        """
+        Adds the RiskAssessments of a batch, and an ActionItem for each asset that needs
+        one and has no OPEN action yet, to the session; caller commits. outcomes is a
+        list of (job, scores). Objects go through session.add_all rather than bulk
+        inserts so the flush/commit listeners (dashboard cache, event bus) still fire;
+        one flush assigns all risk ids before the actions referencing them are added.
+        """
+        if not outcomes:
+            return []
+        if context is None:
+            context = self._prefetch(project_id, [job["asset"].id for job, _ in outcomes])
+
+        built = [self._build_result(job, scores, context["industry"]) for job, scores in outcomes]
+        db.session.add_all([risk for risk, _, _ in built])
+        db.session.flush()
+
+        actions = []
+        open_actions = context["open_actions"]
+        for risk, recommendation, _ in built:
+            if recommendation and risk.asset_id not in open_actions:
+                actions.append(ActionItem(
+                    asset_id=risk.asset_id,
+                    project_id=project_id,
+                    risk_assessment_id=risk.id,
+                    recommendation=recommendation,
+                    notes=f"Auto-generated from ML risk score {risk.risk_score:.2f}"
+                ))
+                open_actions.add(risk.asset_id)
+        db.session.add_all(actions)
+        return [summary for _, _, summary in built]
+
+    def screen_jobs(self, jobs):
+        """
+        Tier 1: one vectorized pass over every series. Returns (flagged jobs, {key: screen
+        result} for the rest). A series passes only if it screens clean and has a full-model
+        RoF younger than screen_refresh_hours, which its result then carries; series too
+        short to screen, with a fresh change point, never fully scored, or due for a
+        refresh are passed on (the latter marked "refresh" so the outcome can calibrate
+        the screen).
+        """
+        if self.screening is None or not jobs:
+            return list(jobs), {}
+        result = self.screening.screen([job["series"] for job in jobs])
+        now = time.time()
+        flagged, passed = [], {}
+        for i, job in enumerate(jobs):
+            if result["flagged"][i] or not result["eligible"][i] or job.get("change_points"):
+                flagged.append(job)
+                continue
+            screen = {
+                "score": round(float(result["score"][i]), 4),
+                "ewma_z": round(float(result["ewma_z"][i]), 3),
+                "robust_z": round(float(result["robust_z"][i]), 3),
+                "shift": round(float(result["shift"][i]), 3)
+            }
+            last = self.registry.last_score(*job["key"])
+            if last is None:
+                flagged.append(job)
+            elif now - last["scored_ts"] >= self.screen_refresh_hours * 3600:
+                job["refresh"] = {**screen, "rof_score": last["rof_score"]}
+                flagged.append(job)
+            else:
+                passed[job["key"]] = {**screen, "rof_score": last["rof_score"],
+                                      "full_scored_at": datetime.utcfromtimestamp(last["scored_ts"]).isoformat()}
+        return flagged, passed
+
+    def _after_full_scoring(self, flagged, scored, industry):
+        """
+        Stores each fully scored series' RoF for later screened-out runs. A refreshed
+        series whose full-model action differs from the one its stored RoF gave was
+        missed by the screen, so the screen thresholds are lowered to flag it.
+        """
+        missed = []
+        for job in flagged:
+            result = scored.get(job["key"])
+            if not result or result["status"] != "ok" or (result["arima"] is None and result["lstm"] is None):
+                continue
+            rof_score = self._combined_score(result["arima"], result["lstm"])
+            self.registry.save_last_score(job["key"][0], job["key"][1], rof_score)
+            refresh = job.get("refresh")
+            if refresh and self.screening is not None:
+                cof_score, _ = compute_cof(industry, job["asset"].type)
+                before = self._recommendation(self._risk_score(refresh["rof_score"], cof_score))
+                after = self._recommendation(self._risk_score(rof_score, cof_score))
+                if before != after:
+                    missed.append(job["series"])
+        if missed:
+            self.screening.calibrate(missed, [True] * len(missed))
+        return len(missed)
+
+    def _score_jobs(self, jobs, workers, industry=""):
+        """Runs the cascade; returns ({key: result}, per-tier counts and timings)."""
+        t0 = time.perf_counter()
+        flagged, passed = self.screen_jobs(jobs)
+        screen_s = time.perf_counter() - t0
+
+        t1 = time.perf_counter()
+        if workers > 1 and len(flagged) > 1:
+            if workers != self.workers:
+                self.shutdown()
+                self.workers = workers
+            scored = self._score_parallel(flagged)
+        else:
+            scored = {}
+            for job in flagged:
+                arima_score, lstm_score = self.score_series(job["series"], job["key"], job["group"], job["timestamps"])
+                scored[job["key"]] = {"arima": arima_score, "lstm": lstm_score, "status": "ok"}
+        full_s = time.perf_counter() - t1
+        missed = self._after_full_scoring(flagged, scored, industry)
+
+        for key, screen in passed.items():
+            scored[key] = {"arima": None, "lstm": None, "status": "ok", "screen": screen}
+        tiers = {
+            "screen": {"series": len(jobs), "passed": len(passed), "seconds": round(screen_s, 4),
+                       "change_points": sum(1 for job in jobs if job.get("change_points")),
+                       "refreshed": sum(1 for job in flagged if job.get("refresh")), "missed": missed},
+            "full": {"series": len(flagged), "seconds": round(full_s, 3)}
+        }
+        return scored, tiers
+
+    def run_for_assets(self, project_id, records, workers=None, change_points=None):
+        """
+        Scores every (asset, metric) in `records` and writes the results in one transaction.
+        change_points: {(asset_id, metric): [events]} from the ChangePointDetector; those
+        series skip the screening tier and carry the events into their explainability.
+        """
+        if not records:
+            return []
+
+        # Group by asset + metric
+        grouped = {}
+        for r in records:
+            key = (r.asset_id, r.type)
+            grouped.setdefault(key, []).append(r)
+        return self.run_batch(project_id, grouped, workers=workers, change_points=change_points)
+
+    def run_batch(self, project_id, grouped, workers=None, change_points=None):
+        """
+        Scores a batch of series given as {(asset_id, metric): rows}, where rows are
+        SensorData objects or query rows with timestamp / value / type, and writes the
+        results in one transaction. Returns the per-series summaries; last_run_stats
+        has the tier and stage timings and the series skipped (timed out / failed).
+        """
+        if not grouped:
+            return []
+        started = time.perf_counter()
+        context = self._prefetch(project_id, [asset_id for asset_id, _ in grouped])
+        jobs = self._prepare_jobs(grouped, context)
+        for job in jobs:
+            if change_points and job["key"] in change_points:
+                job["change_points"] = change_points[job["key"]]
+        prepare_s = time.perf_counter() - started
+
+        workers = self.workers if workers is None else workers
+        scored, tiers = self._score_jobs(jobs, workers, context["industry"])
+        scoring_s = time.perf_counter() - started
+
+        # Results come back to the parent and are written in one transaction
+        written = time.perf_counter()
+        skipped, outcomes = [], []
+        for job in jobs:
+            result = scored.get(job["key"], {"status": "error"})
+            if result["status"] != "ok":
+                skipped.append({"asset_id": job["key"][0], "metric": job["key"][1], "status": result["status"]})
+                continue
+            outcomes.append((job, result))
+        try:
+            summary = self._record_results(project_id, outcomes, context)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        self.last_run_stats = {
+            "series": len(jobs),
+            "workers": workers,
+            "tiers": tiers,
+            "prepare_s": round(prepare_s, 3),
+            "scoring_s": round(scoring_s, 3),
+            "write_s": round(time.perf_counter() - written, 3),
+            "total_s": round(time.perf_counter() - started, 3),
+            "skipped": skipped
+        }
+        return summary
+
+    def model_version(self, asset_id, metric, group=None):
+        """Per-series model versions plus the fleet model of the asset type, if any."""
+        version = self.registry.model_version(asset_id, metric)
+        if group:
+            fleet = self.registry.get_meta(FLEET_ASSET_ID, group, 'lstm')
+            version += f"/fleet-v{fleet['version']}" if fleet else ""
+        return version
+
+    @staticmethod
+    def _loaded_watermark(df):
+        """(last timestamp, row count) of the rows a result was actually computed from."""
+        return pd.Timestamp(df["timestamp"].max()).to_pydatetime(), len(df)
+
+    def _cache_key(self, project_id, asset_id, metric, watermark=None):
+        """
+        Watermark of the stored series (one aggregate query, unless the watermark of
+        the loaded rows is given) + model version; None if no data.
+        MULTIVARIATE_METRIC covers every metric of the asset.
+        """
+        if watermark is None:
+            query = db.session.query(func.max(SensorData.timestamp), func.count(SensorData.id)).filter(SensorData.asset_id == asset_id)
+            if metric != MULTIVARIATE_METRIC:
+                query = query.filter(SensorData.type == metric)
+            watermark = query.one()
+        last_ts, count = watermark
+        if not count:
+            return None
+        if metric == MULTIVARIATE_METRIC:
+            version = self.registry.model_version(asset_id, metric, kinds=('var',))
+        else:
+            asset = Asset.query.get(asset_id)
+            group = (normalize_asset_type(asset.type) or "generic") if asset else None
+            version = self.model_version(asset_id, metric, group)
+        return self.score_cache.make_key(project_id, asset_id, metric, last_ts, count, version)
+
+    def run_for_asset_multivariate(self, project_id, asset_id, freq=None):
+        """
+        Scores all metrics of an asset jointly (one VAR instead of one ARIMA/LSTM per
+        metric) and writes a single RiskAssessment labelled with the metric that
+        contributed most. Returns None when the asset has fewer than two aligned
+        varying metrics; callers fall back to per-metric scoring.
+        """
+        cache_key = self._cache_key(project_id, asset_id, MULTIVARIATE_METRIC)
+        if cache_key is None:
+            return None
+        cached = self.score_cache.get(cache_key)
+        if cached is not None:
+            return {**cached, "cached": True}
+
+        asset = Asset.query.get(asset_id)
+        rows = (
+            db.session.query(SensorData.timestamp, SensorData.type, SensorData.value)
+            .filter(SensorData.asset_id == asset_id)
+            .all()
+        )
+        df = pd.DataFrame(rows, columns=["timestamp", "metric", "value"])
+        aligned, freq = self.multivariate.align(df, freq)
+        mv = self.multivariate.score(asset_id, aligned, freq)
+        if mv is None:
+            return None
+
+        job = {"asset": asset, "metric_label": mv["top_metric"], "df": df}
+        result = self._record_results(project_id, [(job, {"multivariate": mv})])[0]
+        db.session.commit()
+        result.update({
+            "mode": "multivariate",
+            "tier": "multivariate",
+            "top_metric": mv["top_metric"],
+            "contributions": mv["contributions"],
+            "metrics": mv["metrics"]
+        })
+        # Keyed on the rows that were scored, so rows ingested meanwhile miss the cache
+        self.score_cache.put(self._cache_key(project_id, asset_id, MULTIVARIATE_METRIC, self._loaded_watermark(df)), result)
+        return {**result, "cached": False}
+
+    def run_for_asset_metric(self, project_id, asset_id, metric, records=None):
+        """
+        Scores the stored series of one asset/metric. When no SensorData arrived and no
+        model changed since the last run, the cached result is returned and nothing is
+        written (explicit `records` bypass the cache).
+        """
+        cache_key = self._cache_key(project_id, asset_id, metric) if records is None else None
+        if cache_key is not None:
+            cached = self.score_cache.get(cache_key)
+            if cached is not None:
+                return {**cached, "cached": True}
+
+        job = self._prepare_job(asset_id, metric, records)
+        if not job:
+            return None
+
+        context = self._prefetch(project_id, [asset_id])
+        scored, tiers = self._score_jobs([job], workers=1, industry=context["industry"])
+        result = self._record_results(project_id, [(job, scored[job["key"]])], context)[0]
+        db.session.commit()
+        self.last_run_stats = {"series": 1, "workers": 1, "tiers": tiers}
+        if cache_key is not None:
+            # Watermark of the rows that were scored (rows ingested meanwhile must miss);
+            # the model version is re-read, as scoring may have trained or retrained one
+            self.score_cache.put(self._cache_key(project_id, asset_id, metric, self._loaded_watermark(job["df"])), result)
+        return {**result, "cached": False}
@@ -0,0 +1,156 @@
+import os
+import glob
+import time
+import numpy as np
+from datetime import datetime
+from ..utils.file_store import safe_name, atomic_write_json, atomic_write_npz, read_json, read_npz
+
+DEFAULT_REGISTRY_DIR = os.path.join(os.path.dirname(__file__), '..', 'model_store', 'registry')
+
+
+class ModelRegistry:
+    """
+    Versioned on-disk store of trained per-(asset, metric) forecasting models.
+
+    Layout: <model_dir>/<asset>/<metric>/<kind>.json points at the current version;
+    artifacts live next to it as <kind>-v<N>.npz (arrays) and optional extra files
+    (e.g. <kind>-v<N>.keras). The pointer is replaced atomically, so readers always
+    see a complete version.
+    """
+
+    def __init__(self, model_dir=DEFAULT_REGISTRY_DIR, retrain_after_hours=24 * 7,
+                 drift_ratio=2.0, min_retrain_minutes=60, keep_versions=2):
+        self.model_dir = model_dir
+        self.retrain_after_hours = retrain_after_hours
+        self.drift_ratio = drift_ratio
+        self.min_retrain_minutes = min_retrain_minutes
+        self.keep_versions = keep_versions
+        self._cache = {}
+
+    def _series_dir(self, asset_id, metric):
+        return os.path.join(self.model_dir, safe_name(asset_id), safe_name(metric))
+
+    def _meta_path(self, asset_id, metric, kind):
+        return os.path.join(self._series_dir(asset_id, metric), f"{kind}.json")
+
+    def artifact_path(self, asset_id, metric, kind, version, ext):
+        return os.path.join(self._series_dir(asset_id, metric), f"{kind}-v{version}.{ext}")
+
+    def get_meta(self, asset_id, metric, kind):
+        return read_json(self._meta_path(asset_id, metric, kind))
+
+    def load(self, asset_id, metric, kind):
+        """
+        Returns (meta, arrays) for the current version, or None if nothing is trained.
+        Arrays are cached in memory per version.
+        """
+        meta = self.get_meta(asset_id, metric, kind)
+        if not meta:
+            return None
+        key = (asset_id, metric, kind)
+        cached = self._cache.get(key)
+        if cached and cached[0]["version"] == meta["version"]:
+            return cached
+        arrays = read_npz(self.artifact_path(asset_id, metric, kind, meta["version"], 'npz')) or {}
+        self._cache[key] = (meta, arrays)
+        return meta, arrays
+
+    def save(self, asset_id, metric, kind, meta, arrays=None, extra_writer=None, extra_ext=None):
+        """
+        Persists a new version. extra_writer(path) can write an additional artifact
+        (e.g. a Keras model) before the pointer is switched.
+        """
+        previous = self.get_meta(asset_id, metric, kind) or {}
+        version = int(previous.get("version", 0)) + 1
+        meta = {
+            **meta,
+            "kind": kind,
+            "version": version,
+            "trained_at": datetime.utcnow().isoformat() + "Z",
+            "trained_ts": time.time(),
+        }
+        atomic_write_npz(self.artifact_path(asset_id, metric, kind, version, 'npz'), **(arrays or {}))
+        if extra_writer is not None:
+            extra_writer(self.artifact_path(asset_id, metric, kind, version, extra_ext))
+        atomic_write_json(self._meta_path(asset_id, metric, kind), meta)
+        self._cache[(asset_id, metric, kind)] = (meta, dict(arrays or {}))
+        self._prune(asset_id, metric, kind, version)
+        return meta
+
+    def update_arrays(self, asset_id, metric, kind, version, **arrays):
+        """
+        Merges extra arrays (e.g. exported weights) into an existing version without
+        bumping it. Only for derived data; a changed model must go through save().
+        """
+        path = self.artifact_path(asset_id, metric, kind, version, 'npz')
+        merged = {**(read_npz(path) or {}), **arrays}
+        atomic_write_npz(path, **merged)
+        self._cache.pop((asset_id, metric, kind), None)
+        return merged
+
+    def iter_series(self, kind):
+        """(asset_id, metric) directory names that have a current `kind` model."""
+        for meta_path in glob.glob(os.path.join(self.model_dir, '*', '*', f"{kind}.json")):
+            metric_dir = os.path.dirname(meta_path)
+            yield os.path.basename(os.path.dirname(metric_dir)), os.path.basename(metric_dir)
+
+    def _prune(self, asset_id, metric, kind, current_version):
+        oldest_kept = current_version - self.keep_versions + 1
+        for path in glob.glob(os.path.join(self._series_dir(asset_id, metric), f"{kind}-v*.*")):
+            try:
+                version = int(os.path.basename(path).split('-v', 1)[1].split('.', 1)[0])
+            except (IndexError, ValueError):
+                continue
+            if version < oldest_kept:
+                os.remove(path)
+
+    def _state_path(self, asset_id, metric, kind):
+        return os.path.join(self._series_dir(asset_id, metric), f"{kind}.state.npz")
+
+    def save_state(self, asset_id, metric, kind, version, **arrays):
+        """
+        Persists mutable filter state for the current model version (updated on every
+        batch, unlike the params which only change on re-estimation).
+        """
+        atomic_write_npz(self._state_path(asset_id, metric, kind), version=np.array([version]), **arrays)
+
+    def load_state(self, asset_id, metric, kind, version):
+        state = read_npz(self._state_path(asset_id, metric, kind))
+        if not state or int(state["version"][0]) != int(version):
+            return None
+        return state
+
+    def _score_path(self, asset_id, metric):
+        return os.path.join(self._series_dir(asset_id, metric), "last_score.json")
+
+    def save_last_score(self, asset_id, metric, rof_score):
+        """Records the RoF of the latest full (ARIMA/LSTM) scoring of a series."""
+        atomic_write_json(self._score_path(asset_id, metric), {"rof_score": float(rof_score), "scored_ts": time.time()})
+
+    def last_score(self, asset_id, metric):
+        """{"rof_score", "scored_ts"} of the latest full scoring, or None."""
+        return read_json(self._score_path(asset_id, metric))
+
+    def needs_retrain(self, meta, current_error=None):
+        """
+        True when the model is older than the retrain schedule, or when the current
+        error has drifted past drift_ratio x the error measured at training time.
+        """
+        if not meta:
+            return True
+        age_s = time.time() - meta.get("trained_ts", 0)
+        if age_s > self.retrain_after_hours * 3600:
+            return True
+        baseline_error = meta.get("baseline_error")
+        if current_error is None or not baseline_error:
+            return False
+        drifted = current_error > self.drift_ratio * baseline_error
+        return drifted and age_s > self.min_retrain_minutes * 60
+
+    def model_version(self, asset_id, metric, kinds=("arima", "lstm")):
+        """Compact version tag of every model kind for a series, e.g. 'arima-v3/lstm-v2'."""
+        parts = []
+        for kind in kinds:
+            meta = self.get_meta(asset_id, metric, kind)
+            parts.append(f"{kind}-v{meta['version']}" if meta else f"{kind}-none")
+        return "/".join(parts)
@@ -0,0 +1,124 @@
+import numpy as np
+import pandas as pd
+from .preprocessing_service import PreprocessingService
+
+# Registry "metric" under which an asset's joint model is stored
+MULTIVARIATE_METRIC = "__multivariate__"
+
+
+class MultivariateScorer:
+    """
+    Joint scoring of all metrics of one asset with a VAR model.
+
+    The metrics are pivoted to one column each and aligned on a common grid with
+    PreprocessingService.resample_timeseries, standardized, and fitted once with
+    statsmodels (lag order by AIC). Scoring reuses the stored coefficients in NumPy:
+    one-step residuals e_t, Mahalanobis distance d_t = e_t' S^-1 e_t, and the
+    per-metric terms e_tj (S^-1 e_t)_j, which sum to d_t and show what drove it.
+    """
+
+    def __init__(self, registry, window=500, recent=20, max_lags=5, min_points=60):
+        self.registry = registry
+        self.window = window
+        self.recent = recent
+        self.max_lags = max_lags
+        self.min_points = min_points
+        self.preprocessing = PreprocessingService()
+
+    @staticmethod
+    def infer_freq(timestamps):
+        """Median sampling interval as a pandas offset, so minute data isn't collapsed to hourly."""
+        ts = np.sort(pd.to_datetime(pd.Series(timestamps)).unique())
+        if len(ts) < 2:
+            return '1h'
+        step = np.median(np.diff(ts)).astype('timedelta64[s]').astype(np.int64)
+        return f"{max(int(step), 1)}s"
+
+    def align(self, df, freq=None):
+        """
+        df: long format (timestamp, metric, value). Returns (wide frame indexed by
+        timestamp with one column per metric, freq used). Rows with gaps are dropped.
+        """
+        freq = freq or self.infer_freq(df["timestamp"])
+        wide = df.pivot_table(index="timestamp", columns="metric", values="value", aggfunc="mean").reset_index()
+        wide.columns.name = None
+        aligned = self.preprocessing.resample_timeseries(wide, freq=freq)
+        aligned = aligned.set_index("timestamp").dropna()
+        return aligned.iloc[-self.window:], freq
+
+    def _fit(self, key, values, metrics, freq):
+        from statsmodels.tsa.api import VAR
+        mean, std = values.mean(axis=0), values.std(axis=0)
+        z = (values - mean) / std
+        max_lags = max(1, min(self.max_lags, len(z) // (4 * len(metrics))))
+        fitted = VAR(z).fit(maxlags=max_lags, ic='aic')
+        if fitted.k_ar == 0:
+            fitted = VAR(z).fit(1)
+        lag_order = int(fitted.k_ar)
+        sigma = np.atleast_2d(fitted.sigma_u)
+        arrays = {
+            "coefs": np.asarray(fitted.coefs, dtype=np.float64),
+            "intercept": np.asarray(fitted.intercept, dtype=np.float64),
+            "sigma_inv": np.linalg.pinv(sigma),
+            "mean": mean,
+            "std": std
+        }
+        meta = {"metrics": list(metrics), "lag_order": lag_order, "freq": freq, "n_obs": int(len(z))}
+        if key is not None:
+            meta = self.registry.save(*key, 'var', {**meta, "baseline_error": 1.0}, arrays=arrays)
+        return meta, arrays
+
+    def residual_terms(self, values, arrays):
+        """Per-timestep Mahalanobis distance and its per-metric terms, (n - p,) and (n - p, k)."""
+        z = (values - arrays["mean"]) / arrays["std"]
+        coefs = arrays["coefs"]
+        p = coefs.shape[0]
+        pred = np.broadcast_to(arrays["intercept"], (len(z) - p, z.shape[1])).copy()
+        for i in range(p):
+            pred += z[p - 1 - i:len(z) - 1 - i] @ coefs[i].T
+        resid = z[p:] - pred
+        terms = resid * (resid @ arrays["sigma_inv"])
+        return terms.sum(axis=1), terms
+
+    def score(self, asset_id, aligned, freq):
+        """
+        Scores the aligned frame of one asset. Returns None with fewer than two usable
+        metrics or too few aligned rows; otherwise rof_score and the per-metric breakdown.
+        """
+        varying = [c for c in aligned.columns if aligned[c].std() > 1e-9]
+        if len(varying) < 2 or len(aligned) < self.min_points + self.recent:
+            return None
+        values = aligned[varying].to_numpy(dtype=np.float64)
+        key = (asset_id, MULTIVARIATE_METRIC)
+
+        entry = self.registry.load(*key, 'var')
+        trained = False
+        # The residual distance *is* the anomaly signal, so only age or a changed
+        # metric set triggers a refit (a drift trigger would learn the anomaly away)
+        if entry is None or entry[0].get("metrics") != varying or self.registry.needs_retrain(entry[0]):
+            # Hold out the recent points being scored so a fresh anomaly isn't fitted
+            meta, arrays = self._fit(key, values[:-self.recent], varying, freq)
+            trained = True
+        else:
+            meta, arrays = entry
+
+        distance, terms = self.residual_terms(values, arrays)
+        recent_d, recent_terms = distance[-self.recent:], terms[-self.recent:]
+        # d_t averages k for in-distribution residuals
+        ratio = float(np.mean(recent_d) / len(varying))
+        contributions = np.clip(recent_terms.mean(axis=0), 0, None)
+        total = contributions.sum()
+        shares = contributions / total if total > 0 else np.full(len(varying), 1 / len(varying))
+        ranked = sorted(zip(varying, shares), key=lambda kv: kv[1], reverse=True)
+        return {
+            "rof_score": float(np.tanh(max(ratio - 1.0, 0.0) / 2)),
+            "distance_ratio": round(ratio, 4),
+            "top_metric": ranked[0][0],
+            "contributions": {m: round(float(s), 4) for m, s in ranked},
+            "metrics": varying,
+            "lag_order": int(meta["lag_order"]),
+            "freq": freq,
+            "n_points": int(len(values)),
+            "model_version": int(meta["version"]) if "version" in meta else None,
+            "trained": trained
+        }
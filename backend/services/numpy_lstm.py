@@ -0,0 +1,67 @@
+import numpy as np
+
+# Array names inside a registry .npz; their presence marks a TF-free model
+WEIGHT_KEYS = ("lstm_kernel", "lstm_recurrent", "lstm_bias", "dense_kernel", "dense_bias")
+
+
+def export_keras_lstm(model):
+    """
+    Extracts the weights of an LSTM -> Dense Keras model into plain float32 arrays.
+    Keras packs the four gates side by side in the order i, f, c, o.
+    """
+    lstm = next(layer for layer in model.layers if layer.__class__.__name__ == 'LSTM')
+    dense = next(layer for layer in model.layers if layer.__class__.__name__ == 'Dense')
+    kernel, recurrent, bias = lstm.get_weights()
+    dense_kernel, dense_bias = dense.get_weights()
+    return {
+        "lstm_kernel": kernel.astype(np.float32),
+        "lstm_recurrent": recurrent.astype(np.float32),
+        "lstm_bias": bias.astype(np.float32),
+        "dense_kernel": dense_kernel.astype(np.float32),
+        "dense_bias": dense_bias.astype(np.float32),
+    }
+
+
+def has_weights(arrays):
+    return bool(arrays) and all(k in arrays for k in WEIGHT_KEYS)
+
+
+def _sigmoid(x):
+    return 0.5 * (np.tanh(0.5 * x) + 1.0)
+
+
+class NumpyLSTM:
+    """
+    Forward pass of the single-layer LSTM forecaster in NumPy: one fused matmul per
+    timestep for the whole batch, no TensorFlow import. Matches Keras defaults
+    (tanh activation, sigmoid recurrent activation, final hidden state only).
+    """
+
+    def __init__(self, arrays):
+        self.kernel = np.asarray(arrays["lstm_kernel"], dtype=np.float32)
+        self.recurrent = np.asarray(arrays["lstm_recurrent"], dtype=np.float32)
+        self.bias = np.asarray(arrays["lstm_bias"], dtype=np.float32)
+        self.dense_kernel = np.asarray(arrays["dense_kernel"], dtype=np.float32)
+        self.dense_bias = np.asarray(arrays["dense_bias"], dtype=np.float32)
+        self.units = self.recurrent.shape[0]
+
+    def predict(self, X):
+        """X: (batch, timesteps) or (batch, timesteps, features). Returns (batch,)."""
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 2:
+            X = X[..., np.newaxis]
+        batch, steps, _ = X.shape
+        u = self.units
+        # Input projections for every timestep at once; only the recurrent part is sequential
+        x_proj = X @ self.kernel + self.bias
+        h = np.zeros((batch, u), dtype=np.float32)
+        c = np.zeros((batch, u), dtype=np.float32)
+        for t in range(steps):
+            z = x_proj[:, t] + h @ self.recurrent
+            i = _sigmoid(z[:, :u])
+            f = _sigmoid(z[:, u:2 * u])
+            g = np.tanh(z[:, 2 * u:3 * u])
+            o = _sigmoid(z[:, 3 * u:])
+            c = f * c + i * g
+            h = o * np.tanh(c)
+        return (h @ self.dense_kernel + self.dense_bias)[:, 0]
@@ -1,9 +1,24 @@
+import re
 import pandas as pd
 
 class PhysicsMapper:
+    # Signals the rules read (as <signal>_roll_mean etc.) and the metric names they go by
+    SIGNAL_ALIASES = {
+        "vibration": ("vibration", "vib", "vibration_rms", "velocity", "acceleration"),
+        "temperature": ("temperature", "temp", "bearing_temperature"),
+        "pressure_drop": ("pressure_drop", "differential_pressure", "delta_p", "dp"),
+        "audio": ("audio", "acoustic", "sound"),
+    }
+
     def __init__(self):
         pass
 
+    @classmethod
+    def signal_for(cls, metric):
+        """The rule signal a stored metric name stands for (e.g. "Temp" -> "temperature"), or None."""
+        name = re.sub(r'[^a-z0-9]+', '_', str(metric or '').lower()).strip('_')
+        return next((signal for signal, aliases in cls.SIGNAL_ALIASES.items() if name in aliases), None)
+
     def map_failure_mode(self, asset_type: str, anomalies: list, recent_features: dict):
         """
         Maps anomalies and feature values to specific failure modes.
@@ -0,0 +1,197 @@
+import os
+import numpy as np
+from ..models.shared import db
+from ..models.sensor import SensorData
+from ..utils.file_store import safe_name, atomic_write_npz, read_npz, file_lock
+
+DEFAULT_SKETCH_DIR = os.path.join(os.path.dirname(__file__), '..', 'model_store', 'sketches')
+
+
+class QuantileSketch:
+    """
+    Merging t-digest: the distribution kept as weighted centroids (mean, weight), with
+    small centroids in the tails and large ones in the middle, so extreme percentiles
+    stay accurate while the whole sketch is at most ~compression/2 centroids.
+
+    Compression is one vectorized pass: sort the centroids, map each one's cumulative
+    weight midpoint q through the scale function k(q) = compression/(2 pi) asin(2q - 1),
+    and merge the centroids that share floor(k). Merging two sketches is the same pass
+    over their concatenated centroids, so per-batch, per-worker and per-partition
+    sketches combine in any order.
+    """
+
+    def __init__(self, compression=300, means=None, weights=None, min_value=np.inf, max_value=-np.inf):
+        self.compression = compression
+        self.means = np.zeros(0) if means is None else np.asarray(means, dtype=np.float64)
+        self.weights = np.zeros(0) if weights is None else np.asarray(weights, dtype=np.float64)
+        self.min_value = float(min_value)
+        self.max_value = float(max_value)
+
+    @property
+    def count(self):
+        return float(self.weights.sum())
+
+    def _compress(self, means, weights):
+        order = np.argsort(means, kind='stable')
+        means, weights = means[order], weights[order]
+        total = weights.sum()
+        q_mid = (np.cumsum(weights) - weights / 2) / total
+        k = np.floor(self.compression / (2 * np.pi) * np.arcsin(np.clip(2 * q_mid - 1, -1, 1)))
+        starts = np.flatnonzero(np.concatenate([[True], k[1:] != k[:-1]]))
+        merged_w = np.add.reduceat(weights, starts)
+        merged_m = np.add.reduceat(means * weights, starts) / merged_w
+        return merged_m, merged_w
+
+    def update(self, values):
+        """Adds a batch of raw values (NaNs ignored)."""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return self
+        self.min_value = min(self.min_value, float(values.min()))
+        self.max_value = max(self.max_value, float(values.max()))
+        self.means, self.weights = self._compress(
+            np.concatenate([self.means, values]),
+            np.concatenate([self.weights, np.ones(len(values))])
+        )
+        return self
+
+    def merge(self, other):
+        """Folds another sketch into this one."""
+        if other.count == 0:
+            return self
+        self.min_value = min(self.min_value, other.min_value)
+        self.max_value = max(self.max_value, other.max_value)
+        self.means, self.weights = self._compress(
+            np.concatenate([self.means, other.means]),
+            np.concatenate([self.weights, other.weights])
+        )
+        return self
+
+    def quantile(self, q):
+        """Value(s) at quantile(s) q in [0, 1]; NaN for an empty sketch."""
+        q = np.asarray(q, dtype=np.float64)
+        if len(self.weights) == 0:
+            return np.full(q.shape, np.nan) if q.ndim else float('nan')
+        total = self.count
+        centers = np.cumsum(self.weights) - self.weights / 2
+        # Interpolate between centroid centres, anchored at the exact min and max
+        xs = np.concatenate([[0.0], centers, [total]])
+        ys = np.concatenate([[self.min_value], self.means, [self.max_value]])
+        result = np.interp(np.clip(q, 0, 1) * total, xs, ys)
+        return result if q.ndim else float(result)
+
+    def cdf(self, x):
+        """Fraction of the weight at or below x (inverse of quantile)."""
+        x = np.asarray(x, dtype=np.float64)
+        if len(self.weights) == 0:
+            return np.full(x.shape, np.nan) if x.ndim else float('nan')
+        total = self.count
+        centers = np.cumsum(self.weights) - self.weights / 2
+        xs = np.concatenate([[self.min_value], self.means, [self.max_value]])
+        ys = np.concatenate([[0.0], centers, [total]]) / total
+        result = np.interp(x, xs, ys, left=0.0, right=1.0)
+        return result if x.ndim else float(result)
+
+    def to_arrays(self):
+        return {
+            "means": self.means,
+            "weights": self.weights,
+            "bounds": np.array([self.min_value, self.max_value]),
+            "compression": np.array([self.compression])
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        return cls(
+            compression=int(arrays["compression"][0]),
+            means=arrays["means"],
+            weights=arrays["weights"],
+            min_value=arrays["bounds"][0],
+            max_value=arrays["bounds"][1]
+        )
+
+
+class SketchStore:
+    """
+    One QuantileSketch per (asset, metric) on disk: <sketch_dir>/<asset>/<metric>.npz,
+    replaced atomically on every update. Each file is a few KB regardless of history.
+
+    With backfill_missing, a series without a sketch file (history from before sketches
+    existed, or a fresh disk after a deploy) is built from its sensor_data rows the first
+    time it is loaded or updated, under the series' file lock. Only that series is
+    scanned, so startup never waits on the whole table.
+    """
+
+    def __init__(self, sketch_dir=DEFAULT_SKETCH_DIR, compression=300, backfill_missing=False, chunk_size=50000):
+        self.sketch_dir = sketch_dir
+        self.compression = compression
+        self.backfill_missing = backfill_missing
+        self.chunk_size = chunk_size
+
+    def _path(self, asset_id, metric):
+        return os.path.join(self.sketch_dir, safe_name(asset_id), f"{safe_name(metric)}.npz")
+
+    def _read(self, asset_id, metric):
+        arrays = read_npz(self._path(asset_id, metric))
+        return QuantileSketch.from_arrays(arrays) if arrays else None
+
+    def from_history(self, asset_id, metric):
+        """Sketch of one series computed from its sensor_data rows, one chunk at a time."""
+        query = (
+            db.session.query(SensorData.value)
+            .filter(SensorData.asset_id == asset_id, SensorData.type == metric)
+            .order_by(SensorData.id)
+        )
+        sketch, chunk = QuantileSketch(self.compression), []
+        for (value,) in query.yield_per(self.chunk_size):
+            chunk.append(value)
+            if len(chunk) >= self.chunk_size:
+                sketch.update(chunk)
+                chunk = []
+        return sketch.update(chunk)
+
+    def _backfill(self, asset_id, metric):
+        # Caller holds the series' lock and found no file
+        sketch = self.from_history(asset_id, metric)
+        if sketch.count > 0:
+            self.save(asset_id, metric, sketch)
+        return sketch
+
+    def load(self, asset_id, metric):
+        sketch = self._read(asset_id, metric)
+        if sketch is not None:
+            return sketch
+        if not self.backfill_missing:
+            return QuantileSketch(self.compression)
+        with file_lock(self._path(asset_id, metric)):
+            # Another request may have built it while this one waited
+            sketch = self._read(asset_id, metric)
+            return sketch if sketch is not None else self._backfill(asset_id, metric)
+
+    def save(self, asset_id, metric, sketch):
+        atomic_write_npz(self._path(asset_id, metric), **sketch.to_arrays())
+
+    def update(self, asset_id, metric, values):
+        """
+        Adds a batch to the stored sketch of one series; returns the updated sketch.
+        The read-merge-write holds the series' file lock, so concurrent ingests of
+        the same series both land. With backfill_missing the batch must already be
+        committed: a missing sketch is built from history, which then includes it.
+        """
+        with file_lock(self._path(asset_id, metric)):
+            sketch = self._read(asset_id, metric)
+            if sketch is None and self.backfill_missing:
+                return self._backfill(asset_id, metric)
+            sketch = (sketch or QuantileSketch(self.compression)).update(values)
+            self.save(asset_id, metric, sketch)
+        return sketch
+
+    def update_records(self, records):
+        """Updates the sketches of every series present in a batch of SensorData rows."""
+        grouped = {}
+        for r in records:
+            grouped.setdefault((r.asset_id, r.type), []).append(r.value)
+        for (asset_id, metric), values in grouped.items():
+            self.update(asset_id, metric, values)
+        return len(grouped)
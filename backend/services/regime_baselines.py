@@ -0,0 +1,71 @@
+import os
+import pandas as pd
+from ..models.shared import db
+from ..models.sensor import SensorData
+from .baseline_model import BaselineModel
+from .envelope_store import EnvelopeStore
+
+# Most recent readings of the metric and its regime signals a regime baseline is trained on
+HISTORY_ROWS = 200000
+
+
+class RegimeBaselineService:
+    """
+    Regime envelopes per (asset, metric, regime signals), trained offline from the
+    asset's stored history (backend/scripts/train_regime_baselines.py) and persisted
+    in an EnvelopeStore under <model_dir>/regime_envelopes, one document per key and
+    baseline mode. Requests only look them up: the store reads lazily through its
+    bounded LRU, so no history is scanned and nothing accumulates per asset.
+    """
+
+    def __init__(self, model_dir="backend/model_store", store=None, history_rows=HISTORY_ROWS):
+        self.store = store or EnvelopeStore(os.path.join(model_dir, "regime_envelopes"))
+        self.history_rows = history_rows
+        self.models = {
+            "sigma": BaselineModel(model_dir=model_dir),
+            "quantile": BaselineModel(model_dir=model_dir, mode="quantile")
+        }
+
+    @staticmethod
+    def key(asset_id, metric, regime_columns, mode="sigma"):
+        return f"{asset_id}/{metric}/{'+'.join(regime_columns)}/{mode}"
+
+    def history(self, asset_id, metric, regime_columns):
+        """
+        Stored readings of a metric and its regime signals (other metrics of the asset,
+        e.g. rpm / load) as one wide frame: a 'value' column plus one column per regime
+        signal, aligned on timestamp. Only the most recent history_rows readings are read.
+        """
+        rows = (
+            db.session.query(SensorData.timestamp, SensorData.type, SensorData.value)
+            .filter(SensorData.asset_id == asset_id, SensorData.type.in_([metric] + list(regime_columns)))
+            .order_by(SensorData.timestamp.desc())
+            .limit(self.history_rows)
+            .all()
+        )
+        if not rows:
+            return pd.DataFrame()
+        long = pd.DataFrame(rows, columns=["timestamp", "metric", "value"])
+        wide = long.pivot_table(index="timestamp", columns="metric", values="value", aggfunc="mean")
+        if metric not in wide.columns or any(col not in wide.columns for col in regime_columns):
+            return pd.DataFrame()
+        return wide.rename(columns={metric: "value"})[["value"] + list(regime_columns)].dropna().reset_index()
+
+    def train(self, asset_id, metric, regime_columns, mode="sigma", **kwargs):
+        """
+        Trains the regime envelope of one series from its history and saves it.
+        Returns the params, or None when the history has no populated regime bin
+        (the unconditioned envelope already covers that case).
+        """
+        history = self.history(asset_id, metric, regime_columns)
+        if history.empty:
+            return None
+        params = self.models[mode].regime_envelopes(history, regime_columns, columns=['value'], **kwargs)
+        if max(params["envelopes"]["value"]["count"]) < params["min_count"]:
+            return None
+        self.store.save(self.key(asset_id, metric, regime_columns, mode), params)
+        return params
+
+    def get(self, asset_id, metric, regime_columns, mode="sigma"):
+        """The persisted regime envelope, or None if it was never trained."""
+        return self.store.get(self.key(asset_id, metric, regime_columns, mode))
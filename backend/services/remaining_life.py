@@ -0,0 +1,285 @@
+import json
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from ..models.shared import db
+from ..models.asset import Asset
+from ..models.inspection import InspectionReading
+from ..models.remaining_life import RemainingLifeEstimate
+
+SECONDS_PER_YEAR = 365.25 * 24 * 3600
+MM_PER_MIL = 0.0254
+MM_PER_INCH = 25.4
+
+THICKNESS = "thickness_mm"
+CORROSION_RATE = "corrosion_rate_mpy"
+
+# Wall loss below this (0.1 um/yr) counts as none, so fit round-off doesn't give 10^15 years
+MIN_RATE_MM_PER_YEAR = 1e-4
+
+
+def fit_linear_trends(x, y, groups, n_groups=None):
+    """
+    Least-squares line y = a + b x for every group at once. Sums come from np.bincount
+    over the group index, with x centred on each group's mean first so long time axes
+    don't lose precision. Returns per-group arrays: n, x_mean, y_mean, sxx, slope and
+    resid_var (NaN below three points, where there is no residual degree of freedom).
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    groups = np.asarray(groups, dtype=np.int64)
+    n_groups = int(groups.max()) + 1 if n_groups is None else n_groups
+
+    n = np.bincount(groups, minlength=n_groups).astype(np.float64)
+    safe_n = np.maximum(n, 1)
+    x_mean = np.bincount(groups, weights=x, minlength=n_groups) / safe_n
+    y_mean = np.bincount(groups, weights=y, minlength=n_groups) / safe_n
+    dx = x - x_mean[groups]
+    sxx = np.bincount(groups, weights=dx * dx, minlength=n_groups)
+    sxy = np.bincount(groups, weights=dx * y, minlength=n_groups)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slope = np.where(sxx > 0, sxy / sxx, np.nan)
+        resid = y - (y_mean[groups] + slope[groups] * dx)
+        sse = np.bincount(groups, weights=resid * resid, minlength=n_groups)
+        resid_var = np.where(n > 2, sse / (n - 2), np.nan)
+    return {"n": n, "x_mean": x_mean, "y_mean": y_mean, "sxx": sxx, "slope": slope, "resid_var": resid_var}
+
+
+def _t_critical(confidence, dof):
+    # scipy.special's inverse Student-t; scipy.stats alone takes ~2s to import
+    from scipy.special import stdtrit
+    dof = np.asarray(dof, dtype=np.float64)
+    return np.where(dof > 0, stdtrit(np.maximum(dof, 1), 0.5 + confidence / 2), np.nan)
+
+
+def _to_mm(entry):
+    if isinstance(entry, dict):
+        value, unit = entry.get("value"), (entry.get("unit") or "mm").lower()
+    else:
+        value, unit = entry, "mm"
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return value * MM_PER_INCH if unit in ("in", "inch", "inches") else value
+
+
+class RemainingLifeService:
+    """
+    Remaining useful life from wall-thickness inspections, for a whole project at once.
+
+    Every (asset, location) series gets a thickness-loss line from fit_linear_trends;
+    the corrosion rate is the negated slope and its standard error gives a t-based band.
+    Remaining life = (current thickness - minimum thickness) / rate, and the governing
+    location of an asset is the one with the shortest (conservative) life. Assets
+    without a usable trend fall back to their measured corrosion rates. The next
+    inspection is due at half the conservative remaining life, capped at
+    max_interval_years (API 510/570 practice).
+    """
+
+    def __init__(self, retirement_ratio=0.75, confidence=0.95, max_interval_years=10.0):
+        self.retirement_ratio = retirement_ratio
+        self.confidence = confidence
+        self.max_interval_years = max_interval_years
+
+    @staticmethod
+    def _design_limits(metadata_json):
+        """(min_thickness, nominal thickness, corrosion allowance) in mm from asset metadata; NaN if absent."""
+        try:
+            metadata = json.loads(metadata_json) if metadata_json else {}
+        except Exception:
+            metadata = {}
+        values = (_to_mm(metadata.get(k)) for k in ("min_thickness", "thickness", "corrosion_allowance"))
+        return tuple(np.nan if v is None else v for v in values)
+
+    def min_thickness(self, asset_ids, first_thickness, asset_metadata):
+        """
+        Retirement thickness per estimate: metadata min_thickness, else nominal thickness
+        minus corrosion allowance, else first reading minus the allowance, else
+        retirement_ratio of the first reading. Metadata is parsed once per asset.
+        """
+        limits = {asset_id: self._design_limits(asset_metadata.get(asset_id)) for asset_id in set(asset_ids)}
+        explicit, nominal, allowance = np.array([limits[a] for a in asset_ids], dtype=np.float64).reshape(-1, 3).T
+        first_thickness = np.asarray(first_thickness, dtype=np.float64)
+        base = np.where(np.isnan(nominal), first_thickness, nominal)
+        from_allowance = np.where(np.isnan(allowance), first_thickness * self.retirement_ratio, base - allowance)
+        return np.where(np.isnan(explicit), from_allowance, explicit)
+
+    def load_readings(self, project_id):
+        rows = (
+            db.session.query(InspectionReading.asset_id, InspectionReading.timestamp, InspectionReading.type,
+                             InspectionReading.value, InspectionReading.location)
+            .join(Asset, Asset.id == InspectionReading.asset_id)
+            .filter(Asset.project_id == project_id,
+                    InspectionReading.type.in_([THICKNESS, CORROSION_RATE]))
+            .all()
+        )
+        return pd.DataFrame(rows, columns=["asset_id", "timestamp", "type", "value", "location"])
+
+    def _trend_estimates(self, thickness):
+        """Per (asset, location) fits; returns one row per location series."""
+        thickness = thickness.assign(location=thickness["location"].fillna("")).sort_values("timestamp", kind="stable")
+        asset_ids = thickness["asset_id"].to_numpy()
+        values = thickness["value"].to_numpy(dtype=np.float64)
+        # Combine per-column codes instead of factorizing a MultiIndex (much faster)
+        asset_codes, _ = pd.factorize(asset_ids)
+        location_codes, locations = pd.factorize(thickness["location"])
+        combined = asset_codes.astype(np.int64) * len(locations) + location_codes
+        # Rows are in time order, so each series' first index is its earliest reading
+        _, first_rows, codes = np.unique(combined, return_index=True, return_inverse=True)
+        n_groups = len(first_rows)
+
+        ts = pd.to_datetime(thickness["timestamp"]).values.astype('datetime64[s]').astype(np.int64)
+        years = (ts - ts.min()) / SECONDS_PER_YEAR
+        fit = fit_linear_trends(years, values, codes, n_groups)
+        last_ts = np.full(n_groups, ts.min(), dtype=np.int64)
+        np.maximum.at(last_ts, codes, ts)
+        last_x = (last_ts - ts.min()) / SECONDS_PER_YEAR
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            current = fit["y_mean"] + fit["slope"] * (last_x - fit["x_mean"])
+            rate = -fit["slope"]
+            std_error = np.sqrt(fit["resid_var"] / fit["sxx"])
+        return pd.DataFrame({
+            "asset_id": asset_ids[first_rows],
+            "location": np.asarray(locations)[location_codes[first_rows]],
+            "n_readings": fit["n"].astype(int),
+            "first_thickness": values[first_rows],
+            "current_thickness_mm": current,
+            "corrosion_rate_mm_per_year": rate,
+            "rate_std_error": std_error,
+            "dof": fit["n"] - 2,
+            "last_inspection": pd.to_datetime(last_ts, unit='s'),
+            "method": "thickness_trend"
+        })
+
+    def _measured_rate_estimates(self, readings, assets):
+        """Assets with coupon/probe corrosion rates: latest thickness and the mean measured rate."""
+        rates = readings[readings["type"] == CORROSION_RATE]
+        thickness = readings[readings["type"] == THICKNESS].sort_values("timestamp")
+        if rates.empty or thickness.empty:
+            return pd.DataFrame()
+        grouped = rates.groupby("asset_id")["value"]
+        stats = pd.DataFrame({"mean": grouped.mean(), "std": grouped.std(), "n": grouped.count()})
+        latest = thickness.groupby("asset_id").agg(
+            current_thickness_mm=("value", "last"), first_thickness=("value", "first"),
+            last_inspection=("timestamp", "last"))
+        merged = latest.join(stats, how="inner").reset_index()
+        merged = merged[merged["asset_id"].isin(assets)]
+        return pd.DataFrame({
+            "asset_id": merged["asset_id"],
+            "location": "",
+            "n_readings": merged["n"].astype(int),
+            "first_thickness": merged["first_thickness"],
+            "current_thickness_mm": merged["current_thickness_mm"],
+            "corrosion_rate_mm_per_year": merged["mean"] * MM_PER_MIL,
+            "rate_std_error": merged["std"] * MM_PER_MIL / np.sqrt(merged["n"]),
+            "dof": merged["n"] - 1,
+            "last_inspection": pd.to_datetime(merged["last_inspection"]),
+            "method": "measured_rate"
+        })
+
+    def compute(self, readings, asset_metadata):
+        """
+        readings: DataFrame (asset_id, timestamp, type, value, location).
+        asset_metadata: {asset_id: metadata_json}. Returns one row per asset.
+        """
+        if readings.empty:
+            return pd.DataFrame()
+        thickness = readings[readings["type"] == THICKNESS]
+        trends = self._trend_estimates(thickness) if not thickness.empty else pd.DataFrame()
+        if not trends.empty:
+            trends = trends[np.isfinite(trends["corrosion_rate_mm_per_year"])]
+        fitted_assets = set(trends["asset_id"]) if not trends.empty else set()
+        fallback = self._measured_rate_estimates(readings, set(asset_metadata) - fitted_assets)
+        frames = [df for df in (trends, fallback) if not df.empty]
+        if not frames:
+            return pd.DataFrame()
+        estimates = pd.concat(frames, ignore_index=True)
+
+        estimates["min_thickness_mm"] = self.min_thickness(
+            estimates["asset_id"].to_numpy(), estimates["first_thickness"].to_numpy(), asset_metadata)
+        margin = np.maximum(estimates["current_thickness_mm"] - estimates["min_thickness_mm"], 0.0).to_numpy()
+        rate = estimates["corrosion_rate_mm_per_year"].to_numpy()
+        half_width = _t_critical(self.confidence, estimates["dof"].to_numpy()) * estimates["rate_std_error"].to_numpy()
+
+        def _life(r):
+            with np.errstate(divide='ignore', invalid='ignore'):
+                return np.where(r > MIN_RATE_MM_PER_YEAR, margin / r, np.inf)
+
+        estimates["remaining_life_years"] = _life(rate)
+        # Faster corrosion bounds the life from below, slower from above; no band below 3 points
+        estimates["remaining_life_low_years"] = np.where(np.isfinite(half_width), _life(rate + half_width), np.nan)
+        estimates["remaining_life_high_years"] = np.where(np.isfinite(half_width), _life(rate - half_width), np.nan)
+
+        governing = np.where(np.isnan(estimates["remaining_life_low_years"]),
+                             estimates["remaining_life_years"], estimates["remaining_life_low_years"])
+        estimates["governing_life"] = governing
+        interval = np.minimum(governing / 2, self.max_interval_years)
+        estimates["next_inspection"] = (estimates["last_inspection"] + pd.to_timedelta(interval * SECONDS_PER_YEAR, unit='s')).dt.round('s')
+
+        # One row per asset: its governing (shortest-lived) location
+        estimates = estimates.sort_values(["asset_id", "governing_life"]).drop_duplicates("asset_id")
+        return estimates.drop(columns=["governing_life", "first_thickness", "dof"]).reset_index(drop=True)
+
+    def run(self, project_id):
+        """Recomputes every asset of a project and replaces its stored estimates."""
+        started = datetime.utcnow()
+        readings = self.load_readings(project_id)
+        asset_metadata = dict(
+            db.session.query(Asset.id, Asset.metadata_json).filter(Asset.project_id == project_id).all()
+        )
+        estimates = self.compute(readings, asset_metadata)
+
+        rows = []
+        for rec in estimates.to_dict(orient="records"):
+            rows.append({
+                "asset_id": rec["asset_id"],
+                "project_id": project_id,
+                "computed_at": started,
+                "method": rec["method"],
+                "n_readings": int(rec["n_readings"]),
+                "governing_location": rec["location"] or None,
+                "current_thickness_mm": _finite(rec["current_thickness_mm"]),
+                "min_thickness_mm": _finite(rec["min_thickness_mm"]),
+                "corrosion_rate_mm_per_year": _finite(rec["corrosion_rate_mm_per_year"]),
+                "rate_std_error": _finite(rec["rate_std_error"]),
+                "remaining_life_years": _finite(rec["remaining_life_years"]),
+                "remaining_life_low_years": _finite(rec["remaining_life_low_years"]),
+                "remaining_life_high_years": _finite(rec["remaining_life_high_years"]),
+                "last_inspection": rec["last_inspection"].to_pydatetime(),
+                "next_inspection": rec["next_inspection"].to_pydatetime()
+            })
+
+        # Nothing listens to this table, so the bulk insert path is safe here
+        try:
+            RemainingLifeEstimate.query.filter_by(project_id=project_id).delete(synchronize_session=False)
+            db.session.bulk_insert_mappings(RemainingLifeEstimate, rows)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        return {
+            "project_id": project_id,
+            "assets": len(asset_metadata),
+            "estimated": len(rows),
+            "readings": len(readings),
+            "seconds": round((datetime.utcnow() - started).total_seconds(), 3)
+        }
+
+    def get_estimates(self, project_id, asset_id=None):
+        query = RemainingLifeEstimate.query.filter_by(project_id=project_id)
+        if asset_id:
+            query = query.filter_by(asset_id=asset_id)
+        # Shortest life first; assets without measurable loss (NULL) last
+        order = (RemainingLifeEstimate.remaining_life_years.is_(None), RemainingLifeEstimate.remaining_life_years.asc())
+        return [r.to_dict() for r in query.order_by(*order).all()]
+
+
+def _finite(value):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return value if np.isfinite(value) else None
@@ -0,0 +1,191 @@
+import numpy as np
+import pandas as pd
+from sqlalchemy.exc import IntegrityError
+from ..models.shared import db
+from ..models.sensor import SensorData
+from ..models.running_stats import RunningStats
+
+KEY = ["asset_id", "metric"]
+COLUMNS = ["count", "mean", "m2", "min_value", "max_value", "first_timestamp", "last_timestamp"]
+
+
+def batch_moments(df):
+    """
+    Per-series partial statistics of long-format rows (asset_id, metric, value, timestamp):
+    one row per series with count, mean, m2 and the value / time ranges. NaNs are dropped.
+    """
+    df = df[df["value"].notna()]
+    if df.empty:
+        return pd.DataFrame(columns=COLUMNS, index=pd.MultiIndex.from_tuples([], names=KEY))
+    grouped = df.groupby(KEY, sort=False)
+    out = grouped["value"].agg(["count", "mean", "var", "min", "max"])
+    out["m2"] = out.pop("var").fillna(0.0) * (out["count"] - 1)
+    out = out.rename(columns={"min": "min_value", "max": "max_value"})
+    times = grouped["timestamp"].agg(["min", "max"])
+    out["first_timestamp"], out["last_timestamp"] = times["min"], times["max"]
+    return out[COLUMNS]
+
+
+def merge_moments(frames):
+    """
+    Merges partial statistics of any number of partitions (frames from batch_moments,
+    possibly sharing series) in one pass, with the k-way form of Chan et al.:
+    n = sum n_i, mean = sum n_i mean_i / n, M2 = sum M2_i + sum n_i (mean_i - mean)^2.
+    """
+    frames = [f for f in frames if f is not None and len(f)]
+    if not frames:
+        return batch_moments(pd.DataFrame(columns=KEY + ["value", "timestamp"]))
+    parts = pd.concat(frames)
+    parts = parts[parts["count"] > 0]
+    level = list(range(len(KEY)))
+    count = parts["count"].groupby(level=level, sort=False).sum()
+    weighted = (parts["count"] * parts["mean"]).groupby(level=level, sort=False).sum()
+    mean = weighted / count
+    spread = parts["count"] * (parts["mean"] - mean.reindex(parts.index).to_numpy()) ** 2
+    m2 = (parts["m2"] + spread).groupby(level=level, sort=False).sum()
+    extremes = parts.groupby(level=level, sort=False).agg({
+        "min_value": "min", "max_value": "max", "first_timestamp": "min", "last_timestamp": "max"
+    })
+    out = pd.DataFrame({"count": count, "mean": mean, "m2": m2}).join(extremes)
+    return out[COLUMNS]
+
+
+class RunningStatsService:
+    """
+    Keeps RunningStats rows current: each ingest batch is reduced to per-series partial
+    moments and merged into the stored ones, so reading a series' mean / std / envelope
+    is one row lookup instead of a history scan. Partials from other workers or
+    partitions merge the same way (merge_moments is associative).
+    """
+
+    def __init__(self, sigmas=3.0):
+        self.sigmas = sigmas
+
+    @staticmethod
+    def records_frame(records):
+        return pd.DataFrame({
+            "asset_id": [r.asset_id for r in records],
+            "metric": [r.type for r in records],
+            "value": np.array([r.value for r in records], dtype=np.float64),
+            "timestamp": pd.to_datetime([r.timestamp for r in records])
+        })
+
+    def _locked_rows(self, asset_ids):
+        # FOR UPDATE where the database supports it, so concurrent ingests don't lose updates
+        return {
+            (row.asset_id, row.metric): row
+            for row in RunningStats.query.filter(RunningStats.asset_id.in_(asset_ids)).with_for_update().all()
+        }
+
+    def apply(self, partials, retries=3):
+        """
+        Merges partial statistics into the stored rows. The caller commits.
+        Returns the number of series touched. Runs in a savepoint: when a concurrent
+        ingest inserted the same new series first (unique violation), it is retried
+        and merges into that row instead.
+        """
+        if partials is None or partials.empty:
+            return 0
+        for attempt in range(retries):
+            try:
+                with db.session.begin_nested():
+                    return self._apply(partials)
+            except IntegrityError:
+                if attempt == retries - 1:
+                    raise
+
+    def _apply(self, partials):
+        rows = self._locked_rows(sorted({asset_id for asset_id, _ in partials.index}))
+        stored = [(key, rows[key]) for key in partials.index if key in rows]
+        existing = pd.DataFrame(
+            [[getattr(row, c) for c in COLUMNS] for _, row in stored],
+            columns=COLUMNS,
+            index=pd.MultiIndex.from_tuples([key for key, _ in stored], names=KEY)
+        ) if stored else None
+        return self._write(merge_moments([existing, partials]), rows)
+
+    def _write(self, merged, rows):
+        new_rows = []
+        for (asset_id, metric), values in zip(merged.index, merged.itertuples(index=False)):
+            row = rows.get((asset_id, metric))
+            if row is None:
+                row = RunningStats(asset_id=asset_id, metric=metric)
+                new_rows.append(row)
+            row.count = int(values.count)
+            row.mean = float(values.mean)
+            row.m2 = float(values.m2)
+            row.min_value = float(values.min_value)
+            row.max_value = float(values.max_value)
+            row.first_timestamp = pd.Timestamp(values.first_timestamp).to_pydatetime()
+            row.last_timestamp = pd.Timestamp(values.last_timestamp).to_pydatetime()
+        db.session.add_all(new_rows)
+        return len(merged)
+
+    def update_from_records(self, records):
+        """Folds a batch of new SensorData rows into the running statistics."""
+        if not records:
+            return 0
+        return self.apply(batch_moments(self.records_frame(records)))
+
+    def history_moments(self, asset_ids, chunk_size=50000):
+        """Statistics of the given assets' series computed from sensor_data, one chunk of rows at a time."""
+        query = (
+            db.session.query(SensorData.asset_id, SensorData.type, SensorData.value, SensorData.timestamp)
+            .filter(SensorData.asset_id.in_(asset_ids))
+            .order_by(SensorData.id)
+        )
+        total, chunk = None, []
+        for row in query.yield_per(chunk_size):
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                total = merge_moments([total, batch_moments(pd.DataFrame(chunk, columns=KEY + ["value", "timestamp"]))])
+                chunk = []
+        if chunk:
+            total = merge_moments([total, batch_moments(pd.DataFrame(chunk, columns=KEY + ["value", "timestamp"]))])
+        return total if total is not None else merge_moments([])
+
+    def rebuild(self, asset_ids, chunk_size=50000):
+        """
+        Recomputes the statistics of the given assets from sensor_data (backfill, or
+        after rows were deleted). The caller commits.
+        """
+        total = self.history_moments(asset_ids, chunk_size)
+        # Stored rows are overwritten, not merged; series with no data left are dropped
+        rows = self._locked_rows(asset_ids)
+        for key in set(rows) - set(total.index):
+            db.session.delete(rows.pop(key))
+        return self._write(total, rows)
+
+    def get(self, asset_id, metric=None):
+        query = RunningStats.query.filter_by(asset_id=asset_id)
+        if metric is not None:
+            query = query.filter_by(metric=metric)
+        return query.all()
+
+    def _envelope(self, mean, std, count):
+        return {
+            "mean": float(mean),
+            "std": float(std),
+            "upper_bound": float(mean + self.sigmas * std),
+            "lower_bound": float(mean - self.sigmas * std),
+            "count": int(count)
+        }
+
+    def envelopes(self, asset_id, metric=None):
+        """
+        BaselineModel-style envelopes ({metric: {mean, std, upper_bound, lower_bound, count}})
+        of an asset's series, read straight from the running statistics.
+        """
+        return {row.metric: self._envelope(row.mean, row.std, row.count) for row in self.get(asset_id, metric)}
+
+    def history_envelopes(self, asset_id):
+        """
+        The same envelopes computed from the asset's stored history without writing
+        anything, for assets whose statistics were never built.
+        """
+        total = self.history_moments([asset_id])
+        out = {}
+        for (_, metric), values in zip(total.index, total.itertuples(index=False)):
+            std = (values.m2 / (values.count - 1)) ** 0.5 if values.count > 1 else 0.0
+            out[metric] = self._envelope(values.mean, std, values.count)
+        return out
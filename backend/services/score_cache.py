@@ -0,0 +1,54 @@
+import threading
+from collections import OrderedDict
+
+
+class ScoreCache:
+    """
+    In-process LRU of scoring results keyed by the data watermark of a series:
+    (project, asset, metric, last timestamp, row count, model version). Any new
+    SensorData row or retrained model changes the key, so entries never go stale;
+    old keys simply fall out of the LRU.
+    """
+
+    def __init__(self, max_entries=5000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(project_id, asset_id, metric, last_ts, count, model_version):
+        return (project_id, asset_id, metric, last_ts.isoformat() if last_ts else None, int(count), model_version)
+
+    def get(self, key):
+        with self._lock:
+            result = self._entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(result)
+
+    def put(self, key, result):
+        with self._lock:
+            self._entries[key] = dict(result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None
+            }
@@ -0,0 +1,62 @@
+"""
+Process-pool entry points for MLPipeline parallel scoring.
+
+Kept free of heavy imports so thread limits are set before NumPy/BLAS (and
+TensorFlow, if a worker ends up training) initialize in the worker.
+"""
+import os
+import signal
+import time
+
+THREAD_ENV_VARS = (
+    "OMP_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+    "TF_NUM_INTRAOP_THREADS",
+)
+
+_pipeline = None
+
+
+class SeriesTimeout(BaseException):
+    # BaseException so the scorers' `except Exception` blocks don't swallow it
+    pass
+
+
+def _on_alarm(signum, frame):
+    raise SeriesTimeout()
+
+
+def init_worker(threads, registry_dir):
+    for var in THREAD_ENV_VARS:
+        os.environ[var] = str(threads)
+    os.environ["TF_NUM_INTEROP_THREADS"] = "1"
+
+    global _pipeline
+    from .ml_pipeline import MLPipeline
+    from .model_registry import ModelRegistry
+    # TensorFlow is not imported here: trained LSTMs score through the NumPy runtime,
+    # and if a worker does have to train, TF picks the thread limits up from the env
+    _pipeline = MLPipeline(registry=ModelRegistry(registry_dir), workers=1)
+
+
+def score_series(key, group, series, timeout, timestamps=None):
+    """Scores one series in the worker; returns plain data for the parent to persist."""
+    start = time.perf_counter()
+    signal.signal(signal.SIGALRM, _on_alarm)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        arima_score, lstm_score = _pipeline.score_series(series, key, group, timestamps)
+        status = "ok"
+    except SeriesTimeout:
+        arima_score, lstm_score, status = None, None, "timeout"
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+    return {
+        "key": key,
+        "arima": arima_score,
+        "lstm": lstm_score,
+        "status": status,
+        "elapsed": time.perf_counter() - start
+    }
@@ -0,0 +1,174 @@
+import warnings
+import numpy as np
+from ..utils.file_store import atomic_write_json, read_json
+
+MAD_TO_SIGMA = 1.4826
+
+
+def _row_nanmedian(values):
+    # np.nanmedian goes through masked arrays and is ~10x slower on wide batches;
+    # NaNs sort last, so the median is picked from each row's valid prefix
+    ordered = np.sort(values, axis=1)
+    counts = np.sum(~np.isnan(values), axis=1)
+    lo = np.maximum((counts - 1) // 2, 0)[:, None]
+    hi = np.maximum(counts // 2, 0)[:, None]
+    median = (np.take_along_axis(ordered, lo, axis=1) + np.take_along_axis(ordered, hi, axis=1))[:, 0] / 2
+    return np.where(counts > 0, median, np.nan)
+
+
+class ScreeningTier:
+    """
+    Cheap first tier of the scoring cascade. Scores a whole batch of series in one
+    vectorized pass over a (series x window) matrix:
+
+    - ewma_z:   largest one-step EWMA residual in the recent points, scaled by the
+                robust spread of the residuals over the reference part
+    - robust_z: largest |x - median| / MAD-sigma in the recent points
+    - shift:    mean of the last k points vs. the spread of k-point window means over
+                the reference, max over a few k (level shifts and slow drifts)
+
+    Each statistic is divided by its threshold; the max is the screening score and
+    anything >= 1 is flagged for ARIMA/LSTM. The default thresholds are set for
+    recall, not for the fewest flags (bench_screening: 100% of spikes and bursts,
+    90% of slow drifts and 69% of short 2-sigma shifts, with 4% of healthy series
+    flagged). calibrate() lowers them further when a series that passed
+    turns out to need the full models. With a state_path, calibrated thresholds
+    are kept across restarts.
+    """
+
+    def __init__(self, window=500, recent=20, alpha=0.3, z_threshold=4.0, shift_threshold=3.0,
+                 shift_scales=(5, 20, 40), min_windows=10, min_points=30, state_path=None):
+        self.window = window
+        self.shift_scales = shift_scales
+        self.min_windows = min_windows
+        self.recent = recent
+        self.alpha = alpha
+        self.z_threshold = z_threshold
+        self.shift_threshold = shift_threshold
+        self.min_points = min_points
+        self.state_path = state_path
+        state = read_json(state_path) if state_path else None
+        if state:
+            self.z_threshold = min(self.z_threshold, float(state["z_threshold"]))
+            self.shift_threshold = min(self.shift_threshold, float(state["shift_threshold"]))
+
+    def calibrate(self, series_list, needs_full, margin=0.9):
+        """
+        Lowers the thresholds until every series marked in needs_full (e.g. one whose
+        full-model action differed from the one it was screened out with) is flagged,
+        with `margin` to spare. Thresholds never go up. Returns the factor applied.
+        """
+        needs_full = np.asarray(needs_full, dtype=bool)
+        if not needs_full.any():
+            return 1.0
+        result = self.screen(series_list)
+        missed = needs_full & result["eligible"] & ~result["flagged"]
+        if not missed.any():
+            return 1.0
+        factor = float(np.min(result["score"][missed])) * margin
+        if factor <= 0:
+            return 1.0
+        self.z_threshold *= factor
+        self.shift_threshold *= factor
+        if self.state_path:
+            atomic_write_json(self.state_path, {"z_threshold": self.z_threshold, "shift_threshold": self.shift_threshold})
+        return factor
+
+    def build_matrix(self, series_list):
+        """Right-aligns the last `window` points of every series into a NaN-padded matrix."""
+        matrix = np.full((len(series_list), self.window), np.nan, dtype=np.float64)
+        lengths = np.zeros(len(series_list), dtype=np.int64)
+        for i, series in enumerate(series_list):
+            tail = np.asarray(series, dtype=np.float64)[-self.window:]
+            if len(tail):
+                matrix[i, -len(tail):] = tail
+            lengths[i] = len(tail)
+        return matrix, lengths
+
+    def _ewma_residuals(self, matrix):
+        # Loop over time, vectorized across series: W steps regardless of batch size
+        residuals = np.full_like(matrix, np.nan)
+        level = matrix[:, 0].copy()
+        for t in range(1, matrix.shape[1]):
+            x = matrix[:, t]
+            residuals[:, t] = x - level
+            level = np.where(np.isnan(level), x, np.where(np.isnan(x), level, level + self.alpha * (x - level)))
+        return residuals
+
+    @staticmethod
+    def _robust_sigma(values, center):
+        mad = _row_nanmedian(np.abs(values - center[:, None])) * MAD_TO_SIGMA
+        # Quantized or frozen signals have MAD 0; fall back to std, then to a floor
+        fallback = np.nanstd(values, axis=1)
+        sigma = np.where(mad > 0, mad, fallback)
+        return np.maximum(np.nan_to_num(sigma), 1e-9 + 1e-6 * np.abs(np.nan_to_num(center)))
+
+    @staticmethod
+    def _rolling_means(matrix, k):
+        # Cumsum-based window means; any window touching NaN padding comes out NaN
+        filled = np.nan_to_num(matrix)
+        valid = (~np.isnan(matrix)).astype(np.int64)
+        csum = np.concatenate([np.zeros((len(matrix), 1)), np.cumsum(filled, axis=1)], axis=1)
+        ccount = np.concatenate([np.zeros((len(matrix), 1), dtype=np.int64), np.cumsum(valid, axis=1)], axis=1)
+        means = (csum[:, k:] - csum[:, :-k]) / k
+        return np.where(ccount[:, k:] - ccount[:, :-k] == k, means, np.nan)
+
+    def _shift_stat(self, matrix):
+        """
+        Mean of the last k points vs. the spread of k-point window means over the reference
+        (everything before the longest scale), for several k. Judging against window means
+        rather than raw points keeps autocorrelated/seasonal signals from looking shifted.
+        """
+        reference = matrix[:, :-max(self.shift_scales)]
+        ref_points = np.sum(~np.isnan(reference), axis=1)
+        stats = []
+        for k in self.shift_scales:
+            ref_means = self._rolling_means(reference, k)
+            center = _row_nanmedian(ref_means)
+            sigma = self._robust_sigma(ref_means, center)
+            stat = np.abs(np.nanmean(matrix[:, -k:], axis=1) - center) / sigma
+            # A short reference holds too few independent k-point windows to estimate
+            # their spread; that scale is skipped for the series
+            stats.append(np.where(ref_points >= self.min_windows * k, stat, 0.0))
+        return np.maximum.reduce(stats)
+
+    def screen(self, series_list):
+        """
+        Returns per-series arrays: score, flagged, ewma_z, robust_z, shift, plus
+        `eligible` (False for series too short to screen; callers send those on).
+        """
+        n = len(series_list)
+        if n == 0:
+            empty = np.zeros(0)
+            return {"score": empty, "flagged": empty.astype(bool), "eligible": empty.astype(bool),
+                    "ewma_z": empty, "robust_z": empty, "shift": empty}
+
+        matrix, lengths = self.build_matrix(series_list)
+        eligible = lengths >= self.min_points
+        reference, recent = matrix[:, :-self.recent], matrix[:, -self.recent:]
+
+        # All-NaN rows (ineligible series) are expected here
+        with np.errstate(all='ignore'), warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            center = _row_nanmedian(reference)
+            sigma = self._robust_sigma(reference, center)
+            robust_z = np.nanmax(np.abs(recent - center[:, None]), axis=1) / sigma
+
+            residuals = self._ewma_residuals(matrix)
+            ref_resid, recent_resid = residuals[:, :-self.recent], residuals[:, -self.recent:]
+            resid_sigma = self._robust_sigma(ref_resid, _row_nanmedian(ref_resid))
+            ewma_z = np.nanmax(np.abs(recent_resid), axis=1) / resid_sigma
+
+            shift = self._shift_stat(matrix)
+
+        robust_z, ewma_z, shift = (np.nan_to_num(a, nan=0.0, posinf=1e6) for a in (robust_z, ewma_z, shift))
+        score = np.maximum.reduce([robust_z / self.z_threshold, ewma_z / self.z_threshold, shift / self.shift_threshold])
+        score = np.where(eligible, score, 0.0)
+        return {
+            "score": score,
+            "flagged": eligible & (score >= 1.0),
+            "eligible": eligible,
+            "ewma_z": ewma_z,
+            "robust_z": robust_z,
+            "shift": shift
+        }
@@ -0,0 +1,95 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from backend.services.analysis_engine import AnalysisEngine
+from backend.services.feature_engine import FeatureEngine
+
+MODEL_STORE = os.path.join(os.path.dirname(__file__), "..", "model_store")
+
+
+def _rolling_features(seed=0, n=2000):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({"value": 50 + rng.normal(0, 1, n)})
+    feats = FeatureEngine().compute_rolling_stats(df, window=5, columns=["value"])
+    return feats, ["value_roll_mean", "value_roll_std"]
+
+
+def test_grid_scoring_matches_forest():
+    feats, cols = _rolling_features()
+    ae = AnalysisEngine(model_dir=tempfile.mkdtemp())
+    entry = ae.train_anomaly_model(feats, cols)
+    assert entry["grid"] is not None
+
+    rng = np.random.default_rng(1)
+    X = np.column_stack([rng.normal(50, 2, 20000), np.abs(rng.normal(1, 0.5, 20000))])
+    exact = 1 / (1 + np.exp(-((-entry["model"].score_samples(X)) - entry["threshold"]) / entry["scale"]))
+    approx = ae.score_batch(X)
+    assert np.mean(np.abs(approx - exact)) < 0.01
+    # Far outside the training envelope is clearly anomalous, the centre is not
+    risks = ae.score_batch(np.array([[50.0, 1.0], [80.0, 10.0], [np.nan, 1.0]]))
+    assert risks[0] < 0.3 and risks[1] > 0.9 and risks[2] == 0.0
+    print("✅ Grid scoring matches IsolationForest.")
+
+
+def test_million_rows_sub_second():
+    feats, cols = _rolling_features()
+    ae = AnalysisEngine(model_dir=tempfile.mkdtemp())
+    ae.train_anomaly_model(feats, cols)
+    X = np.random.default_rng(2).normal(50, 1, (1_000_000, 2))
+    start = time.perf_counter()
+    risks = ae.score_batch(X)
+    elapsed = time.perf_counter() - start
+    assert risks.shape == (1_000_000,)
+    print(f"1M rows scored in {elapsed:.3f}s")
+    assert elapsed < 1.0
+
+
+def test_three_feature_grid_and_accuracy_gate():
+    rng = np.random.default_rng(3)
+    df = pd.DataFrame({"value": 50 + rng.normal(0, 1, 3000), "load": np.cumsum(rng.normal(0, 0.1, 3000)) + 20})
+    feats = FeatureEngine().compute_rolling_stats(df, window=5, columns=["value", "load"])
+    cols = ["value_roll_mean", "value_roll_std", "load_roll_mean"]
+    ae = AnalysisEngine(model_dir=tempfile.mkdtemp())
+    entry = ae.train_anomaly_model(feats, cols)
+    assert entry["grid"] is not None and entry["grid"]["mean_risk_error"] <= 0.01
+
+    X = feats[cols].to_numpy()[rng.integers(5, 3000, 20000)] * (1 + rng.normal(0, 0.02, (20000, 3)))
+    exact = 1 / (1 + np.exp(-((-entry["model"].score_samples(X)) - entry["threshold"]) / entry["scale"]))
+    assert np.mean(np.abs(ae.score_batch(X) - exact)) < 0.02
+
+    # Four features stay exact
+    assert ae.train_anomaly_model(feats, cols + ["load_roll_std"])["grid"] is None
+
+
+def test_versioned_persistence_and_lazy_load():
+    feats, cols = _rolling_features()
+    model_dir = tempfile.mkdtemp()
+    trainer = AnalysisEngine(model_dir=model_dir)
+    trainer.train_anomaly_model(feats, cols)
+    assert trainer.save_model("iso_forest_pump_vibration") == 1
+    trainer.train_anomaly_model(feats, cols)
+    trainer.save_model("iso_forest_pump_vibration")
+    trainer.train_anomaly_model(feats, cols)
+    assert trainer.save_model("iso_forest_pump_vibration") == 3
+    # Older versions are pruned, the pointer names the current one
+    assert sorted(f for f in os.listdir(model_dir) if f.endswith('.joblib')) == [
+        "iso_forest_pump_vibration-v2.joblib", "iso_forest_pump_vibration-v3.joblib"]
+
+    scorer = AnalysisEngine(model_dir=model_dir)
+    assert scorer.models == {}
+    risks = scorer.calculate_degradation_score(feats.tail(100), cols, model_name="iso_forest_pump_vibration")
+    assert len(risks) == 100
+    assert scorer.models["iso_forest_pump_vibration"]["version"] == 3
+
+
+def test_legacy_unversioned_model_loads():
+    ae = AnalysisEngine(model_dir=MODEL_STORE)
+    entry = ae.load_model("iso_forest_rotating_equipment_vibration")
+    assert entry["version"] == 0 and entry["grid"] is None
+    n = entry["model"].n_features_in_
+    assert len(ae.score_batch(np.zeros((5, n)), "iso_forest_rotating_equipment_vibration")) == 5
@@ -41,5 +41,84 @@ def test_baseline_model():
     
     print("✅ Deviation Check passed.")
 
+def test_deviation_matrix_matches_row_checks():
+    bm = BaselineModel()
+    rng = np.random.default_rng(0)
+    bm.train_baseline("pump", pd.DataFrame({"a": rng.normal(0, 1, 500), "b": rng.normal(5, 2, 500)}))
+    df = pd.DataFrame({"a": rng.normal(0, 2, 2000), "b": rng.normal(5, 4, 2000), "c": np.ones(2000)})
+    df.loc[3, "a"] = np.nan
+
+    result = bm.deviation_matrix("pump", df)
+    assert result["columns"] == ["a", "b"]
+    params = bm.envelopes["pump"]
+    for j, col in enumerate(result["columns"]):
+        expected = np.where(df[col] > params[col]["upper_bound"], 1,
+                            np.where(df[col] < params[col]["lower_bound"], -1, 0))
+        assert (result["codes"][:, j] == expected).all()
+        assert result["high_counts"][col] == int((expected == 1).sum())
+        assert result["low_counts"][col] == int((expected == -1).sum())
+    assert result["codes"][3, 0] == 0
+
+    df_result = bm.check_deviations("pump", df)
+    flagged = df_result["baseline_deviation"] != ""
+    assert flagged.sum() == result["rows_flagged"] == df_result.attrs["deviation_summary"]["rows_flagged"]
+    assert (df_result.loc[flagged, "baseline_deviation_level"] > 0).all()
+    assert (bm.check_deviations("pump", df, describe=False)["baseline_deviation"] == "").all()
+
+    row = int(np.flatnonzero(result["flagged"])[0])
+    assert bm.describe_deviations(result, [row]) == [df_result.iloc[row]["baseline_deviation"]]
+
+def _pump_data(rng, n):
+    rpm = rng.uniform(1000, 3000, n)
+    # Vibration grows with speed; the noise band is narrow at every speed
+    return pd.DataFrame({"rpm": rpm, "vibration": 0.002 * rpm + rng.normal(0, 0.1, n)})
+
+
+def test_regime_baseline_conditions_on_rpm():
+    rng = np.random.default_rng(5)
+    bm = BaselineModel()
+    params = bm.train_regime_baseline("PUMP-01", _pump_data(rng, 20000), ["rpm"], n_bins=8)
+    assert params["regimes"]["shape"] == [8]
+    assert sum(params["envelopes"]["vibration"]["count"]) == 20000
+
+    # 3.0 is normal at 2900 rpm but a fault at 1100 rpm; the flat envelope can't tell
+    test = pd.DataFrame({"rpm": [1100.0, 2900.0, np.nan], "vibration": [3.0, 5.9, 3.0]})
+    result = bm.deviation_matrix("PUMP-01", test)
+    assert list(result["codes"][:, 0]) == [1, 0, 0]
+    assert result["regime"][2] == -1
+    flat = BaselineModel()
+    flat.train_baseline("pump", _pump_data(rng, 20000)[["vibration"]])
+    assert list(flat.deviation_matrix("pump", test)["codes"][:, 0]) == [0, 0, 0]
+
+    text = bm.check_deviations("PUMP-01", test).iloc[0]["baseline_deviation"]
+    assert text.startswith("vibration HIGH (3.00 > ")
+
+    # Per-regime stats match a direct groupby
+    train = _pump_data(rng, 5000)
+    params = bm.train_regime_baseline("PUMP-02", train, ["rpm"], n_bins=4, min_count=1)
+    bins = bm.regime_bins(params["regimes"], train)
+    expected = train.groupby(bins)["vibration"].agg(["mean", "std"])
+    assert np.allclose(params["envelopes"]["vibration"]["center"], expected["mean"])
+    assert np.allclose(params["envelopes"]["vibration"]["upper_bound"], expected["mean"] + 3 * expected["std"])
+
+
+def test_regime_baseline_sparse_bins_and_quantile_mode():
+    rng = np.random.default_rng(6)
+    train = _pump_data(rng, 4000)
+    train["load"] = rng.uniform(0, 100, 4000)
+    bm = BaselineModel(mode="quantile", lower_q=0.01, upper_q=0.99)
+    params = bm.train_regime_baseline("PUMP-03", train, ["rpm", "load"], n_bins=4, min_count=250)
+    env = params["envelopes"]["vibration"]
+    assert params["regimes"]["shape"] == [4, 4]
+    sparse = np.array(env["count"]) < 250
+    assert sparse.any() and not sparse.all()
+    assert np.allclose(np.array(env["upper_bound"])[sparse], params["global"]["vibration"]["upper_bound"])
+    bins = bm.regime_bins(params["regimes"], train)
+    first = np.flatnonzero(~sparse)[0]
+    assert np.isclose(env["upper_bound"][first], np.quantile(train["vibration"][bins == first], 0.99))
+
 if __name__ == "__main__":
     test_baseline_model()
+    test_deviation_matrix_matches_row_checks()
+    test_regime_baseline_conditions_on_rpm()
+    test_regime_baseline_sparse_bins_and_quantile_mode()
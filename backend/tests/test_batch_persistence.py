@@ -0,0 +1,95 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+import tempfile
+import unittest
+import numpy as np
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from backend.app import create_app
+from backend.config import Config
+from backend.models.shared import db
+from backend.models.asset import Asset
+from backend.models.project import Project
+from backend.models.sensor import SensorData
+from backend.models.risk import RiskAssessment
+from backend.models.action import ActionItem
+from backend.services.ml_pipeline import MLPipeline
+from backend.services.model_registry import ModelRegistry
+from backend.services.event_bus import event_bus
+
+
+class TestConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    TESTING = True
+
+
+class TestBatchPersistence(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.ml = MLPipeline(registry=ModelRegistry(os.path.join(tempfile.mkdtemp(), "registry")), workers=1)
+        # Recent full-model scores let healthy series settle at the screening tier
+        for i in range(40):
+            self.ml.registry.save_last_score(f"PV-{i:02d}", "pressure", 0.3)
+        with self.app.app_context():
+            db.create_all()
+            db.session.add(Project(id=1, name="P1", industry="Refining", plant_name="U1"))
+            db.session.add_all([Asset(id=f"PV-{i:02d}", name="Vessel", type="Pressure Vessel", project_id=1) for i in range(40)])
+            db.session.add(ActionItem(asset_id="PV-01", project_id=1, recommendation="MONITOR", status="OPEN"))
+            db.session.commit()
+
+    def _statements(self):
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement.split()[0].upper())
+        event.listen(db.engine, "before_cursor_execute", record)
+        return statements, lambda: event.remove(db.engine, "before_cursor_execute", record)
+
+    def test_batch_uses_constant_lookups(self):
+        rng = np.random.default_rng(5)
+        start = datetime(2024, 1, 1)
+        with self.app.app_context():
+            records = [
+                SensorData(asset_id=f"PV-{a:02d}", timestamp=start + timedelta(minutes=i), type="pressure", value=float(v))
+                for a in range(40) for i, v in enumerate(20 + rng.normal(0, 1, 120))
+            ]
+            statements, stop = self._statements()
+            commits = []
+            event.listen(db.session, "after_commit", lambda s: commits.append(1))
+            try:
+                summary = self.ml.run_for_assets(1, records, workers=1)
+            finally:
+                stop()
+            self.assertEqual(len(summary), 40)
+            self.assertEqual(RiskAssessment.query.count(), 40)
+            self.assertEqual(len(commits), 1)
+            # assets + open actions + project industry, not three per series
+            self.assertLessEqual(statements.count("SELECT"), 3)
+
+    def test_actions_deduplicated_and_events_fire(self):
+        with self.app.app_context():
+            jobs = [
+                {"asset": db.session.get(Asset, asset_id), "metric_label": metric, "df": None}
+                for asset_id, metric in [("PV-00", "pressure"), ("PV-00", "temperature"), ("PV-01", "pressure"), ("PV-02", "pressure")]
+            ]
+            sub = event_bus.subscribe(1)
+            try:
+                self.ml._record_results(1, [(job, {"arima": 0.9, "lstm": 0.9}) for job in jobs])
+                db.session.commit()
+                # One new action per asset at most; PV-01 already had an open one
+                actions = ActionItem.query.filter(ActionItem.id > 1).all()
+                self.assertEqual(sorted(a.asset_id for a in actions), ["PV-00", "PV-02"])
+                self.assertTrue(all(a.risk_assessment_id for a in actions))
+                # add_all keeps the ORM events that bulk inserts would skip
+                types = []
+                while (evt := sub.get(timeout=0.1)) is not None:
+                    types.append(evt["type"])
+                self.assertEqual((types.count("risk"), types.count("action")), (4, 2))
+            finally:
+                event_bus.unsubscribe(sub)
+
+
+if __name__ == '__main__':
+    unittest.main()
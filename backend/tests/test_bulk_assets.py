@@ -0,0 +1,127 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+import unittest
+from io import BytesIO
+from backend.app import create_app
+from backend.config import Config
+from backend.models.shared import db
+from backend.models.asset import Asset
+from backend.models.project import Project
+from backend.utils import auth
+
+
+class TestConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    TESTING = True
+
+
+class TestBulkAssets(unittest.TestCase):
+    def setUp(self):
+        self._demo_public = auth.DEMO_PUBLIC
+        auth.DEMO_PUBLIC = True
+        self.app = create_app(TestConfig)
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            db.create_all()
+            db.session.add_all([
+                Project(id=1, name="P1", industry="Refining", plant_name="U1"),
+                Project(id=2, name="P2", industry="Chemical", plant_name="U2"),
+            ])
+            db.session.add(Asset(id="PV-01", name="Old", type="Pressure Vessel", project_id=1, location="Bay 1"))
+            db.session.add(Asset(id="HE-09", name="Other", type="Heat Exchanger", project_id=2))
+            db.session.commit()
+
+    def tearDown(self):
+        auth.DEMO_PUBLIC = self._demo_public
+
+    def test_bulk_json_upsert(self):
+        payload = [
+            {"id": "PV-01", "name": "Vessel 1", "type": "Pressure Vessel", "location": "Zone A"},
+            {"id": "ST-01", "type": "Storage Tank", "metadata": {"material": "CS"}},
+            {"id": "HE-09", "type": "Heat Exchanger"},  # belongs to project 2
+            {"id": "ST-01", "type": "Storage Tank"},  # duplicate in payload
+            {"name": "missing id", "type": "Pump"},
+        ]
+        response = self.client.post('/api/assets/bulk?project_id=1', json=payload)
+        data = response.get_json()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(data["created"], 1)
+        self.assertEqual(data["updated"], 1)
+        self.assertEqual(data["failed"], 3)
+        statuses = [r["status"] for r in data["results"]]
+        self.assertEqual(statuses, ["updated", "created", "error", "error", "error"])
+        self.assertIn("another project", data["results"][2]["error"])
+
+        with self.app.app_context():
+            self.assertEqual(db.session.get(Asset, "PV-01").name, "Vessel 1")
+            created = db.session.get(Asset, "ST-01")
+            self.assertEqual(created.name, "ST-01")
+            self.assertEqual(created.project_id, 1)
+            self.assertEqual(created.to_dict()["metadata"], {"material": "CS"})
+            self.assertEqual(db.session.get(Asset, "HE-09").project_id, 2)
+
+    def test_bulk_csv_upload(self):
+        csv_content = b"asset_id,type,location\nPV-02,Pressure Vessel,Zone A\nPN-01,Piping,Zone B\n"
+        response = self.client.post(
+            '/api/assets/bulk?project_id=1',
+            data={'file': (BytesIO(csv_content), 'asset_registry.csv')},
+            content_type='multipart/form-data'
+        )
+        data = response.get_json()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(data["created"], 2)
+        with self.app.app_context():
+            self.assertEqual(Asset.query.filter_by(project_id=1).count(), 3)
+
+    def test_bulk_update_keeps_missing_columns(self):
+        # Registry without name / location columns must not blank existing assets
+        csv_content = b"asset_id,type\nPV-01,Pressure Vessel\nPV-03,Pressure Vessel\n"
+        response = self.client.post(
+            '/api/assets/bulk?project_id=1',
+            data={'file': (BytesIO(csv_content), 'asset_registry.csv')},
+            content_type='multipart/form-data'
+        )
+        self.assertEqual(response.status_code, 200)
+        with self.app.app_context():
+            existing = db.session.get(Asset, "PV-01")
+            self.assertEqual((existing.name, existing.location), ("Old", "Bay 1"))
+            created = db.session.get(Asset, "PV-03")
+            self.assertEqual((created.name, created.location), ("PV-03", ""))
+
+    def test_bulk_unknown_project(self):
+        response = self.client.post('/api/assets/bulk?project_id=99', json=[{"id": "X-1", "type": "Pump"}])
+        self.assertEqual(response.status_code, 404)
+
+        payload = [{"id": "X-1", "type": "Pump", "project_id": 99}, {"id": "X-2", "type": "Pump"}]
+        data = self.client.post('/api/assets/bulk?project_id=1', json=payload).get_json()
+        self.assertEqual([r["status"] for r in data["results"]], ["error", "created"])
+        self.assertIn("not found", data["results"][0]["error"])
+        with self.app.app_context():
+            self.assertIsNone(db.session.get(Asset, "X-1"))
+            self.assertEqual(db.session.get(Asset, "X-2").project_id, 1)
+
+    def test_bulk_csv_id_priority_and_lengths(self):
+        # tag outranks a row-number "id" column, whatever the column order
+        csv_content = ("id,tag,type,name\n1,PV-04,Pressure Vessel,Ok\n2,PV-05,Pressure Vessel,%s\n"
+                       % ("N" * 101)).encode()
+        data = self.client.post(
+            '/api/assets/bulk?project_id=1',
+            data={'file': (BytesIO(csv_content), 'asset_registry.csv')},
+            content_type='multipart/form-data'
+        ).get_json()
+        self.assertEqual([(r["id"], r["status"]) for r in data["results"]], [("PV-04", "created"), ("PV-05", "error")])
+        self.assertIn("name", data["results"][1]["error"])
+
+        data = self.client.post('/api/assets/bulk?project_id=1', json=[{"id": "X" * 51, "type": "Pump"}]).get_json()
+        self.assertEqual(data["results"][0]["status"], "error")
+        with self.app.app_context():
+            self.assertIsNotNone(db.session.get(Asset, "PV-04"))
+            self.assertIsNone(db.session.get(Asset, "PV-05"))
+
+
+if __name__ == '__main__':
+    unittest.main()
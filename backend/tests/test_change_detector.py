@@ -0,0 +1,129 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+import tempfile
+import threading
+import time
+import unittest
+import numpy as np
+import pandas as pd
+from backend.services.change_detector import ChangePointDetector, _cusum
+from backend.services.ml_pipeline import MLPipeline
+from backend.services.model_registry import ModelRegistry
+
+
+def _ar1(rng, n, phi=0.6, mean=50.0):
+    e = rng.normal(0, 1, n)
+    x = np.zeros(n)
+    for t in range(1, n):
+        x[t] = phi * x[t - 1] + e[t]
+    return mean + x
+
+
+def _times(n, start="2024-01-01"):
+    return pd.date_range(start, periods=n, freq="s").values
+
+
+class TestChangePointDetector(unittest.TestCase):
+    def setUp(self):
+        self.state_dir = tempfile.mkdtemp()
+
+    def test_vectorized_cusum_matches_recursion(self):
+        increments = np.random.default_rng(0).normal(-0.2, 1, 500)
+        expected, s = [], 3.0
+        for x in increments:
+            s = max(0.0, s + x)
+            expected.append(s)
+        np.testing.assert_allclose(_cusum(increments, 3.0), expected)
+
+    def test_detects_step_and_restarts(self):
+        rng = np.random.default_rng(7)
+        x = _ar1(rng, 1500)
+        x[1000:] += 3.0  # ~2.4 marginal sigma at phi=0.6
+        ts = _times(1500)
+        detector = ChangePointDetector(state_dir=self.state_dir)
+        events = detector.update("PV-01", "pressure", x, ts)
+        self.assertEqual(len(events), 1)
+        evt = events[0]
+        self.assertEqual(evt["direction"], "up")
+        alarm = pd.Timestamp(evt["timestamp"])
+        self.assertTrue(pd.Timestamp(ts[1000]) <= alarm <= pd.Timestamp(ts[1040]))
+        self.assertLessEqual(abs((pd.Timestamp(evt["onset"]) - pd.Timestamp(ts[1000])).total_seconds()), 10)
+        state = detector.load_state("PV-01", "pressure")
+        self.assertEqual((state["changes"], state["points"]), (1, 1500))
+
+    def test_batches_match_single_pass_and_skip_resent_points(self):
+        rng = np.random.default_rng(2)
+        x = _ar1(rng, 2000)
+        x[1200:] -= 4.0
+        ts = _times(2000)
+        whole = ChangePointDetector(state_dir=tempfile.mkdtemp()).update("A", "m", x, ts)
+
+        batched = ChangePointDetector(state_dir=self.state_dir)
+        events = []
+        for lo in range(0, 2000, 137):
+            events += batched.update("A", "m", x[lo:lo + 137], ts[lo:lo + 137])
+        self.assertEqual(events, whole)
+
+        # Re-sending history (e.g. a re-uploaded CSV) changes nothing
+        before = batched.load_state("A", "m")
+        self.assertEqual(batched.update("A", "m", x[:500], ts[:500]), [])
+        self.assertEqual(batched.load_state("A", "m"), before)
+
+    def test_concurrent_updates_of_one_series_all_land(self):
+        x = _ar1(np.random.default_rng(4), 800)
+        ts = _times(800)
+        detector = ChangePointDetector(state_dir=self.state_dir)
+        load_state = detector.load_state
+
+        def slow_load(asset_id, metric):
+            state = load_state(asset_id, metric)
+            time.sleep(0.02) # widen the read-modify-write window
+            return state
+
+        detector.load_state = slow_load
+        saved = []
+        save_state = detector.save_state
+        detector.save_state = lambda a, m, state: (saved.append(state["points"]), save_state(a, m, state))
+        threads = [
+            threading.Thread(target=detector.update, args=("A", "m", x[lo:lo + 100], ts[lo:lo + 100]))
+            for lo in range(0, 800, 100)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        # Each save builds on the previous one (a batch older than last_ts is skipped
+        # whole); without the lock two updates save the same point count
+        self.assertEqual(saved, sorted(set(saved)))
+        self.assertEqual(load_state("A", "m")["points"], saved[-1])
+
+    def test_quiet_on_autocorrelated_noise(self):
+        rng = np.random.default_rng(3)
+        detector = ChangePointDetector(state_dir=self.state_dir)
+        alarms = 0
+        for s, phi in enumerate([0.0, 0.5, 0.8, 0.9]):
+            x = _ar1(rng, 5000, phi=phi)
+            ts = _times(5000)
+            for lo in range(0, 5000, 500):
+                alarms += len(detector.update(f"S{s}", "m", x[lo:lo + 500], ts[lo:lo + 500]))
+        self.assertLessEqual(alarms, 1)
+
+    def test_changed_series_bypass_screening(self):
+        rng = np.random.default_rng(5)
+        ml = MLPipeline(registry=ModelRegistry(os.path.join(self.state_dir, "registry")), workers=1)
+        jobs = [
+            {"key": ("PV-01", "pressure"), "series": _ar1(rng, 400, phi=0.0)},
+            {"key": ("PV-02", "pressure"), "series": _ar1(rng, 400, phi=0.0), "change_points": [{"direction": "up"}]},
+        ]
+        # Both have a recent full-model score, so only the change point sends PV-02 on
+        for job in jobs:
+            ml.registry.save_last_score(*job["key"], 0.3)
+        flagged, passed = ml.screen_jobs(jobs)
+        self.assertEqual([job["key"] for job in flagged], [("PV-02", "pressure")])
+        self.assertIn(("PV-01", "pressure"), passed)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+import unittest
+from datetime import datetime, timedelta
+from backend.app import create_app
+from backend.config import Config
+from backend.models.shared import db
+from backend.models.asset import Asset
+from backend.models.project import Project
+from backend.models.risk import RiskAssessment
+from backend.models.action import ActionItem
+from backend.utils import auth
+
+
+class TestConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    TESTING = True
+
+
+class TestDashboard(unittest.TestCase):
+    def setUp(self):
+        self._demo_public = auth.DEMO_PUBLIC
+        auth.DEMO_PUBLIC = True
+        self.app = create_app(TestConfig)
+        self.client = self.app.test_client()
+        # Each test starts from a fresh database, whose versions restart at zero
+        from backend.services.dashboard_service import DashboardService
+        DashboardService.invalidate()
+        now = datetime.utcnow()
+        with self.app.app_context():
+            db.create_all()
+            db.session.add(Project(id=1, name="P1", industry="Refining", plant_name="U1"))
+            db.session.add_all([
+                Asset(id="PV-01", name="Vessel", type="Pressure Vessel", project_id=1),
+                Asset(id="HE-01", name="Exchanger", type="Heat Exchanger", project_id=1),
+                Asset(id="ST-01", name="Tank", type="Storage Tank", project_id=1),
+            ])
+            db.session.add_all([
+                # Only the latest risk per asset counts
+                RiskAssessment(asset_id="PV-01", risk_score=0.2, degradation_type="Corrosion", timestamp=now - timedelta(hours=1)),
+                RiskAssessment(asset_id="PV-01", risk_score=0.9, degradation_type="Overpressure", timestamp=now),
+                RiskAssessment(asset_id="HE-01", risk_score=0.5, degradation_type="Fouling", timestamp=now),
+            ])
+            db.session.add_all([
+                ActionItem(asset_id="PV-01", project_id=1, recommendation="REPAIR"),
+                ActionItem(asset_id="HE-01", project_id=1, recommendation="MONITOR", status="COMPLETED"),
+            ])
+            db.session.commit()
+
+    def tearDown(self):
+        auth.DEMO_PUBLIC = self._demo_public
+
+    def test_dashboard_aggregates_and_cache(self):
+        data = self.client.get('/api/projects/1/dashboard?top_n=2').get_json()
+
+        self.assertEqual(data["asset_count"], 3)
+        self.assertEqual(data["risk_histogram"], {"High": 1, "Medium": 1, "Low": 1})
+        self.assertEqual([a["id"] for a in data["top_assets"]], ["PV-01", "HE-01"])
+        self.assertEqual(data["open_actions"], {"REPAIR": 1})
+        self.assertEqual(data["degradation_types"], {"Overpressure": 1, "Fouling": 1})
+        self.assertFalse(data["cached"])
+
+        self.assertTrue(self.client.get('/api/projects/1/dashboard?top_n=2').get_json()["cached"])
+
+        # A new action invalidates the cached overview
+        with self.app.app_context():
+            db.session.add(ActionItem(asset_id="HE-01", project_id=1, recommendation="MONITOR"))
+            db.session.commit()
+        data = self.client.get('/api/projects/1/dashboard?top_n=2').get_json()
+        self.assertFalse(data["cached"])
+        self.assertEqual(data["open_actions"], {"REPAIR": 1, "MONITOR": 1})
+
+    def test_dashboard_invalidates_on_commit_only(self):
+        from backend.services.dashboard_service import DashboardService
+        self.client.get('/api/projects/1/dashboard')
+        with self.app.app_context():
+            db.session.add(ActionItem(asset_id="ST-01", project_id=1, recommendation="DEFER"))
+            db.session.flush()
+            # Flushed but not committed: a concurrent read could re-cache the old state
+            self.assertTrue(DashboardService._cache)
+            db.session.rollback()
+            self.assertTrue(DashboardService._cache)
+            db.session.add(ActionItem(asset_id="ST-01", project_id=1, recommendation="DEFER"))
+            db.session.commit()
+            self.assertFalse(DashboardService._cache)
+
+    def test_dashboard_sees_commits_from_other_workers(self):
+        self.client.get('/api/projects/1/dashboard')
+        # A write another process made: no local invalidation, only the stored version changes
+        from backend.services.dashboard_service import DashboardService
+        with self.app.app_context():
+            db.session.execute(ActionItem.__table__.insert().values(
+                asset_id="ST-01", project_id=1, recommendation="DEFER", status="OPEN"))
+            db.session.execute(RiskAssessment.__table__.insert().values(
+                asset_id="ST-01", risk_score=0.8, degradation_type="Corrosion", timestamp=datetime.utcnow()))
+            db.session.execute(RiskAssessment.__table__.insert().values(
+                asset_id="ST-01", risk_score=0.8, degradation_type="Corrosion", timestamp=datetime.utcnow()))
+            DashboardService.bump(db.session, [1])
+            db.session.info.clear()
+            db.session.commit()
+        data = self.client.get('/api/projects/1/dashboard').get_json()
+        self.assertFalse(data["cached"])
+        self.assertEqual(data["open_actions"], {"REPAIR": 1, "DEFER": 1})
+
+    def test_asset_writes_invalidate(self):
+        self.assertEqual(self.client.get('/api/projects/1/dashboard').get_json()["asset_count"], 3)
+        with self.app.app_context():
+            db.session.add(Project(id=2, name="P2", industry="Refining", plant_name="U2"))
+            db.session.add(Asset(id="PV-02", name="Vessel", type="Pressure Vessel", project_id=1))
+            db.session.commit()
+        data = self.client.get('/api/projects/1/dashboard').get_json()
+        self.assertEqual((data["asset_count"], data["cached"]), (4, False))
+
+        # Moving an asset refreshes both projects
+        self.assertEqual(self.client.get('/api/projects/2/dashboard').get_json()["asset_count"], 0)
+        with self.app.app_context():
+            db.session.get(Asset, "PV-02").project_id = 2
+            db.session.commit()
+        self.assertEqual(self.client.get('/api/projects/1/dashboard').get_json()["asset_count"], 3)
+        self.assertEqual(self.client.get('/api/projects/2/dashboard').get_json()["asset_count"], 1)
+
+        # Bulk upserts bypass the session events and bump the version themselves
+        self.client.post('/api/assets/bulk?project_id=1', json=[{"id": "ST-02", "type": "Storage Tank"}])
+        data = self.client.get('/api/projects/1/dashboard').get_json()
+        self.assertEqual((data["asset_count"], data["cached"]), (4, False))
+        self.assertTrue(self.client.get('/api/projects/1/dashboard').get_json()["cached"])
+
+    def test_latest_risk_tie_counts_asset_once(self):
+        ts = datetime.utcnow() + timedelta(hours=1)
+        with self.app.app_context():
+            db.session.add_all([
+                RiskAssessment(asset_id="ST-01", risk_score=0.1, degradation_type="Corrosion", timestamp=ts),
+                RiskAssessment(asset_id="ST-01", risk_score=0.4, degradation_type="Fouling", timestamp=ts),
+            ])
+            db.session.commit()
+        data = self.client.get('/api/projects/1/dashboard').get_json()
+        self.assertEqual(data["asset_count"], 3)
+        self.assertEqual(data["risk_histogram"], {"High": 1, "Medium": 2, "Low": 0})
+        self.assertEqual(data["degradation_types"], {"Overpressure": 1, "Fouling": 2})
+
+
+if __name__ == '__main__':
+    unittest.main()
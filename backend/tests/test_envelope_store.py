@@ -0,0 +1,94 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+import pickle
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+import pandas as pd
+from backend.services.baseline_model import BaselineModel, LEGACY_PICKLE
+from backend.services import envelope_store
+from backend.services.envelope_store import EnvelopeStore
+
+ENVELOPE = {"pressure": {"mean": 10.0, "std": 0.1, "upper_bound": 10.3, "lower_bound": 9.7}}
+
+
+class EnvelopeStoreTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_versions_and_lazy_lru(self):
+        store = EnvelopeStore(self.tmp, max_entries=2)
+        self.assertIsNone(store.get("vessel"))
+        self.assertEqual(store.save("vessel", ENVELOPE), 1)
+        self.assertEqual(store.save("vessel", ENVELOPE), 2)
+        store.save("pump", ENVELOPE)
+        store.save("tank/v2", ENVELOPE)
+        self.assertEqual(sorted(store.asset_types()), ["pump", "tank/v2", "vessel"])
+
+        reader = EnvelopeStore(self.tmp, max_entries=2)
+        self.assertEqual(len(reader._entries), 0)
+        self.assertEqual(reader.get_document("vessel")["version"], 2)
+        reader.get("pump")
+        reader.get("tank/v2")
+        self.assertEqual(list(reader._entries), ["pump", "tank/v2"])
+
+        # Another writer's save is picked up by the cached reader
+        changed = {"pressure": {**ENVELOPE["pressure"], "upper_bound": 11.0}}
+        store.save("pump", changed)
+        os.utime(store._path("pump"), ns=(0, 10 ** 18))
+        self.assertEqual(reader.get("pump"), changed)
+
+    def test_concurrent_saves_get_distinct_versions(self):
+        store = EnvelopeStore(self.tmp)
+        read_json = envelope_store.read_json
+
+        def slow_read(path, default=None):
+            doc = read_json(path, default)
+            time.sleep(0.02) # widen the version read-write window
+            return doc
+
+        versions = []
+        with mock.patch.object(envelope_store, 'read_json', slow_read):
+            threads = [threading.Thread(target=lambda: versions.append(store.save("vessel", ENVELOPE))) for _ in range(6)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        self.assertEqual(sorted(versions), [1, 2, 3, 4, 5, 6])
+        self.assertEqual(store.get_document("vessel")["version"], 6)
+
+    def test_baseline_model_saves_and_loads_per_type(self):
+        writer = BaselineModel(model_dir=self.tmp)
+        writer.train_baseline("vessel", pd.DataFrame({"pressure": [10.0, 10.1, 9.9, 10.0]}))
+        self.assertEqual(writer.save_model(), {"vessel": 1})
+
+        reader = BaselineModel(model_dir=self.tmp)
+        result = reader.check_deviations("vessel", pd.DataFrame({"pressure": [10.0, 12.0]}))
+        self.assertEqual(list(result["baseline_deviation_level"]), [0, 1])
+        with self.assertRaises(ValueError):
+            reader.check_deviations("pump", pd.DataFrame({"pressure": [1.0]}))
+
+    def test_legacy_pickle_migration(self):
+        with open(os.path.join(self.tmp, LEGACY_PICKLE), 'wb') as f:
+            pickle.dump({"vessel": ENVELOPE}, f)
+        model = BaselineModel(model_dir=self.tmp)
+        model.load_model()
+        self.assertEqual(model.store.asset_types(), ["vessel"])
+        self.assertEqual(model.get_envelope("vessel"), ENVELOPE)
+
+        with open(os.path.join(self.tmp, "bad.pkl"), 'wb') as f:
+            pickle.dump({"vessel": pd.Timestamp("2024-01-01")}, f)
+        with self.assertRaises(pickle.UnpicklingError):
+            model.store.import_pickle(os.path.join(self.tmp, "bad.pkl"))
+
+
+if __name__ == '__main__':
+    unittest.main()
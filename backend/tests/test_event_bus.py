@@ -0,0 +1,85 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+import unittest
+from unittest import mock
+from backend.app import create_app
+from backend.config import Config
+from backend.models.shared import db
+from backend.models.asset import Asset
+from backend.models.project import Project
+from backend.models.risk import RiskAssessment
+from backend.models.action import ActionItem
+from backend.services.event_bus import EventBus, TooManySubscribers, event_bus
+
+
+class TestConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    TESTING = True
+
+
+class TestEventBus(unittest.TestCase):
+    def test_resume_from_last_event_id(self):
+        bus = EventBus(history_size=10)
+        first = bus.publish(1, 'risk', {"n": 1})
+        bus.publish(1, 'risk', {"n": 2})
+        bus.publish(2, 'risk', {"n": 99})  # other project
+
+        sub = bus.subscribe(1, last_event_id=first)
+        self.assertEqual(sub.get(timeout=0.1)["data"], {"n": 2})
+        self.assertIsNone(sub.get(timeout=0.01))
+
+        bus.publish("1", 'action', {"n": 3})
+        self.assertEqual(sub.get(timeout=0.1)["type"], 'action')
+
+    def test_slow_client_is_dropped(self):
+        bus = EventBus(client_queue_size=2)
+        sub = bus.subscribe(1)
+        for i in range(3):
+            bus.publish(1, 'risk', {"n": i})
+        self.assertTrue(sub.overflowed)
+        self.assertEqual(bus.subscriber_count(1), 0)
+
+    def test_subscriber_cap(self):
+        bus = EventBus(max_subscribers=2)
+        first = bus.subscribe(1)
+        bus.subscribe(2)
+        with self.assertRaises(TooManySubscribers):
+            bus.subscribe(1)
+        bus.unsubscribe(first)
+        bus.subscribe(1)
+        self.assertEqual(bus.subscriber_count(), 2)
+
+    def test_stream_refused_over_cap(self):
+        client = create_app(TestConfig).test_client()
+        with mock.patch('backend.utils.auth.DEMO_PUBLIC', True), mock.patch.object(event_bus, 'max_subscribers', 0):
+            response = client.get('/api/projects/1/events')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers["Retry-After"], "30")
+
+    def test_events_published_on_commit_only(self):
+        app = create_app(TestConfig)
+        with app.app_context():
+            db.create_all()
+            db.session.add(Project(id=7, name="P", industry="Refining", plant_name="U"))
+            db.session.add(Asset(id="PV-07", name="Vessel", type="Pressure Vessel", project_id=7))
+            db.session.commit()
+
+            sub = event_bus.subscribe(7)
+            db.session.add(RiskAssessment(asset_id="PV-07", risk_score=0.8))
+            db.session.flush()
+            self.assertIsNone(sub.get(timeout=0.01))
+            db.session.rollback()
+            self.assertIsNone(sub.get(timeout=0.01))
+
+            db.session.add(RiskAssessment(asset_id="PV-07", risk_score=0.8))
+            db.session.add(ActionItem(asset_id="PV-07", project_id=7, recommendation="REPAIR"))
+            db.session.commit()
+            types = sorted([sub.get(timeout=0.1)["type"], sub.get(timeout=0.1)["type"]])
+            self.assertEqual(types, ['action', 'risk'])
+            event_bus.unsubscribe(sub)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -46,5 +46,133 @@ def test_feature_engine():
     print("Dominant Freq Sample:", df_fft['signal_dom_freq'].iloc[60])
     print("✅ FFT passed.")
 
+def _rolling_dom_freq(series, window_size):
+    def get_dominant_freq(x):
+        x = x - np.mean(x)
+        return np.fft.rfftfreq(len(x))[np.argmax(np.abs(np.fft.rfft(x)))]
+    return series.rolling(window=window_size).apply(get_dominant_freq, raw=True).bfill()
+
+
+def test_strided_fft_matches_rolling_apply():
+    fe = FeatureEngine()
+    rng = np.random.default_rng(0)
+    x = np.sin(2 * np.pi * 0.12 * np.arange(3000)) + rng.normal(0, 1, 3000)
+    x[[100, 1500, 1501]] = np.nan
+    df = pd.DataFrame({"signal": x})
+    for window_size in (10, 50, 64):
+        expected = _rolling_dom_freq(df["signal"], window_size)
+        got = fe.compute_simple_fft_features(df, "signal", window_size=window_size)["signal_dom_freq"]
+        assert np.allclose(got, expected)
+
+
+def test_spectral_features_bands_centroid_and_hop():
+    fe = FeatureEngine()
+    t = np.arange(4096)
+    # 50 Hz tone sampled at 1 kHz, then a 300 Hz tone
+    y = np.where(t < 2048, np.sin(2 * np.pi * 50 * t / 1000), np.sin(2 * np.pi * 300 * t / 1000))
+    df = pd.DataFrame({"vib": y})
+    out = fe.compute_spectral_features(df, "vib", window_size=200, hop=25, sample_rate=1000.0,
+                                       bands=[(0, 100), (100, 500)])
+    assert list(out.columns) == ["vib", "vib_dom_freq", "vib_spec_centroid", "vib_band_0_100", "vib_band_100_500"]
+    assert out["vib_dom_freq"].iloc[1000] == 50.0 and out["vib_dom_freq"].iloc[4000] == 300.0
+    assert out["vib_band_0_100"].iloc[1000] > 100 * out["vib_band_100_500"].iloc[1000]
+    assert out["vib_band_100_500"].iloc[4000] > 100 * out["vib_band_0_100"].iloc[4000]
+    assert 40 < out["vib_spec_centroid"].iloc[1000] < 60
+
+    # Band energies of a full split add up to the window's (DC-free) spectral energy
+    full = fe.compute_spectral_features(df, "vib", window_size=200, features=("bands",), bands=5)
+    window = y[1000 - 199:1001]
+    power = np.abs(np.fft.rfft(window))[1:] ** 2
+    band_cols = [c for c in full.columns if c.startswith("vib_band_")]
+    assert len(band_cols) == 5
+    assert np.isclose(full[band_cols].iloc[1000].sum(), power.sum())
+
+    # With a hop, rows between windows carry the last window's value
+    hopped = fe.compute_spectral_features(df, "vib", window_size=200, hop=25, features=("dom_freq",))
+    strided = fe.compute_spectral_features(df, "vib", window_size=200, hop=1, features=("dom_freq",))
+    ends = np.arange(199, 4096, 25)
+    assert np.allclose(hopped["vib_dom_freq"].iloc[ends], strided["vib_dom_freq"].iloc[ends])
+    assert (hopped["vib_dom_freq"].iloc[ends[3]:ends[4]] == hopped["vib_dom_freq"].iloc[ends[3]]).all()
+
+def test_incremental_update_matches_full_history():
+    import tempfile
+    rng = np.random.default_rng(3)
+    n = 1000
+    times = pd.date_range("2024-01-01", periods=n, freq="s")
+    vibration = np.sin(2 * np.pi * 0.2 * np.arange(n)) + rng.normal(0, 0.2, n)
+    fe = FeatureEngine(state_dir=tempfile.mkdtemp(), window=5, fft_window=16)
+
+    # Uneven batches, one of them shuffled, plus a re-sent stretch of history
+    parts, start = [], 0
+    for size in (2, 7, 150, 1, 400, 440):
+        idx = np.arange(start, start + size)
+        if size == 400:
+            idx = rng.permutation(idx)
+        parts.append(fe.update("PUMP-01", "vibration", vibration[idx], times[idx].values))
+        start += size
+    assert fe.update("PUMP-01", "vibration", vibration[500:600], times[500:600].values).empty
+    got = pd.concat(parts)
+    assert len(got) == n and (got.index == times).all()
+
+    full = pd.DataFrame({"vibration": vibration})
+    full = FeatureEngine().compute_rolling_stats(full, window=5, columns=["vibration"])
+    full = FeatureEngine().compute_rate_of_change(full, columns=["vibration"])
+    full = FeatureEngine().compute_spectral_features(full, "vibration", window_size=16, features=("dom_freq",))
+    # Rows from the first full window onward match a full-history recompute
+    for col in ("vibration_roll_mean", "vibration_roll_std", "vibration_roc", "vibration_dom_freq"):
+        np.testing.assert_allclose(got[col].to_numpy()[15:], full[col].to_numpy()[15:], atol=1e-9)
+
+    state = fe.load_state("PUMP-01", "vibration")
+    assert len(state["tail"]) == fe.lookback == 15 and state["points"] == n
+    latest = fe.latest_features("PUMP-01", ["vibration"])
+    assert np.isclose(latest["vibration_roll_mean"], vibration[-5:].mean())
+
+
+def test_latest_features_under_consumer_names():
+    import tempfile
+    times = pd.date_range("2024-01-01", periods=10, freq="s").values
+    fe = FeatureEngine(state_dir=tempfile.mkdtemp(), window=3, fft_window=None)
+    fe.update("PUMP-01", "vib", np.arange(10.0), times)
+    fe.update("PUMP-01", "Temp", np.full(10, 85.0), times)
+    latest = fe.latest_features("PUMP-01", {"vib": "vibration", "Temp": "temperature"})
+    assert latest["vibration_roll_mean"] == 8.0 and latest["temperature_roll_mean"] == 85.0
+    assert "vib_roll_mean" not in latest
+    assert fe.latest_features("PUMP-01", ["vib"])["vib_roll_mean"] == 8.0
+
+
+def test_concurrent_updates_of_one_series_all_land():
+    import tempfile
+    import threading
+    import time
+    times = pd.date_range("2024-01-01", periods=80, freq="s").values
+    fe = FeatureEngine(state_dir=tempfile.mkdtemp(), window=3, fft_window=None)
+    load_state = fe.load_state
+
+    def slow_load(asset_id, metric):
+        state = load_state(asset_id, metric)
+        time.sleep(0.02) # widen the read-modify-write window
+        return state
+
+    fe.load_state = slow_load
+    accepted = []
+
+    def ingest(i):
+        accepted.append(len(fe.update("PUMP-01", "vibration", np.ones(10), times[i * 10:(i + 1) * 10])))
+
+    threads = [threading.Thread(target=ingest, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    # Every point an update accepted is in the state (batches that lost the race
+    # to a later one are skipped whole, never half-counted)
+    assert load_state("PUMP-01", "vibration")["points"] == sum(accepted) >= 10
+
+
 if __name__ == "__main__":
     test_feature_engine()
+    test_strided_fft_matches_rolling_apply()
+    test_spectral_features_bands_centroid_and_hop()
+    test_incremental_update_matches_full_history()
+    test_latest_features_under_consumer_names()
+    test_concurrent_updates_of_one_series_all_land()
@@ -0,0 +1,76 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+import numpy as np
+import pandas as pd
+from backend.services.feature_engine import FeatureEngine
+from backend.services.feature_pipeline import FeaturePipeline
+
+
+def _frame(n=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "timestamp": pd.date_range("2024-01-01", periods=n, freq="s"),
+        "pressure": rng.normal(100, 2, n),
+        "vibration": np.sin(2 * np.pi * 0.1 * np.arange(n)) + rng.normal(0, 0.3, n)
+    })
+    df.loc[df.index.isin([40, 41, 900]), "pressure"] = np.nan
+    return df
+
+
+def test_pipeline_matches_feature_engine():
+    df = _frame()
+    fe = FeatureEngine()
+    pipeline = (FeaturePipeline()
+                .rolling_stats(["pressure", "vibration"], window=5)
+                .rate_of_change(["pressure", "vibration"])
+                .spectral("vibration", window_size=32, features=("dom_freq",)))
+    out = pipeline.transform(df)
+    assert list(out.columns) == list(df.columns) + pipeline.output_columns
+    assert out["pressure"].isna().sum() == 3  # inputs are left untouched
+
+    rolled = df[["pressure", "vibration"]].rolling(5)
+    for col in ("pressure", "vibration"):
+        assert np.allclose(out[f"{col}_roll_mean"], rolled.mean()[col].bfill())
+        assert np.allclose(out[f"{col}_roll_std"], rolled.std()[col].bfill())
+        assert np.allclose(out[f"{col}_roc"], df[col].diff().fillna(0))
+    expected = fe.compute_simple_fft_features(df, "vibration", window_size=32)["vibration_dom_freq"]
+    assert np.allclose(out["vibration_dom_freq"], expected)
+
+
+def test_plan_shares_intermediates():
+    pipeline = (FeaturePipeline()
+                .rolling_stats("pressure", window=5)
+                .rolling_stats("pressure", window=20, stats=("mean",))
+                .spectral("vibration", window_size=64, features=("dom_freq", "centroid"))
+                .spectral("vibration", window_size=64, features=("bands",), bands=4))
+    ordered, outputs = pipeline.plan()
+    keys = [node.key for node in ordered]
+    assert len(outputs) == 3 + 2 + 4
+    assert keys.count(("column", "pressure")) == 1
+    assert len([k for k in keys if k[0] == "window_sums"]) == 2
+    assert len([k for k in keys if k[0] == "spectrum"]) == 1
+    # Every dependency is computed before the node that uses it
+    seen = set()
+    for node in ordered:
+        assert set(node.deps) <= seen
+        seen.add(node.key)
+
+    # One spectrum node still serves both declarations
+    out = pipeline.compute(_frame())
+    assert out["vibration_dom_freq"].iloc[500] == 0.09375  # nearest 1/64 bin to 0.1
+    bands = out.filter(like="vibration_band_")
+    assert bands.shape[1] == 4 and bands.to_numpy().min() >= 0
+
+
+def test_cache_per_series_version():
+    df = _frame(500)
+    pipeline = FeaturePipeline().rolling_stats("pressure", window=5)
+    first = pipeline.transform(df, key=("PV-1", "pressure"), version=("2024-01-01T00:08:19", 500))
+    again = pipeline.transform(df, key=("PV-1", "pressure"), version=("2024-01-01T00:08:19", 500))
+    assert again is first and pipeline.hits == 1
+
+    newer = pd.concat([df, _frame(10, seed=1)], ignore_index=True)
+    updated = pipeline.transform(newer, key=("PV-1", "pressure"), version=("2024-01-01T00:08:29", 510))
+    assert updated is not first and len(updated) == 510 and pipeline.misses == 2
@@ -40,6 +40,20 @@ def test_data_quality():
     
     print("✅ Data Quality Service verified.")
 
+def test_app_boot_skips_ml_stack():
+    import subprocess
+    root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+    probe = (
+        "import sys; from backend.app import create_app; create_app(); "
+        "print('HEAVY:' + ','.join(m for m in ('tensorflow', 'statsmodels') if m in sys.modules))"
+    )
+    env = {**os.environ, "DATABASE_URL": "sqlite://", "ML_WARMUP": "false", "PYTHONPATH": root}
+    out = subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True, env=env, cwd=root)
+    assert out.returncode == 0, out.stderr
+    assert out.stdout.strip().splitlines()[-1] == "HEAVY:", out.stdout
+    print("✅ App boots without TensorFlow/statsmodels.")
+
 if __name__ == "__main__":
     test_imports()
     test_data_quality()
+    test_app_boot_skips_ml_stack()
@@ -0,0 +1,116 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+import tempfile
+import unittest
+import json
+import numpy as np
+import pandas as pd
+from backend.app import create_app
+from backend.config import Config
+from backend.models.shared import db
+from backend.models.asset import Asset
+from backend.models.project import Project
+from backend.models.sensor import SensorData
+from backend.models.risk import RiskAssessment
+from backend.routes import analysis
+from backend.services.ml_pipeline import MLPipeline
+from backend.services.model_registry import ModelRegistry
+from backend.services.multivariate_scorer import MultivariateScorer
+from backend.utils import auth
+
+
+class TestConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    TESTING = True
+
+
+def pump_metrics(n=400, seed=0, vibration_fault=False):
+    """Coupled pump signals: rpm and temperature follow load, vibration follows rpm."""
+    rng = np.random.default_rng(seed)
+    load = 50 + rng.normal(0, 1, n)
+    rpm = 1500 + 20 * (load - 50) + rng.normal(0, 5, n)
+    metrics = {
+        "load": load,
+        "rpm": rpm,
+        "temperature": 60 + 0.5 * (load - 50) + rng.normal(0, 0.5, n),
+        "vibration": 2 + 0.01 * (rpm - 1500) + rng.normal(0, 0.1, n),
+    }
+    if vibration_fault:
+        metrics["vibration"][-10:] += 0.6
+    return pd.date_range('2024-01-01', periods=n, freq='1min'), metrics
+
+
+def long_frame(timestamps, metrics):
+    return pd.concat([pd.DataFrame({"timestamp": timestamps, "metric": k, "value": v}) for k, v in metrics.items()])
+
+
+class TestMultivariateScorer(unittest.TestCase):
+    def test_attributes_fault_to_metric(self):
+        healthy = MultivariateScorer(ModelRegistry(tempfile.mkdtemp()))
+        aligned, freq = healthy.align(long_frame(*pump_metrics()))
+        self.assertEqual(freq, "60s")
+        self.assertEqual(sorted(aligned.columns), ["load", "rpm", "temperature", "vibration"])
+        self.assertLess(healthy.score("P-1", aligned, freq)["rof_score"], 0.3)
+
+        faulty = MultivariateScorer(ModelRegistry(tempfile.mkdtemp()))
+        aligned, freq = faulty.align(long_frame(*pump_metrics(vibration_fault=True)))
+        result = faulty.score("P-1", aligned, freq)
+        self.assertGreater(result["rof_score"], 0.7)
+        self.assertEqual(result["top_metric"], "vibration")
+        self.assertAlmostEqual(sum(result["contributions"].values()), 1.0, places=3)
+
+    def test_needs_two_metrics(self):
+        timestamps, metrics = pump_metrics()
+        scorer = MultivariateScorer(ModelRegistry(tempfile.mkdtemp()))
+        aligned, freq = scorer.align(long_frame(timestamps, {"load": metrics["load"]}))
+        self.assertIsNone(scorer.score("P-1", aligned, freq))
+
+
+class TestMultivariateRoute(unittest.TestCase):
+    def setUp(self):
+        self._demo_public = auth.DEMO_PUBLIC
+        auth.DEMO_PUBLIC = True
+        self._pipeline = analysis.ml_pipeline
+        analysis.ml_pipeline = MLPipeline(registry=ModelRegistry(tempfile.mkdtemp()), workers=1)
+        self.app = create_app(TestConfig)
+        self.client = self.app.test_client()
+        timestamps, metrics = pump_metrics(vibration_fault=True)
+        with self.app.app_context():
+            db.create_all()
+            db.session.add(Project(id=1, name="P1", industry="Refining", plant_name="U1"))
+            db.session.add(Asset(id="PU-01", name="Pump", type="Pump", project_id=1))
+            db.session.add_all([
+                SensorData(asset_id="PU-01", timestamp=ts.to_pydatetime(), type=metric, value=float(v))
+                for metric, values in metrics.items() for ts, v in zip(timestamps, values)
+            ])
+            db.session.commit()
+
+    def tearDown(self):
+        auth.DEMO_PUBLIC = self._demo_public
+        analysis.ml_pipeline = self._pipeline
+
+    def test_run_asset_multivariate(self):
+        payload = {"asset_id": "PU-01", "project_id": 1, "mode": "multivariate"}
+        data = self.client.post('/api/analysis/run_asset', json=payload).get_json()
+        self.assertEqual(data["mode"], "multivariate")
+        self.assertEqual(data["top_metric"], "vibration")
+        self.assertEqual(data["metric"], "vibration")
+        self.assertEqual(len(data["metrics"]), 4)
+
+        with self.app.app_context():
+            risks = RiskAssessment.query.filter_by(asset_id="PU-01").all()
+            self.assertEqual(len(risks), 1)
+            notes = json.loads(risks[0].notes)
+            self.assertEqual(notes["multivariate"]["top_metric"], "vibration")
+
+        # Unchanged data: served from the score cache, no second row
+        again = self.client.post('/api/analysis/run_asset', json=payload).get_json()
+        self.assertTrue(again["cached"])
+        with self.app.app_context():
+            self.assertEqual(RiskAssessment.query.filter_by(asset_id="PU-01").count(), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
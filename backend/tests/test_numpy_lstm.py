@@ -0,0 +1,51 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+import tempfile
+import numpy as np
+import pytest
+from backend.services.ml_pipeline import MLPipeline
+from backend.services.model_registry import ModelRegistry
+from backend.services.numpy_lstm import NumpyLSTM, export_keras_lstm, has_weights
+
+tf = pytest.importorskip("tensorflow")
+
+
+def test_forward_pass_matches_keras():
+    ml = MLPipeline(registry=ModelRegistry(tempfile.mkdtemp()), workers=1)
+    model = ml._build_lstm_model()
+    rng = np.random.default_rng(0)
+    # Random (not freshly initialized) weights so every gate actually matters
+    model.set_weights([rng.normal(0, 0.5, w.shape).astype(np.float32) for w in model.get_weights()])
+
+    X = rng.uniform(0, 1, (256, ml.lstm_window)).astype(np.float32)
+    expected = model(X[..., np.newaxis], training=False).numpy().flatten()
+    actual = NumpyLSTM(export_keras_lstm(model)).predict(X)
+    np.testing.assert_allclose(actual, expected, atol=1e-5)
+    print("✅ NumPy LSTM matches Keras, max abs diff:", float(np.max(np.abs(actual - expected))))
+
+
+def test_registry_scores_with_numpy_runtime():
+    registry_dir = tempfile.mkdtemp()
+    rng = np.random.default_rng(1)
+    series = (np.sin(np.linspace(0, 40, 300)) + rng.normal(0, 0.1, 300)).astype(np.float32)
+    key = ("PV-01", "pressure")
+
+    trainer = MLPipeline(registry=ModelRegistry(registry_dir), workers=1)
+    trainer._lstm_score(series, key)
+    meta, arrays = trainer.registry.load(*key, 'lstm')
+    assert has_weights(arrays)
+
+    # Fresh pipeline (as in a new worker): loads the exported weights, not the .keras file
+    scorer = MLPipeline(registry=ModelRegistry(registry_dir), workers=1)
+    score = scorer._lstm_score(series, key)
+    assert isinstance(scorer._lstm_cache[(key, meta["version"])], NumpyLSTM)
+
+    # Same score as the Keras model stored alongside
+    keras_model = tf.keras.models.load_model(
+        trainer.registry.artifact_path(*key, 'lstm', meta["version"], 'keras'), compile=False)
+    window = series[-(trainer.inference_window + meta["window"]):]
+    X, y = trainer._make_windows((window - meta["min"]) / (meta["max"] - meta["min"] + 1e-12))
+    preds = keras_model(X[..., np.newaxis], training=False).numpy().flatten()
+    assert abs(score - float(np.tanh(np.mean((preds - y) ** 2) * 10))) < 1e-5
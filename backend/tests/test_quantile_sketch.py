@@ -0,0 +1,153 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+import shutil
+import tempfile
+import threading
+import time
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+from backend.app import create_app
+from backend.config import Config
+from backend.models.shared import db
+from backend.models.asset import Asset
+from backend.models.sensor import SensorData
+from backend.services.quantile_sketch import QuantileSketch, SketchStore
+from backend.services.baseline_model import BaselineModel
+
+QS = np.array([0.001, 0.01, 0.1, 0.5, 0.9, 0.99, 0.999])
+
+
+def _rank_error(sketch, data):
+    estimates = sketch.quantile(QS)
+    ranks = np.searchsorted(np.sort(data), estimates) / len(data)
+    return np.abs(ranks - QS)
+
+
+def test_sketch_tracks_skewed_quantiles():
+    data = np.random.default_rng(0).lognormal(0, 1, 200000)
+    sketch = QuantileSketch().update(data)
+    assert len(sketch.means) <= 160
+    assert sketch.count == len(data)
+    assert _rank_error(sketch, data).max() < 1e-3
+    assert sketch.quantile(0.0) == data.min() and sketch.quantile(1.0) == data.max()
+    assert abs(sketch.cdf(np.median(data)) - 0.5) < 1e-3
+
+
+def test_merged_partitions_match_single_pass():
+    rng = np.random.default_rng(1)
+    data = np.concatenate([rng.normal(0, 1, 50000), rng.exponential(5, 50000)])
+    rng.shuffle(data)
+    parts = [QuantileSketch().update(chunk) for chunk in np.array_split(data, 37)]
+    merged = QuantileSketch()
+    for part in reversed(parts):
+        merged.merge(part)
+    assert merged.count == len(data)
+    assert _rank_error(merged, data).max() < 2e-3
+
+
+def test_store_round_trip_per_batch():
+    tmp = tempfile.mkdtemp()
+    try:
+        store = SketchStore(tmp)
+        data = np.random.default_rng(2).gamma(2.0, 1.5, 30000)
+        for batch in np.array_split(data, 10):
+            store.update("PUMP/1", "vibration", np.append(batch, np.nan))
+        sketch = store.load("PUMP/1", "vibration")
+        assert sketch.count == len(data)
+        assert _rank_error(sketch, data).max() < 2e-3
+        assert store.load("PUMP/1", "pressure").count == 0
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def test_concurrent_updates_of_one_series_all_land():
+    tmp = tempfile.mkdtemp()
+    try:
+        store = SketchStore(tmp)
+        load = store.load
+
+        def slow_load(asset_id, metric):
+            sketch = load(asset_id, metric)
+            time.sleep(0.02) # widen the read-merge-write window
+            return sketch
+
+        store.load = slow_load
+        threads = [
+            threading.Thread(target=store.update, args=("PUMP-1", "vibration", np.full(100, float(i))))
+            for i in range(8)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert load("PUMP-1", "vibration").count == 800
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+class _TestConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    TESTING = True
+
+
+def test_missing_sketch_is_built_from_its_series_history():
+    tmp = tempfile.mkdtemp()
+    app = create_app(_TestConfig)
+    try:
+        with app.app_context():
+            db.create_all()
+            db.session.add(Asset(id="PUMP-1", name="Pump", type="Pump"))
+            data = np.random.default_rng(4).normal(5.0, 1.0, 3000)
+            base = datetime(2024, 1, 1)
+            db.session.add_all([
+                SensorData(asset_id="PUMP-1", timestamp=base + timedelta(minutes=i), type=metric, value=float(v))
+                for metric in ("vibration", "pressure") for i, v in enumerate(data)
+            ])
+            db.session.commit()
+
+            # Startup builds nothing; the first load scans that one series only
+            store = SketchStore(tmp, backfill_missing=True, chunk_size=700)
+            assert not os.path.exists(os.path.join(tmp, "PUMP-1"))
+            sketch = store.load("PUMP-1", "vibration")
+            assert sketch.count == len(data)
+            assert _rank_error(sketch, data).max() < 2e-3
+            assert not os.path.exists(os.path.join(tmp, "PUMP-1", "pressure.npz"))
+
+            # Later (committed) batches merge into the built sketch
+            db.session.add(SensorData(asset_id="PUMP-1", timestamp=base, type="vibration", value=5.0))
+            db.session.commit()
+            store.update("PUMP-1", "vibration", [5.0])
+            assert store.load("PUMP-1", "vibration").count == len(data) + 1
+
+            # A first ingest of a series without a sketch builds it from history,
+            # which already holds the committed batch
+            db.session.add(SensorData(asset_id="PUMP-1", timestamp=base, type="pressure", value=5.0))
+            db.session.commit()
+            assert store.update("PUMP-1", "pressure", [5.0]).count == len(data) + 1
+            assert SketchStore(tmp).load("PUMP-1", "pressure").count == len(data) + 1
+            db.session.remove()
+            db.drop_all()
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def test_quantile_baseline_ignores_outliers():
+    rng = np.random.default_rng(3)
+    healthy = rng.normal(10.0, 0.5, 5000)
+    healthy[:30] = 60.0 # sensor spikes in the training window
+    train = pd.DataFrame({"vibration": healthy})
+    test = pd.DataFrame({"vibration": [10.0, 13.0, 7.0]})
+
+    sigma = BaselineModel(model_dir=tempfile.gettempdir())
+    quantile = BaselineModel(model_dir=tempfile.gettempdir(), mode="quantile", lower_q=0.001, upper_q=0.99)
+    sigma.train_baseline("pump", train)
+    envelope = quantile.train_baseline("pump", train)["vibration"]
+
+    # 0.6% spikes stretch 3-sigma past 20; the 99th percentile stays near the healthy band
+    assert sigma.envelopes["pump"]["vibration"]["upper_bound"] > 20
+    assert envelope["method"] == "quantile" and envelope["upper_bound"] < 12
+    assert list(sigma.deviation_matrix("pump", test)["codes"][:, 0]) == [0, 0, 0]
+    assert list(quantile.deviation_matrix("pump", test)["codes"][:, 0]) == [0, 1, -1]
@@ -0,0 +1,136 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+import io
+import json
+import unittest
+import numpy as np
+from datetime import datetime
+from backend.app import create_app
+from backend.config import Config
+from backend.models.shared import db
+from backend.models.asset import Asset
+from backend.models.project import Project
+from backend.models.inspection import InspectionReading
+from backend.models.remaining_life import RemainingLifeEstimate
+from backend.services.remaining_life import RemainingLifeService, fit_linear_trends
+from backend.utils import auth
+
+
+class TestConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    TESTING = True
+
+
+def _yearly(asset_id, thickness, location=None, start=2018):
+    return [
+        InspectionReading(asset_id=asset_id, timestamp=datetime(start + i, 1, 1), type="thickness_mm",
+                          value=float(v), location=location)
+        for i, v in enumerate(thickness)
+    ]
+
+
+class TestRemainingLife(unittest.TestCase):
+    def setUp(self):
+        auth.DEMO_PUBLIC = True
+        self.app = create_app(TestConfig)
+        self.client = self.app.test_client()
+        rng = np.random.default_rng(3)
+        with self.app.app_context():
+            db.create_all()
+            db.session.add(Project(id=1, name="P1", industry="Refining", plant_name="U1"))
+            db.session.add_all([
+                # Nominal 12 mm with 3 mm allowance -> retire at 9 mm
+                Asset(id="PV-1", name="Vessel", type="Pressure Vessel", project_id=1,
+                      metadata_json=json.dumps({"thickness": {"value": 12, "unit": "mm"},
+                                                "corrosion_allowance": {"value": 3, "unit": "mm"}})),
+                Asset(id="PV-2", name="Vessel", type="Pressure Vessel", project_id=1),
+                Asset(id="PV-3", name="Vessel", type="Pressure Vessel", project_id=1),
+                Asset(id="PV-4", name="Vessel", type="Pressure Vessel", project_id=1),
+            ])
+            # PV-1: two CMLs; CML-B thins four times faster and governs
+            db.session.add_all(_yearly("PV-1", 12.0 - 0.1 * np.arange(6) + rng.normal(0, 0.01, 6), "CML-A"))
+            db.session.add_all(_yearly("PV-1", 12.0 - 0.4 * np.arange(6) + rng.normal(0, 0.01, 6), "CML-B"))
+            # PV-2: no measurable loss
+            db.session.add_all(_yearly("PV-2", [10.0, 10.0, 10.0, 10.0]))
+            # PV-3: one UT reading plus coupon rates (10 mpy = 0.254 mm/yr)
+            db.session.add_all(_yearly("PV-3", [8.0]))
+            db.session.add_all([
+                InspectionReading(asset_id="PV-3", timestamp=datetime(2018 + i, 6, 1), type="corrosion_rate_mpy", value=v)
+                for i, v in enumerate([9.0, 10.0, 11.0])
+            ])
+            db.session.commit()
+
+    def tearDown(self):
+        auth.DEMO_PUBLIC = False
+
+    def test_grouped_fit_matches_polyfit(self):
+        rng = np.random.default_rng(0)
+        groups = rng.integers(0, 50, 2000)
+        x = rng.uniform(0, 20, 2000) + 1e5  # large offsets must not cost precision
+        y = rng.normal(0, 1, 2000) + groups * 0.1 * x
+        fit = fit_linear_trends(x, y, groups)
+        for g in range(50):
+            slope, _ = np.polyfit(x[groups == g], y[groups == g], 1)
+            self.assertAlmostEqual(fit["slope"][g], slope, places=6)
+        single = fit_linear_trends([0, 1], [1, 3], [0, 0])
+        self.assertEqual(single["slope"][0], 2.0)
+        self.assertTrue(np.isnan(single["resid_var"][0]))
+
+    def test_project_run(self):
+        with self.app.app_context():
+            summary = RemainingLifeService().run(1)
+            self.assertEqual((summary["assets"], summary["estimated"]), (4, 3))
+            rows = {r.asset_id: r for r in RemainingLifeEstimate.query.all()}
+
+            pv1 = rows["PV-1"]
+            self.assertEqual((pv1.method, pv1.governing_location), ("thickness_trend", "CML-B"))
+            self.assertAlmostEqual(pv1.min_thickness_mm, 9.0)
+            self.assertAlmostEqual(pv1.corrosion_rate_mm_per_year, 0.4, places=1)
+            # 10 mm left above 9 mm at 0.4 mm/yr
+            self.assertAlmostEqual(pv1.remaining_life_years, 2.5, delta=0.2)
+            self.assertLess(pv1.remaining_life_low_years, pv1.remaining_life_years)
+            self.assertGreater(pv1.remaining_life_high_years, pv1.remaining_life_years)
+            # Half the conservative life after the last inspection
+            interval = (pv1.next_inspection - pv1.last_inspection).days / 365.25
+            self.assertAlmostEqual(interval, pv1.remaining_life_low_years / 2, delta=0.01)
+
+            pv2 = rows["PV-2"]
+            self.assertIsNone(pv2.remaining_life_years)
+            self.assertEqual((pv2.next_inspection - pv2.last_inspection).days, 3652)
+
+            pv3 = rows["PV-3"]
+            self.assertEqual(pv3.method, "measured_rate")
+            self.assertAlmostEqual(pv3.corrosion_rate_mm_per_year, 0.254)
+            # No metadata: retire at 75% of the first reading (6 mm)
+            self.assertAlmostEqual(pv3.remaining_life_years, 2.0 / 0.254, places=3)
+
+            # Re-running replaces rather than appends
+            RemainingLifeService().run(1)
+            self.assertEqual(RemainingLifeEstimate.query.count(), 3)
+
+    def test_endpoints(self):
+        res = self.client.post('/api/analysis/remaining-life/run', json={"project_id": 1})
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.get_json()["estimated"], 3)
+        res = self.client.get('/api/analysis/remaining-life?project_id=1')
+        estimates = res.get_json()["estimates"]
+        self.assertEqual([e["asset_id"] for e in estimates], ["PV-1", "PV-3", "PV-2"])
+        res = self.client.get('/api/analysis/remaining-life?project_id=1&asset_id=PV-3')
+        self.assertEqual(len(res.get_json()["estimates"]), 1)
+        self.assertEqual(self.client.get('/api/analysis/remaining-life').status_code, 400)
+
+    def test_inspection_upload_stores_readings(self):
+        csv = b"asset_id,date,finding,severity,thickness_mm,cml\nPV-4,2020-01-01,UT,Low,11.5,CML-1\nPV-4,2021-01-01,UT,Low,11.2,CML-1\n"
+        res = self.client.post('/api/ingest/upload-inspection-data?project_id=1',
+                               data={"file": (io.BytesIO(csv), "ut.csv")}, content_type='multipart/form-data')
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.get_json()["data"]["readings"], 2)
+        with self.app.app_context():
+            readings = InspectionReading.query.filter_by(asset_id="PV-4").all()
+            self.assertEqual({(r.type, r.location) for r in readings}, {("thickness_mm", "CML-1")})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,156 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+import numpy as np
+from datetime import datetime, timedelta
+from backend.app import create_app
+from backend.config import Config
+from backend.models.shared import db
+from backend.models.asset import Asset
+from backend.models.project import Project
+from backend.models.sensor import SensorData
+from backend.services.running_stats import RunningStatsService
+from backend.services.feature_engine import FeatureEngine
+from backend.services.analysis_engine import AnalysisEngine
+from backend.services.regime_baselines import RegimeBaselineService
+from backend.routes import analysis
+
+
+class TestConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    TESTING = True
+
+
+class TestRunDiagnosis(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.client = self.app.test_client()
+        self.auth = mock.patch('backend.utils.auth.DEMO_PUBLIC', True)
+        self.auth.start()
+        self.model_dir = tempfile.mkdtemp()
+        self.regimes = RegimeBaselineService(model_dir=self.model_dir)
+        self.regime_patch = mock.patch('backend.routes.analysis.regime_baselines', self.regimes)
+        self.regime_patch.start()
+        self.engine = AnalysisEngine(model_dir=self.model_dir)
+        self.engine_patch = mock.patch('backend.routes.analysis.analysis_engine', self.engine)
+        self.engine_patch.start()
+        with self.app.app_context():
+            db.create_all()
+            db.session.add(Project(id=1, name="P1", industry="Refining", plant_name="U1"))
+            db.session.add(Asset(id="PUMP-1", name="Pump", type="Pump", project_id=1))
+            db.session.commit()
+
+    def tearDown(self):
+        self.auth.stop()
+        self.regime_patch.stop()
+        self.engine_patch.stop()
+        shutil.rmtree(self.model_dir, ignore_errors=True)
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def _store_history(self, n=2000):
+        # Vibration tracks speed: ~1.0 at 1000 rpm, ~3.0 at 3000 rpm
+        rng = np.random.default_rng(5)
+        rpm = rng.choice([1000.0, 3000.0], n)
+        vibration = rpm / 1000.0 + rng.normal(0, 0.05, n)
+        base = datetime(2024, 1, 1)
+        records = []
+        for i in range(n):
+            ts = base + timedelta(minutes=i)
+            records.append(SensorData(asset_id="PUMP-1", timestamp=ts, type="vibration", value=float(vibration[i])))
+            records.append(SensorData(asset_id="PUMP-1", timestamp=ts, type="rpm", value=float(rpm[i])))
+        with self.app.app_context():
+            db.session.add_all(records)
+            RunningStatsService().update_from_records(records)
+            db.session.commit()
+
+    def _diagnose(self, **extra):
+        # 2.5 at low speed is abnormal, but well inside the speed-blind envelope
+        rows = [{"value": 1.0, "rpm": 1000.0} for _ in range(20)] + [{"value": 2.5, "rpm": 1000.0} for _ in range(20)]
+        payload = {"asset_id": "PUMP-1", "asset_type": "Pump", "metric": "vibration", "sensor_data": rows}
+        payload.update(extra)
+        response = self.client.post('/api/analysis/run_diagnosis', json=payload)
+        self.assertEqual(response.status_code, 200, response.get_json())
+        return response.get_json()
+
+    def test_regime_envelope_trained_offline_is_looked_up(self):
+        self._store_history()
+        # Not trained yet: the stored speed-blind envelope applies
+        self.assertEqual(self._diagnose(regime_columns=["rpm"])["details"]["deviations_count"], 0)
+        with self.app.app_context():
+            self.assertIsNotNone(self.regimes.train("PUMP-1", "vibration", ["rpm"]))
+        with mock.patch.object(self.regimes, 'history', side_effect=AssertionError("history scanned")):
+            self.assertEqual(self._diagnose()["details"]["deviations_count"], 0)
+            self.assertEqual(self._diagnose(regime_columns=["rpm"])["details"]["deviations_count"], 20)
+        self.assertNotIn("PUMP-1", analysis.baseline_model.envelopes)
+
+    def test_regime_envelopes_are_kept_per_metric(self):
+        self._store_history()
+        with self.app.app_context():
+            vibration = self.regimes.train("PUMP-1", "vibration", ["rpm"])
+            self.assertIsNone(self.regimes.train("PUMP-1", "vibration", ["load"]))
+            self.assertIsNone(self.regimes.get("PUMP-1", "vibration", ["rpm"], "quantile"))
+            self.regimes.train("PUMP-1", "vibration", ["rpm"], "quantile")
+        self.assertEqual(self.regimes.get("PUMP-1", "vibration", ["rpm"]), vibration)
+        self.assertEqual(self.regimes.get("PUMP-1", "vibration", ["rpm"], "quantile")["envelopes"]["value"]["count"],
+                         vibration["envelopes"]["value"]["count"])
+
+    def test_series_anomaly_model_is_trained_once_and_looked_up(self):
+        self._store_history(n=300)
+        name = AnalysisEngine.series_model_name("PUMP-1", "vibration")
+        first = self._diagnose()["risk_score"]
+        self.assertTrue(os.path.exists(os.path.join(self.model_dir, f"{name}-v1.joblib")))
+        self.assertIsNone(self.engine.current)
+        with mock.patch.object(self.engine, 'fit_anomaly_model', side_effect=AssertionError("refitted")):
+            self.assertEqual(self._diagnose()["risk_score"], first)
+        # A series without stored history is scored by a model local to the request
+        self._diagnose(asset_id="PUMP-2")
+        self.assertEqual(list(self.engine.models), [name])
+        self.assertIsNone(self.engine.current)
+
+    def test_stored_features_reach_the_rules_under_their_signal_names(self):
+        tmp = tempfile.mkdtemp()
+        engine = FeatureEngine(state_dir=tmp, window=3, fft_window=None)
+        base = datetime(2024, 1, 1)
+        records = [
+            SensorData(asset_id="PUMP-1", timestamp=base + timedelta(minutes=i), type=metric, value=value)
+            for metric, value in (("Temp", 95.0), ("vib", 25.0)) for i in range(5)
+        ]
+        try:
+            with self.app.app_context():
+                db.session.add_all(records)
+                RunningStatsService().update_from_records(records)
+                engine.update_records(records)
+                db.session.commit()
+            rows = [{"value": 1.0} for _ in range(10)]
+            with mock.patch('backend.routes.analysis.feature_engine', engine):
+                # Stored "Temp" -> temperature_roll_mean; the payload's own vibration
+                # overrides the stored "vib" series
+                response = self.client.post('/api/analysis/run_diagnosis', json={
+                    "asset_id": "PUMP-1", "asset_type": "pump", "metric": "vibration", "sensor_data": rows
+                })
+                self.assertEqual(response.get_json()["diagnosis"], {"Lubrication Failure": 0.8})
+                # Without payload vibration the stored one applies
+                response = self.client.post('/api/analysis/run_diagnosis', json={
+                    "asset_id": "PUMP-1", "asset_type": "pump", "metric": "Temp", "sensor_data": rows
+                })
+                self.assertEqual(response.get_json()["diagnosis"], {"Unbalance / Misalignment": 0.7})
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    def test_regime_request_without_regime_history_uses_stored_envelope(self):
+        self._store_history()
+        with self.app.app_context():
+            SensorData.query.filter_by(type="rpm").delete()
+            db.session.commit()
+            self.assertIsNone(self.regimes.train("PUMP-1", "vibration", ["rpm"]))
+        self.assertEqual(self._diagnose(regime_columns=["rpm"])["details"]["deviations_count"], 0)
+
+if __name__ == '__main__':
+    unittest.main()
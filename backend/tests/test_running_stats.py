@@ -0,0 +1,184 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+import unittest
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+from backend.app import create_app
+from backend.config import Config
+from backend.models.shared import db
+from backend.models.asset import Asset
+from backend.models.project import Project
+from backend.models.sensor import SensorData
+from backend.models.running_stats import RunningStats
+from backend.services.running_stats import RunningStatsService, batch_moments, merge_moments
+from backend.services.asset_summary_service import AssetSummaryService
+from backend.utils.db_init import backfill_running_stats
+
+
+class TestConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    TESTING = True
+
+
+def _readings(asset_id, metric, values, start=0):
+    base = datetime(2024, 1, 1)
+    return [
+        SensorData(asset_id=asset_id, timestamp=base + timedelta(minutes=start + i), type=metric,
+                   value=float(v), unit="")
+        for i, v in enumerate(values)
+    ]
+
+
+class TestMomentMerging(unittest.TestCase):
+    def test_partitions_merge_to_full_statistics(self):
+        rng = np.random.default_rng(1)
+        n = 3000
+        df = pd.DataFrame({
+            "asset_id": rng.choice(["A", "B", "C"], n),
+            "metric": rng.choice(["pressure", "temperature"], n),
+            "value": rng.normal(1e6, 5, n),
+            "timestamp": pd.date_range("2024-01-01", periods=n, freq="min")
+        })
+        full = batch_moments(df)
+        # Unequal partitions, merged pairwise and all at once
+        cuts = [0, 7, 900, 901, 2500, n]
+        parts = [batch_moments(df.iloc[a:b]) for a, b in zip(cuts[:-1], cuts[1:])]
+        pairwise = None
+        for part in parts:
+            pairwise = merge_moments([pairwise, part])
+        for merged in (pairwise, merge_moments(parts)):
+            merged = merged.reindex(full.index)
+            self.assertTrue((merged["count"] == full["count"]).all())
+            np.testing.assert_allclose(merged["mean"], full["mean"], rtol=1e-12)
+            np.testing.assert_allclose(merged["m2"], full["m2"], rtol=1e-8)
+            self.assertTrue((merged["last_timestamp"] == full["last_timestamp"]).all())
+        var = df.groupby(["asset_id", "metric"])["value"].var().reindex(full.index)
+        np.testing.assert_allclose(full["m2"] / (full["count"] - 1), var, rtol=1e-8)
+
+
+class TestRunningStatsService(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.service = RunningStatsService()
+        with self.app.app_context():
+            db.create_all()
+            db.session.add(Project(id=1, name="P1", industry="Refining", plant_name="U1"))
+            db.session.add_all([
+                Asset(id="PV-1", name="Vessel", type="Pressure Vessel", project_id=1),
+                Asset(id="PV-2", name="Vessel", type="Pressure Vessel", project_id=1)
+            ])
+            db.session.commit()
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def test_batches_accumulate_and_match_rebuild(self):
+        rng = np.random.default_rng(2)
+        values = rng.normal(100, 4, 900)
+        with self.app.app_context():
+            for i, batch in enumerate(np.array_split(values, 4)):
+                records = _readings("PV-1", "pressure", batch, start=i * 1000)
+                db.session.add_all(records)
+                db.session.commit()
+                self.assertEqual(self.service.update_from_records(records), 1)
+                db.session.commit()
+
+            row = RunningStats.query.filter_by(asset_id="PV-1", metric="pressure").one()
+            self.assertEqual(row.count, 900)
+            self.assertAlmostEqual(row.mean, values.mean(), places=9)
+            self.assertAlmostEqual(row.std, values.std(ddof=1), places=9)
+            self.assertEqual(row.max_value, values.max())
+
+            envelope = self.service.envelopes("PV-1")["pressure"]
+            self.assertAlmostEqual(envelope["upper_bound"], values.mean() + 3 * values.std(ddof=1), places=6)
+
+            self.service.rebuild(["PV-1"])
+            db.session.commit()
+            rebuilt = RunningStats.query.filter_by(asset_id="PV-1", metric="pressure").one()
+            self.assertEqual(rebuilt.count, 900)
+            self.assertAlmostEqual(rebuilt.m2, row.m2, delta=1e-6 * row.m2)
+
+    def test_startup_backfill_folds_existing_history(self):
+        with self.app.app_context():
+            # Data stored before the statistics existed is folded in by the startup step
+            db.session.add_all(_readings("PV-2", "pressure", [10.0, 10.5, 9.5, 10.0]))
+            db.session.add_all(_readings("PV-2", "temperature", [300.0, 301.0], start=10))
+            db.session.commit()
+            self.assertEqual(backfill_running_stats(), ["PV-2"])
+            self.assertEqual(RunningStats.query.filter_by(asset_id="PV-2").count(), 2)
+
+            # Later batches merge into the backfilled rows; covered assets are left alone
+            records = _readings("PV-2", "pressure", [11.0, 9.0], start=100)
+            db.session.add_all(records)
+            self.service.update_from_records(records)
+            db.session.commit()
+            self.assertEqual(backfill_running_stats(), [])
+            self.assertEqual(RunningStats.query.filter_by(asset_id="PV-2", metric="pressure").one().count, 6)
+
+    def test_summary_reads_running_baseline(self):
+        with self.app.app_context():
+            records = _readings("PV-2", "pressure", [10.0, 10.5, 9.5, 10.0])
+            records += _readings("PV-2", "temperature", [300.0, 301.0], start=10)
+            db.session.add_all(records)
+            self.service.update_from_records(records)
+            db.session.commit()
+            summary = AssetSummaryService().build_summary("PV-2", 1)
+            params = summary["baseline"]["params"]
+            self.assertEqual(sorted(params), ["pressure", "temperature"])
+            self.assertEqual(params["pressure"]["count"], 4)
+            self.assertAlmostEqual(summary["baseline"]["confidence"], 0.06)
+
+    def test_summary_falls_back_to_history_without_writing(self):
+        with self.app.app_context():
+            db.session.add_all(_readings("PV-1", "pressure", [10.0, 11.0, 12.0]))
+            db.session.commit()
+            params = AssetSummaryService().build_summary("PV-1", 1)["baseline"]["params"]
+            self.assertEqual(params["pressure"]["count"], 3)
+            self.assertAlmostEqual(params["pressure"]["mean"], 11.0)
+            self.assertAlmostEqual(params["pressure"]["std"], 1.0)
+            self.assertEqual(RunningStats.query.count(), 0)
+
+    def test_seeded_series_keep_statistics_current(self):
+        from backend.routes.analysis import seed_from_synthetic
+        with self.app.app_context():
+            asset = db.session.get(Asset, "PV-1")
+            self.assertTrue(seed_from_synthetic(asset, metric="pressure", count=120))
+            self.assertTrue(seed_from_synthetic(asset, metric="pressure", count=50))
+            row = RunningStats.query.filter_by(asset_id="PV-1", metric="pressure").one()
+            self.assertEqual(row.count, 50)
+            summary = AssetSummaryService().build_summary("PV-1", 1)
+            self.assertEqual(summary["baseline"]["params"]["pressure"]["count"], 50)
+
+    def test_concurrent_first_insert_is_retried_as_a_merge(self):
+        with self.app.app_context():
+            first = _readings("PV-1", "pressure", [10.0, 12.0])
+            db.session.add_all(first)
+            self.service.update_from_records(first)
+            db.session.commit()
+
+            # The other ingest's row isn't visible to this one's lock query: its insert
+            # hits the unique constraint, and the retry merges into the stored row
+            locked_rows = self.service._locked_rows
+            calls = []
+
+            def racing(asset_ids):
+                calls.append(asset_ids)
+                return {} if len(calls) == 1 else locked_rows(asset_ids)
+
+            second = _readings("PV-1", "pressure", [14.0], start=10)
+            db.session.add_all(second)
+            self.service._locked_rows = racing
+            self.service.update_from_records(second)
+            db.session.commit()
+            self.assertEqual(len(calls), 2)
+            row = RunningStats.query.filter_by(asset_id="PV-1", metric="pressure").one()
+            self.assertEqual((row.count, row.mean), (3, 12.0))
+            self.assertEqual(SensorData.query.count(), 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+import tempfile
+import unittest
+import numpy as np
+from datetime import datetime, timedelta
+from backend.app import create_app
+from backend.config import Config
+from backend.models.shared import db
+from backend.models.asset import Asset
+from backend.models.project import Project
+from backend.models.sensor import SensorData
+from backend.models.risk import RiskAssessment
+from backend.routes import analysis
+from backend.services.ml_pipeline import MLPipeline
+from backend.services.model_registry import ModelRegistry
+from backend.services.score_cache import ScoreCache
+from backend.utils import auth
+
+
+class TestConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    TESTING = True
+
+
+class TestScoreCache(unittest.TestCase):
+    def setUp(self):
+        self._demo_public = auth.DEMO_PUBLIC
+        auth.DEMO_PUBLIC = True
+        self._pipeline = analysis.ml_pipeline
+        # Healthy noise with a recent full-model score is settled by the screening tier,
+        # so no model training here
+        analysis.ml_pipeline = MLPipeline(registry=ModelRegistry(tempfile.mkdtemp()), workers=1)
+        analysis.ml_pipeline.registry.save_last_score("PV-01", "pressure", 0.3)
+        self.app = create_app(TestConfig)
+        self.client = self.app.test_client()
+        self.start = datetime(2024, 1, 1)
+        rng = np.random.default_rng(7)
+        with self.app.app_context():
+            db.create_all()
+            db.session.add(Project(id=1, name="P1", industry="Refining", plant_name="U1"))
+            db.session.add(Asset(id="PV-01", name="Vessel", type="Pressure Vessel", project_id=1))
+            db.session.add_all([
+                SensorData(asset_id="PV-01", timestamp=self.start + timedelta(minutes=i), type="pressure", value=float(v))
+                for i, v in enumerate(20 + rng.normal(0, 1, 200))
+            ])
+            db.session.commit()
+
+    def tearDown(self):
+        auth.DEMO_PUBLIC = self._demo_public
+        analysis.ml_pipeline = self._pipeline
+
+    def _run(self):
+        res = self.client.post('/api/analysis/run_asset', json={"asset_id": "PV-01", "metric": "pressure", "project_id": 1})
+        self.assertEqual(res.status_code, 200)
+        return res.get_json()
+
+    def _risk_rows(self):
+        with self.app.app_context():
+            return RiskAssessment.query.filter_by(asset_id="PV-01").count()
+
+    def test_unchanged_series_hits_cache(self):
+        first, second = self._run(), self._run()
+        self.assertFalse(first["cached"])
+        self.assertTrue(second["cached"])
+        self.assertEqual(first["risk_score"], second["risk_score"])
+        self.assertEqual(self._risk_rows(), 1)
+
+        # A new reading moves the watermark: rescored, new risk row
+        with self.app.app_context():
+            db.session.add(SensorData(asset_id="PV-01", timestamp=self.start + timedelta(days=1), type="pressure", value=20.1))
+            db.session.commit()
+        self.assertFalse(self._run()["cached"])
+        self.assertEqual(self._risk_rows(), 2)
+
+        stats = self.client.get('/api/analysis/metrics').get_json()["score_cache"]
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 2))
+        self.assertAlmostEqual(stats["hit_rate"], 1 / 3, places=3)
+
+    def test_rows_ingested_while_scoring_miss_the_cache(self):
+        ml = analysis.ml_pipeline
+        prepare = ml._prepare_job
+
+        def prepare_then_ingest(*args, **kwargs):
+            job = prepare(*args, **kwargs)
+            # Arrives after the series was loaded, before the result is cached
+            db.session.add(SensorData(asset_id="PV-01", timestamp=self.start + timedelta(days=2), type="pressure", value=20.2))
+            db.session.commit()
+            return job
+
+        ml._prepare_job = prepare_then_ingest
+        self.assertFalse(self._run()["cached"])
+        ml._prepare_job = prepare
+        # The new row was not part of the cached result, so it is scored now
+        self.assertFalse(self._run()["cached"])
+        self.assertTrue(self._run()["cached"])
+
+    def test_lru_eviction(self):
+        cache = ScoreCache(max_entries=2)
+        for i in range(3):
+            cache.put(("k", i), {"risk_score": i})
+        self.assertIsNone(cache.get(("k", 0)))
+        self.assertEqual(cache.get(("k", 2)), {"risk_score": 2})
+        self.assertEqual(cache.stats()["entries"], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+import time
+from backend.services import scoring_worker
+
+
+class SlowPipeline:
+    def score_series(self, series, key, group, timestamps=None):
+        try:
+            time.sleep(5)
+        except Exception:
+            # Scorers swallow Exception; the timeout must still get through
+            return 0.0, 0.0
+        return 0.1, 0.2
+
+
+class FastPipeline:
+    def score_series(self, series, key, group, timestamps=None):
+        return 0.1, 0.2
+
+
+def test_series_timeout():
+    scoring_worker._pipeline = SlowPipeline()
+    start = time.perf_counter()
+    result = scoring_worker.score_series(("P-1", "vibration"), "pump", [1.0, 2.0], timeout=0.2)
+    assert result["status"] == "timeout"
+    assert result["arima"] is None and result["lstm"] is None
+    assert time.perf_counter() - start < 2
+    print("✅ Per-series timeout passed.")
+
+
+def test_series_ok():
+    scoring_worker._pipeline = FastPipeline()
+    result = scoring_worker.score_series(("P-1", "vibration"), "pump", [1.0, 2.0], timeout=5)
+    assert result["status"] == "ok"
+    assert (result["arima"], result["lstm"]) == (0.1, 0.2)
+    print("✅ Worker scoring passed.")
+
+
+if __name__ == "__main__":
+    test_series_timeout()
+    test_series_ok()
@@ -0,0 +1,169 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+import tempfile
+import unittest
+import numpy as np
+from datetime import datetime, timedelta
+from backend.app import create_app
+from backend.config import Config
+from backend.models.shared import db
+from backend.models.asset import Asset
+from backend.models.project import Project
+from backend.models.sensor import SensorData
+from backend.services.screening import ScreeningTier
+from backend.services.ml_pipeline import MLPipeline
+from backend.services.model_registry import ModelRegistry
+
+
+class TestConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    TESTING = True
+
+
+def _noise(rng, n=400):
+    return 20 + rng.normal(0, 1, n)
+
+
+class TestScreeningTier(unittest.TestCase):
+    def test_flags_anomalies_and_passes_healthy(self):
+        rng = np.random.default_rng(3)
+        healthy = [_noise(rng) for _ in range(50)]
+        spike, shift, burst = _noise(rng), _noise(rng), _noise(rng)
+        spike[-3] += 10
+        shift[-15:] += 3
+        burst[-10:] += rng.normal(0, 5, 10)
+        short = _noise(rng, 10)
+
+        # Conservative thresholds: no false positives in this batch
+        result = ScreeningTier(z_threshold=5.0, shift_threshold=5.0).screen(healthy + [spike, shift, burst, short])
+        self.assertFalse(result["flagged"][:50].any())
+        self.assertTrue(result["flagged"][50:53].all())
+        # Too short to screen: not flagged, but marked ineligible so callers send it on
+        self.assertFalse(result["eligible"][53])
+        self.assertTrue((result["score"][:50] < 1).all())
+
+    def test_mixed_lengths_and_frozen_sensor(self):
+        rng = np.random.default_rng(4)
+        frozen = np.full(200, 5.0)
+        result = ScreeningTier().screen([_noise(rng, 60), frozen, _noise(rng, 900)])
+        self.assertTrue(np.isfinite(result["score"]).all())
+        self.assertFalse(result["flagged"][1])
+
+    def test_calibrate_lowers_thresholds_to_flag_misses(self):
+        rng = np.random.default_rng(6)
+        mild = _noise(rng)
+        mild[-30:] += 0.5
+        state_path = os.path.join(tempfile.mkdtemp(), "screening.json")
+        tier = ScreeningTier(state_path=state_path)
+        self.assertFalse(tier.screen([mild])["flagged"][0])
+
+        factor = tier.calibrate([mild], [True])
+        self.assertLess(factor, 1.0)
+        self.assertTrue(tier.screen([mild])["flagged"][0])
+        # Calibrated thresholds survive a restart and never go back up
+        restored = ScreeningTier(state_path=state_path)
+        self.assertEqual((restored.z_threshold, restored.shift_threshold), (tier.z_threshold, tier.shift_threshold))
+        self.assertEqual(restored.calibrate([mild], [False]), 1.0)
+
+
+class _LevelModelPipeline(MLPipeline):
+    """Deterministic stand-in for ARIMA/LSTM: RoF grows with the tail's level change."""
+
+    def score_series(self, series, key=None, group=None, timestamps=None):
+        series = np.asarray(series, dtype=np.float64)
+        reference, tail = series[:-100], series[-50:]
+        z = abs(tail.mean() - reference.mean()) / (reference.std() + 1e-9)
+        return float(min(0.1 + z / 2, 1.0)), None
+
+
+class TestCascade(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        rng = np.random.default_rng(5)
+        start = datetime(2024, 1, 1)
+        with self.app.app_context():
+            db.create_all()
+            db.session.add(Project(id=1, name="P1", industry="Refining", plant_name="U1"))
+            db.session.add(Asset(id="PV-01", name="Vessel", type="Pressure Vessel", project_id=1))
+            db.session.add_all([
+                SensorData(asset_id="PV-01", timestamp=start + timedelta(minutes=i), type="pressure", value=float(v))
+                for i, v in enumerate(_noise(rng, 200))
+            ])
+            db.session.commit()
+
+    def test_healthy_series_replays_last_full_score(self):
+        registry_dir = tempfile.mkdtemp()
+        ml = MLPipeline(registry=ModelRegistry(registry_dir), workers=1)
+        ml.registry.save_last_score("PV-01", "pressure", 0.42)
+        with self.app.app_context():
+            records = SensorData.query.all()
+            summary = ml.run_for_assets(1, records)
+
+        self.assertEqual(summary[0]["tier"], "screen")
+        self.assertEqual(summary[0]["rof_score"], 0.42)
+        tiers = ml.last_run_stats["tiers"]
+        self.assertEqual((tiers["screen"]["passed"], tiers["full"]["series"]), (1, 0))
+        # No ARIMA/LSTM was trained for the screened-out series
+        self.assertEqual(os.listdir(os.path.join(registry_dir, "PV-01", "pressure")), ["last_score.json"])
+
+    def test_unscored_or_stale_series_go_to_full_models(self):
+        ml = _LevelModelPipeline(registry=ModelRegistry(tempfile.mkdtemp()), workers=1)
+        with self.app.app_context():
+            records = SensorData.query.all()
+            self.assertEqual(ml.run_for_assets(1, records)[0]["tier"], "full")
+            self.assertEqual(ml.run_for_assets(1, records)[0]["tier"], "screen")
+
+            ml.screen_refresh_hours = 0
+            self.assertEqual(ml.run_for_assets(1, records)[0]["tier"], "full")
+            self.assertEqual(ml.last_run_stats["tiers"]["screen"]["refreshed"], 1)
+
+    def test_screened_actions_match_full_scoring(self):
+        """Labelled drift / shift cases: the cascade recommends what full scoring does."""
+        rng = np.random.default_rng(8)
+        start = datetime(2024, 2, 1)
+        labels = {f"H-{i}": None for i in range(6)}
+        labels.update({f"D-{i}": "drift" for i in range(3)})
+        labels.update({f"S-{i}": "shift" for i in range(3)})
+        history, appended = {}, {}
+        for asset_id, label in labels.items():
+            x = _noise(rng, 400)
+            history[asset_id] = x[:300]
+            tail = x[300:].copy()
+            if label == "drift":
+                tail += np.linspace(0, 3, 100)
+            elif label == "shift":
+                tail[-30:] += 3
+            appended[asset_id] = tail
+
+        def records_for(values_by_asset):
+            return [
+                SensorData(asset_id=asset_id, timestamp=start + timedelta(minutes=i), type="pressure", value=float(v))
+                for asset_id, values in values_by_asset.items() for i, v in enumerate(values)
+            ]
+
+        cascade = _LevelModelPipeline(registry=ModelRegistry(tempfile.mkdtemp()), workers=1)
+        full = _LevelModelPipeline(registry=ModelRegistry(tempfile.mkdtemp()), workers=1, screening=False)
+        with self.app.app_context():
+            db.session.add_all([Asset(id=a, name=a, type="Pressure Vessel", project_id=1) for a in labels])
+            db.session.commit()
+            # First pass: nothing has a full-model score yet, so everything is fully scored
+            first = cascade.run_for_assets(1, records_for(history))
+            self.assertEqual({r["tier"] for r in first}, {"full"})
+
+            series = {a: np.concatenate([history[a], appended[a]]) for a in labels}
+            with_screen = {r["asset_id"]: r for r in cascade.run_for_assets(1, records_for(series))}
+            without = {r["asset_id"]: r for r in full.run_for_assets(1, records_for(series))}
+
+        for asset_id, label in labels.items():
+            screened, reference = with_screen[asset_id], without[asset_id]
+            self.assertEqual(MLPipeline._recommendation(screened["risk_score"]),
+                             MLPipeline._recommendation(reference["risk_score"]), asset_id)
+            if label:
+                self.assertEqual(screened["tier"], "full", asset_id)
+                self.assertIsNotNone(MLPipeline._recommendation(reference["risk_score"]), asset_id)
+        self.assertGreater(sum(r["tier"] == "screen" for r in with_screen.values()), 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,10 +1,11 @@
-from sqlalchemy import text
+from sqlalchemy import inspect, text
 from ..models.shared import db
 from ..models.project import Project
 from ..models.asset import Asset
 from ..models.sensor import SensorData
+from ..models.running_stats import RunningStats
 from ..models.risk import RiskAssessment
-from ..models.inspection import InspectionRecord
+from ..models.inspection import InspectionRecord, InspectionReading
 import os
 import pandas as pd
 from datetime import datetime, timedelta
@@ -30,8 +31,94 @@ def init_core_tables():
             created_at TIMESTAMPTZ DEFAULT NOW()
         );
     """))
+    db.session.execute(text("""
+        CREATE TABLE IF NOT EXISTS inspection_readings (
+            id BIGSERIAL PRIMARY KEY,
+            asset_id TEXT NOT NULL REFERENCES assets(id),
+            timestamp TIMESTAMP NOT NULL,
+            type TEXT NOT NULL,
+            value DOUBLE PRECISION NOT NULL,
+            location TEXT
+        );
+    """))
+    db.session.execute(text("""
+        CREATE INDEX IF NOT EXISTS ix_inspection_readings_asset_id ON inspection_readings (asset_id);
+    """))
+    db.session.execute(text("""
+        CREATE TABLE IF NOT EXISTS remaining_life_estimates (
+            id BIGSERIAL PRIMARY KEY,
+            asset_id TEXT NOT NULL REFERENCES assets(id),
+            project_id INTEGER REFERENCES projects(id),
+            computed_at TIMESTAMP,
+            method TEXT,
+            n_readings INTEGER,
+            governing_location TEXT,
+            current_thickness_mm DOUBLE PRECISION,
+            min_thickness_mm DOUBLE PRECISION,
+            corrosion_rate_mm_per_year DOUBLE PRECISION,
+            rate_std_error DOUBLE PRECISION,
+            remaining_life_years DOUBLE PRECISION,
+            remaining_life_low_years DOUBLE PRECISION,
+            remaining_life_high_years DOUBLE PRECISION,
+            last_inspection TIMESTAMP,
+            next_inspection TIMESTAMP
+        );
+    """))
+    db.session.execute(text("""
+        CREATE INDEX IF NOT EXISTS ix_remaining_life_estimates_project_id ON remaining_life_estimates (project_id);
+        CREATE INDEX IF NOT EXISTS ix_remaining_life_estimates_asset_id ON remaining_life_estimates (asset_id);
+    """))
+    db.session.execute(text("""
+        CREATE TABLE IF NOT EXISTS running_stats (
+            id BIGSERIAL PRIMARY KEY,
+            asset_id TEXT NOT NULL REFERENCES assets(id),
+            metric TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            mean DOUBLE PRECISION NOT NULL DEFAULT 0,
+            m2 DOUBLE PRECISION NOT NULL DEFAULT 0,
+            min_value DOUBLE PRECISION,
+            max_value DOUBLE PRECISION,
+            first_timestamp TIMESTAMP,
+            last_timestamp TIMESTAMP,
+            updated_at TIMESTAMP,
+            CONSTRAINT uq_running_stats_series UNIQUE (asset_id, metric)
+        );
+    """))
+    db.session.execute(text("""
+        CREATE INDEX IF NOT EXISTS ix_running_stats_asset_id ON running_stats (asset_id);
+    """))
+    db.session.execute(text("""
+        CREATE TABLE IF NOT EXISTS dashboard_versions (
+            project_id INTEGER PRIMARY KEY,
+            version BIGINT NOT NULL DEFAULT 0
+        );
+    """))
     db.session.commit()
 
+def _has_tables(*names):
+    inspector = inspect(db.engine)
+    return all(inspector.has_table(name) for name in names)
+
+def backfill_running_stats(chunk_size=50000):
+    """
+    Folds existing sensor_data history into running_stats for assets that have readings
+    but no statistics yet (history from before the table existed, seeded data). Ingest
+    keeps the rows current afterwards, so this is a no-op once every asset is covered.
+    """
+    from ..services.running_stats import RunningStatsService
+    if not _has_tables("assets", "sensor_data", "running_stats"):
+        return []
+    asset_ids = [
+        asset_id for (asset_id,) in db.session.query(Asset.id)
+        .filter(db.exists().where(SensorData.asset_id == Asset.id))
+        .filter(~db.exists().where(RunningStats.asset_id == Asset.id))
+        .all()
+    ]
+    if asset_ids:
+        RunningStatsService().rebuild(asset_ids, chunk_size=chunk_size)
+        db.session.commit()
+    return asset_ids
+
 def seed_demo_data():
     # Create a demo project if none exists
     demo = Project.query.filter_by(name="Demo Refinery A").first()
@@ -88,6 +175,26 @@ def seed_demo_data():
         db.session.add(insp)
         db.session.commit()
 
+    # Seed UT thickness and corrosion-rate readings for remaining-life estimates
+    if not InspectionReading.query.filter_by(asset_id="PV-102").first():
+        inspection_dir = os.path.join(os.path.dirname(__file__), '..', '..', 'data', 'pressure_vessels', 'inspection_data')
+        readings = []
+        for filename, column, reading_type in [
+            ("wall_thickness.csv", "thickness_mm", "thickness_mm"),
+            ("corrosion_rates.csv", "rate_mpy", "corrosion_rate_mpy"),
+        ]:
+            path = os.path.join(inspection_dir, filename)
+            if not os.path.exists(path):
+                continue
+            df = pd.read_csv(path, parse_dates=['date'])
+            readings.extend(
+                InspectionReading(asset_id="PV-102", timestamp=row['date'].to_pydatetime(), type=reading_type, value=float(row[column]))
+                for _, row in df.iterrows()
+            )
+        if readings:
+            db.session.bulk_save_objects(readings)
+            db.session.commit()
+
     # Seed a risk assessment if none
     if not RiskAssessment.query.filter_by(asset_id="PV-102").first():
         risk = RiskAssessment(
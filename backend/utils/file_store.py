@@ -0,0 +1,91 @@
+import io
+import json
+import os
+import re
+import tempfile
+import threading
+from contextlib import contextmanager
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # non-POSIX: locks only serialize threads of this process
+    fcntl = None
+
+_thread_locks = {}
+_thread_locks_guard = threading.Lock()
+
+
+def safe_name(value):
+    """Filesystem-safe name for asset ids / metric names."""
+    cleaned = re.sub(r'[^A-Za-z0-9._-]+', '_', str(value)).strip('._')
+    return cleaned or '_'
+
+
+def atomic_write_bytes(path, data):
+    """
+    Writes to a temp file in the same directory, then os.replace()s it over the target,
+    so concurrent readers never see a half-written file.
+    """
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def atomic_write_json(path, obj):
+    atomic_write_bytes(path, json.dumps(obj, default=float).encode('utf-8'))
+
+
+def read_json(path, default=None):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return default
+
+
+def atomic_write_npz(path, **arrays):
+    buffer = io.BytesIO()
+    np.savez(buffer, **arrays)
+    atomic_write_bytes(path, buffer.getvalue())
+
+
+def read_npz(path):
+    """Loads an .npz into a plain dict (no pickled objects allowed)."""
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            return {k: data[k] for k in data.files}
+    except FileNotFoundError:
+        return None
+
+
+@contextmanager
+def file_lock(path):
+    """
+    Exclusive lock on <path>.lock for a read-modify-write of path, held across threads
+    and processes (flock), so concurrent updates of one file don't lose each other.
+    """
+    lock_path = path + '.lock'
+    if fcntl is None:
+        with _thread_locks_guard:
+            lock = _thread_locks.setdefault(lock_path, threading.Lock())
+        with lock:
+            yield
+        return
+    os.makedirs(os.path.dirname(lock_path) or '.', exist_ok=True)
+    with open(lock_path, 'a') as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
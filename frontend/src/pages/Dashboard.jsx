@@ -2,7 +2,7 @@ import React, { useState, useEffect } from 'react';
 import { useProject } from '../context/ProjectContext';
 import KpiCard from '../components/KpiCard';
 import { AssetTable } from '../components/AssetTable';
-import { AssetService, AnalysisService, api } from '../services/api';
+import { AssetService, AnalysisService, ProjectService, api } from '../services/api';
 import { useAuth } from '../context/AuthContext';
 import { useNavigate } from 'react-router-dom';
 
@@ -50,13 +50,12 @@ const Dashboard = () => {
                 const data = await AssetService.getAllAssets(currentProject.id);
                 setAssets(data);
 
-                // Calc KPIs
-                const high = data.filter(a => a.risk_level === 'High').length;
-                const medium = data.filter(a => a.risk_level === 'Medium').length;
-                const stable = data.length - high - medium;
+                // KPIs are aggregated server-side
+                const overview = await ProjectService.getDashboard(currentProject.id);
+                const { High: high = 0, Medium: medium = 0, Low: stable = 0 } = overview.risk_histogram || {};
 
                 setKpi({
-                    total: data.length,
+                    total: overview.asset_count,
                     high,
                     medium,
                     stable
@@ -43,6 +43,10 @@ export const ProjectService = {
     getDetails: async (id) => {
         const response = await api.get(`/projects/${id}`);
         return response.data;
+    },
+    getDashboard: async (id, topN = 10) => {
+        const response = await api.get(`/projects/${id}/dashboard?top_n=${topN}`);
+        return response.data;
     }
 };
 